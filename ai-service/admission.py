@@ -0,0 +1,148 @@
+"""
+Admission Control for LLM Calls
+Caps in-flight calls per backend and queues the rest by priority
+"""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import Config
+from rolling_stats import RollingWindow
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a call is shed instead of queued.
+    status_code is 429 when the queue is full, 503 when the deadline would pass while waiting.
+    """
+
+    def __init__(self, reason: str, status_code: int, retry_after: float = 1.0):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Priority semaphore: at most `capacity` calls run at once, waiters are
+    admitted by (priority, arrival order). Interactive chat goes before batch jobs.
+    """
+
+    PRIORITIES = {"interactive": 0, "batch": 1}
+
+    def __init__(self, name: str, capacity: int, max_queue: int = Config.ADMISSION_MAX_QUEUE):
+        self.name = name
+        self.capacity = capacity
+        self.max_queue = max_queue
+
+        self._condition = threading.Condition()
+        self._queue = []
+        self._arrivals = itertools.count()
+        self.in_flight = 0
+
+        self.admitted = 0
+        self.shed = 0
+        self.rejected_full = 0
+        self.wait_times = RollingWindow()
+        self.hold_times = RollingWindow()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def _estimated_wait(self, position: int) -> float:
+        """Rough wait for a waiter at `position`: queued calls ahead divided over the slots"""
+        hold = self.hold_times.percentile(50) or 0.0
+        return hold * (position + 1) / self.capacity
+
+    def acquire(self, priority: str = "interactive", timeout: Optional[float] = None):
+        """
+        Take a slot, waiting in the priority queue if necessary.
+        Raises AdmissionRejected if the queue is full or the slot would not
+        be granted within `timeout` seconds.
+        """
+        rank = self.PRIORITIES.get(priority, self.PRIORITIES["batch"])
+        enqueued_at = time.monotonic()
+
+        with self._condition:
+            if self.in_flight < self.capacity and not self._queue:
+                self._admit(enqueued_at)
+                return
+
+            if len(self._queue) >= self.max_queue:
+                self.rejected_full += 1
+                raise AdmissionRejected(f"{self.name}: admission queue full", 429, self._estimated_wait(len(self._queue)))
+
+            ahead = sum(1 for entry in self._queue if entry[0] <= rank)
+            if timeout is not None and self._estimated_wait(ahead) > timeout:
+                # Would miss the deadline anyway: shed now instead of after waiting
+                self.shed += 1
+                raise AdmissionRejected(f"{self.name}: expected wait exceeds deadline", 503, self._estimated_wait(ahead))
+
+            ticket = (rank, next(self._arrivals))
+            heapq.heappush(self._queue, ticket)
+            wait_until = enqueued_at + timeout if timeout is not None else None
+
+            while True:
+                if self._queue[0] == ticket and self.in_flight < self.capacity:
+                    heapq.heappop(self._queue)
+                    self._admit(enqueued_at)
+                    # The next waiter may fit as well
+                    self._condition.notify_all()
+                    return
+
+                remaining = wait_until - time.monotonic() if wait_until is not None else None
+                if remaining is not None and remaining <= 0:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+                    self.shed += 1
+                    self._condition.notify_all()
+                    raise AdmissionRejected(f"{self.name}: deadline passed while queued", 503, self._estimated_wait(0))
+
+                self._condition.wait(remaining)
+
+    def try_acquire(self) -> bool:
+        """Take a free slot without queuing; False (nothing counted as shed) when none is free"""
+        with self._condition:
+            if self.in_flight < self.capacity and not self._queue:
+                self._admit(time.monotonic())
+                return True
+            return False
+
+    def _admit(self, enqueued_at: float):
+        self.in_flight += 1
+        self.admitted += 1
+        self.wait_times.add(time.monotonic() - enqueued_at)
+
+    def release(self, hold_seconds: Optional[float] = None):
+        """Free a slot; hold_seconds feeds the wait estimate used for shedding"""
+        with self._condition:
+            self.in_flight -= 1
+            if hold_seconds is not None:
+                self.hold_times.add(hold_seconds)
+            self._condition.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight calls and wait times"""
+        with self._condition:
+            by_priority = {name: 0 for name in self.PRIORITIES}
+            names = {rank: name for name, rank in self.PRIORITIES.items()}
+            for rank, _ in self._queue:
+                by_priority[names[rank]] += 1
+
+        return {
+            'capacity': self.capacity,
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue_depth,
+            'queued_by_priority': by_priority,
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'shed': self.shed,
+            'rejected_full': self.rejected_full,
+            'wait_seconds': self.wait_times.summary()
+        }
@@ -0,0 +1,211 @@
+"""
+Inference Backend Pool
+Spreads LLM calls over several Ollama / OpenAI-compatible servers
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+from config import Config
+from http_client import http_client
+from circuit_breaker import CircuitBreaker, CircuitOpenError, breakers
+from admission import AdmissionController
+from inference_drivers import DRIVERS
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceEndpoint:
+    """
+    One inference server.
+    kind is 'ollama' (native /api/chat) or 'openai' (OpenAI-compatible /v1 API, e.g. LM Studio, vLLM).
+    """
+
+    def __init__(self, url: str, kind: str = "ollama", max_concurrency: int = Config.ENDPOINT_MAX_CONCURRENCY,
+                 name: Optional[str] = None):
+        if kind not in DRIVERS:
+            raise ValueError(f"Unknown endpoint kind: {kind}")
+        self.url = url.rstrip("/")
+        self.kind = kind
+        self.driver = DRIVERS[kind]
+        self.max_concurrency = max_concurrency
+        self.name = name or f"{kind}@{urlparse(self.url).netloc}"
+
+        self.models: set = set()
+        # Raw entries of the last model-list response (shared with the model manager's catalog)
+        self.model_entries: List[Dict[str, Any]] = []
+        self.discovery_error: Optional[str] = None
+        self.requests = 0
+        self.last_discovery = 0.0
+        # Consecutive failures eject the endpoint until a half-open probe succeeds
+        self.breaker = CircuitBreaker(self.name)
+        # In-flight cap with a priority queue in front of it
+        self.admission = AdmissionController(self.name, max_concurrency)
+
+    @property
+    def outstanding(self) -> int:
+        return self.admission.in_flight
+
+    @property
+    def load(self) -> float:
+        """Running plus queued calls per slot"""
+        return (self.admission.in_flight + self.admission.queue_depth) / self.max_concurrency
+
+    @property
+    def chat_url(self) -> str:
+        return self.driver.chat_url(self.url)
+
+    def describe_models(self) -> List[Dict[str, Any]]:
+        """Raw model entries reported by the server"""
+        res = http_client.get(self.driver.models_url(self.url), read_timeout=5)
+        res.raise_for_status()
+        return self.driver.parse_models(res.json())
+
+    def list_models(self) -> List[str]:
+        """Ask the server which models it can serve"""
+        return [m["id"] for m in self.describe_models()]
+
+    def serves(self, model: str, assume: bool = True) -> bool:
+        """
+        True if the model is available here. Until discovery has succeeded once
+        the answer is `assume`: the configured models are tried, optional ones are not.
+        """
+        if not self.models:
+            return assume
+        # Ollama reports 'llama3.2:latest' for a model requested as 'llama3.2'
+        return model in self.models or f"{model}:latest" in self.models
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'url': self.url,
+            'kind': self.kind,
+            'outstanding': self.outstanding,
+            'max_concurrency': self.max_concurrency,
+            'requests': self.requests,
+            'models': sorted(self.models),
+            'admission': self.admission.get_stats(),
+            'health': self.breaker.get_stats()
+        }
+
+
+class BackendPool:
+    """
+    Least-outstanding-requests routing over healthy endpoints that serve the model.
+    When the chosen endpoint is at its concurrency limit the call waits in that
+    endpoint's admission queue (interactive before batch) or is shed.
+    """
+
+    def __init__(self, endpoints: List[InferenceEndpoint], discovery_interval: int = Config.MODEL_DISCOVERY_INTERVAL):
+        self.endpoints = endpoints
+        self.discovery_interval = discovery_interval
+        self._discovery_thread = None
+
+        for endpoint in endpoints:
+            breakers[endpoint.name] = endpoint.breaker
+
+    @classmethod
+    def from_config(cls) -> "BackendPool":
+        """
+        Parse INFERENCE_ENDPOINTS: comma-separated 'kind=url' entries with an
+        optional '|max_concurrency', e.g.
+        'ollama=http://gpu1:11434|4,ollama=http://gpu2:11434,openai=http://lm:1234/v1'
+        """
+        endpoints = []
+        for entry in Config.INFERENCE_ENDPOINTS.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            kind, _, rest = entry.partition("=")
+            url, _, limit = rest.partition("|")
+            endpoints.append(InferenceEndpoint(
+                url.strip(),
+                kind.strip(),
+                int(limit) if limit else Config.ENDPOINT_MAX_CONCURRENCY
+            ))
+        return cls(endpoints)
+
+    def discover(self):
+        """Refresh the model list of every endpoint; unreachable endpoints count as failures"""
+        for endpoint in self.endpoints:
+            try:
+                entries = endpoint.describe_models()
+                endpoint.model_entries = entries
+                endpoint.models = {entry["id"] for entry in entries}
+                endpoint.last_discovery = time.time()
+                endpoint.discovery_error = None
+                endpoint.breaker.record_success()
+            except Exception as e:
+                logger.warning(f"Model discovery failed for {endpoint.name}: {e}")
+                endpoint.discovery_error = str(e)
+                endpoint.breaker.record_failure()
+
+    def start_discovery(self):
+        """Run discover() now and then every discovery_interval seconds in the background"""
+        if self._discovery_thread:
+            return
+
+        def loop():
+            while True:
+                self.discover()
+                time.sleep(self.discovery_interval)
+
+        self._discovery_thread = threading.Thread(target=loop, name="model-discovery", daemon=True)
+        self._discovery_thread.start()
+
+    def is_available(self, model: str) -> bool:
+        """True if at least one endpoint serves the model"""
+        return any(e.serves(model) for e in self.endpoints)
+
+    def is_confirmed(self, model: str) -> bool:
+        """True if discovery has seen the model on at least one endpoint"""
+        return any(e.serves(model, assume=False) for e in self.endpoints)
+
+    def acquire(self, model: str, timeout: Optional[float] = None, priority: str = "interactive") -> Optional[InferenceEndpoint]:
+        """
+        Reserve a slot on the least loaded healthy endpoint for `model`.
+        Raises CircuitOpenError if every endpoint serving it is ejected and
+        AdmissionRejected if the call is shed; returns None if no endpoint
+        serves the model.
+        """
+        serving = [e for e in self.endpoints if e.serves(model)]
+        if not serving:
+            logger.error(f"No inference endpoint serves model '{model}'")
+            return None
+
+        healthy = sorted(
+            (e for e in serving if e.breaker.state != CircuitBreaker.OPEN),
+            key=lambda e: (e.breaker.state != CircuitBreaker.CLOSED, e.load)
+        )
+        if not healthy:
+            retry_after = min(e.breaker.retry_after() for e in serving)
+            raise CircuitOpenError(f"inference pool ({model})", retry_after)
+
+        endpoint = healthy[0]
+        endpoint.admission.acquire(priority, timeout)
+
+        # Checked after admission so a shed call never holds a half-open probe slot
+        if not endpoint.breaker.allow_request():
+            endpoint.admission.release()
+            raise CircuitOpenError(f"inference pool ({model})", endpoint.breaker.retry_after() or 1.0)
+
+        endpoint.requests += 1
+        return endpoint
+
+    def release(self, endpoint: InferenceEndpoint, hold_seconds: Optional[float] = None):
+        endpoint.admission.release(hold_seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-endpoint load and health"""
+        return {
+            'endpoints': [e.get_stats() for e in self.endpoints],
+            'outstanding': sum(e.outstanding for e in self.endpoints),
+            'capacity': sum(e.max_concurrency for e in self.endpoints),
+            'discovery_interval_seconds': self.discovery_interval
+        }
+
+
+# Global pool shared by all pipeline calls
+backend_pool = BackendPool.from_config()
@@ -0,0 +1,132 @@
+"""
+Circuit Breaker for LLM Backends
+Fails fast while Ollama / LM Studio is down instead of waiting for timeouts
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the backend's breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} backend unavailable (circuit open)")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Classic closed / open / half-open breaker.
+
+    - closed: calls pass; consecutive failures are counted
+    - open: calls are refused until recovery_timeout has elapsed
+    - half_open: a limited number of probe calls pass; one success closes
+      the breaker, one failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = Config.BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout: float = Config.BREAKER_RECOVERY_TIMEOUT,
+        half_open_max_calls: int = Config.BREAKER_HALF_OPEN_PROBES
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+
+        self.times_opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._recovery_elapsed():
+                return self.HALF_OPEN
+            return self._state
+
+    def _recovery_elapsed(self) -> bool:
+        return time.time() - self._opened_at >= self.recovery_timeout
+
+    def allow_request(self) -> bool:
+        """Return True if a call may go to the backend (and reserve a probe slot when half-open)"""
+        with self._lock:
+            if self._state == self.OPEN:
+                if not self._recovery_elapsed():
+                    self.rejected += 1
+                    return False
+                self._state = self.HALF_OPEN
+                self._probes_in_flight = 0
+                logger.info(f"Circuit '{self.name}' half-open: probing backend")
+
+            if self._state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_max_calls:
+                    self.rejected += 1
+                    return False
+                self._probes_in_flight += 1
+
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed: backend recovered")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probes_in_flight = 0
+
+    def release_probe(self):
+        """Give back a probe slot taken by allow_request() for a call that ended without an outcome"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.time()
+                self._probes_in_flight = 0
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker will let a probe through"""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.recovery_timeout - (time.time() - self._opened_at))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker state for /health"""
+        return {
+            'state': self.state,
+            'consecutive_failures': self._failures,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected,
+            'retry_after': round(self.retry_after(), 1)
+        }
+
+
+# One breaker per inference endpoint, registered by BackendPool
+breakers = {}
@@ -6,6 +6,48 @@ class Config:
     DB_USER = os.getenv("DB_USER", "ctis_user")
     DB_PASSWORD = os.getenv("DB_PASSWORD", "secret_password")
     DB_NAME = os.getenv("DB_NAME", "ctis_sims")
+    DB_PORT = int(os.getenv("DB_PORT", "3306"))
+    # Seconds to wait for a TCP connection (an unreachable replica must fail fast)
+    DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "3"))
+    
+    # Read replicas for generated queries: comma-separated host[:port] list with their own
+    # credentials and pool size (DB_READ_POOL_* below); a replica lagging more than
+    # REPLICA_MAX_LAG seconds is skipped and the primary serves reads when none is usable
+    DB_READ_HOSTS = os.getenv("DB_READ_HOSTS", "")
+    DB_READ_USER = os.getenv("DB_READ_USER", DB_USER)
+    DB_READ_PASSWORD = os.getenv("DB_READ_PASSWORD", DB_PASSWORD)
+    REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "10"))
+    REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "5"))
+    
+    # Result size: LIMIT max+1 is pushed into every query (the extra row marks truncation)
+    # and rows are streamed from an unbuffered cursor in batches of RESULT_FETCH_SIZE
+    MAX_RESULT_ROWS = int(os.getenv("MAX_RESULT_ROWS", "1000"))
+    RESULT_FETCH_SIZE = int(os.getenv("RESULT_FETCH_SIZE", "200"))
+    # Execution limit per generated query (MAX_EXECUTION_TIME hint, cut to the request deadline);
+    # KILL QUERY is sent this many seconds after the limit if MySQL has not stopped it
+    QUERY_MAX_EXECUTION_MS = int(os.getenv("QUERY_MAX_EXECUTION_MS", "15000"))
+    QUERY_KILL_GRACE = float(os.getenv("QUERY_KILL_GRACE", "2"))
+    # Cost gate: EXPLAIN FORMAT=JSON before execution. Above LIMIT_ROWS_EXAMINED (or a full scan
+    # of a FULL_SCAN_MIN_ROWS+ table) the query runs with FORCED_LIMIT rows; above MAX it is rejected
+    COST_GATE = os.getenv("COST_GATE", "false").lower() == "true"
+    COST_MAX_ROWS_EXAMINED = int(os.getenv("COST_MAX_ROWS_EXAMINED", "5000000"))
+    COST_LIMIT_ROWS_EXAMINED = int(os.getenv("COST_LIMIT_ROWS_EXAMINED", "500000"))
+    COST_FULL_SCAN_MIN_ROWS = int(os.getenv("COST_FULL_SCAN_MIN_ROWS", "100000"))
+    COST_FORCED_LIMIT = int(os.getenv("COST_FORCED_LIMIT", "100"))
+    COST_CACHE_SIZE = int(os.getenv("COST_CACHE_SIZE", "500"))
+    COST_CACHE_TTL = int(os.getenv("COST_CACHE_TTL", "600"))
+    # FULLTEXT rewrite: LIKE '%term%' on base-table columns with a FULLTEXT index
+    # (scripts/setup_fulltext_indexes.sh) becomes MATCH ... AGAINST in boolean mode.
+    # MIN_TOKEN_SIZE must match the server's innodb_ft_min_token_size
+    FULLTEXT_REWRITE = os.getenv("FULLTEXT_REWRITE", "false").lower() == "true"
+    FULLTEXT_MIN_TOKEN_SIZE = int(os.getenv("FULLTEXT_MIN_TOKEN_SIZE", "3"))
+    # Continuation tokens for /ask/page: HMAC key (paging is disabled while it is empty;
+    # generate one with `openssl rand -hex 32`, shared by all workers) and lifetime in seconds
+    CONTINUATION_SECRET = os.getenv("CONTINUATION_SECRET", "")
+    CONTINUATION_TTL = int(os.getenv("CONTINUATION_TTL", "3600"))
+    
+    # Schema cache: seconds between INFORMATION_SCHEMA fingerprint checks
+    SCHEMA_CHECK_INTERVAL = int(os.getenv("SCHEMA_CHECK_INTERVAL", "60"))
     
     # LM Studio
     LM_STUDIO_URL = os.getenv("LM_STUDIO_URL", "http://host.docker.internal:1234/v1")
@@ -17,11 +59,130 @@ class Config:
     OLLAMA_API_URL = f"http://{OLLAMA_HOST}:11434/api/generate"
     TRANSLATION_MODEL = "llama3.2:latest"
     
+    # Ollama prompt cache reuse: how long models stay loaded and a fixed context size
+    # (changing num_ctx between calls forces a reload). 0 = use the model default.
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "0"))
+    OLLAMA_NUM_KEEP = int(os.getenv("OLLAMA_NUM_KEEP", "0"))
+    
+    # Model warm-up: preload every configured model at startup and ping idle
+    # endpoints so Ollama never unloads them (OLLAMA_KEEP_ALIVE=-1 pins them for good;
+    # set OLLAMA_MAX_LOADED_MODELS >= 2 on the server so translation and SQL models don't evict each other)
+    MODEL_WARMUP = os.getenv("MODEL_WARMUP", "true").lower() == "true"
+    MODEL_KEEPALIVE_INTERVAL = int(os.getenv("MODEL_KEEPALIVE_INTERVAL", "300"))
+    # Cold start: Ollama load_duration above this, or latency this many times the model's p50
+    COLD_START_LOAD_SECONDS = float(os.getenv("COLD_START_LOAD_SECONDS", "1.0"))
+    COLD_START_SPIKE_FACTOR = float(os.getenv("COLD_START_SPIKE_FACTOR", "3"))
+    COLD_START_MIN_SAMPLES = int(os.getenv("COLD_START_MIN_SAMPLES", "20"))
+    
+    # Per-call generation caps (num_predict) to cut tail latency of verbose models
+    SQL_NUM_PREDICT = int(os.getenv("SQL_NUM_PREDICT", "256"))
+    TRANSLATION_NUM_PREDICT = int(os.getenv("TRANSLATION_NUM_PREDICT", "96"))
+    # SQL output: 'text' (free-form, SQL scraped with a regex) or 'json'
+    # (schema-constrained {"sql", "tables"} object; needs Ollama >= 0.5 or an OpenAI server with json_schema)
+    SQL_OUTPUT_MODE = os.getenv("SQL_OUTPUT_MODE", "text").lower()
+    SQL_JSON_NUM_PREDICT = int(os.getenv("SQL_JSON_NUM_PREDICT", "320"))
+    
+    # Verified few-shot examples: successful (question, SQL) pairs are stored and the
+    # most similar ones are added after the static examples
+    EXAMPLE_STORE = os.getenv("EXAMPLE_STORE", "true").lower() == "true"
+    EXAMPLE_STORE_PATH = os.getenv(
+        "EXAMPLE_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "verified_examples.json")
+    )
+    EXAMPLE_STORE_MAX = int(os.getenv("EXAMPLE_STORE_MAX", "500"))
+    # New examples are written to EXAMPLE_STORE_PATH in the background at most this often
+    EXAMPLE_STORE_FLUSH_INTERVAL = int(os.getenv("EXAMPLE_STORE_FLUSH_INTERVAL", "10"))
+    EXAMPLE_TOP_K = int(os.getenv("EXAMPLE_TOP_K", "2"))
+    EXAMPLE_MIN_SIMILARITY = float(os.getenv("EXAMPLE_MIN_SIMILARITY", "0.3"))
+    
+    # Executed SQL log: one JSON line per generated query run (SQL, statement sent, ms, rows),
+    # rotated to <path>.1 past MAX_BYTES; input of index_advisor.py
+    SQL_LOG = os.getenv("SQL_LOG", "true").lower() == "true"
+    SQL_LOG_PATH = os.getenv(
+        "SQL_LOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "executed_sql.jsonl")
+    )
+    SQL_LOG_MAX_BYTES = int(os.getenv("SQL_LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+    
+    # Entity value index: distinct item names, categories, locations and holders kept in memory;
+    # words of the question resolved to them are sent as exact literals for = / IN predicates
+    ENTITY_INDEX = os.getenv("ENTITY_INDEX", "true").lower() == "true"
+    ENTITY_REFRESH_INTERVAL = int(os.getenv("ENTITY_REFRESH_INTERVAL", "60"))
+    ENTITY_FULL_REFRESH_INTERVAL = int(os.getenv("ENTITY_FULL_REFRESH_INTERVAL", "3600"))
+    ENTITY_MAX_VALUES = int(os.getenv("ENTITY_MAX_VALUES", "5"))
+    ENTITY_FUZZY_CUTOFF = float(os.getenv("ENTITY_FUZZY_CUTOFF", "0.85"))
+    
+    # Inference HTTP client: pool sized to the number of request worker threads
+    # (FastAPI runs sync endpoints in a 40-thread pool by default)
+    WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "40"))
+    INFERENCE_POOL_SIZE = int(os.getenv("INFERENCE_POOL_SIZE", str(WORKER_CONCURRENCY)))
+    
+    # DB connection pools: at most MAX_CONNECTIONS checked out (one per worker thread by default),
+    # later callers queue up to DB_POOL_TIMEOUT seconds; connections are pinged on checkout
+    DB_POOL_MAX_CONNECTIONS = int(os.getenv("DB_POOL_MAX_CONNECTIONS", str(WORKER_CONCURRENCY)))
+    DB_POOL_MIN_CACHED = int(os.getenv("DB_POOL_MIN_CACHED", "1"))
+    DB_POOL_MAX_CACHED = int(os.getenv("DB_POOL_MAX_CACHED", str(max(5, WORKER_CONCURRENCY // 4))))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+    DB_READ_POOL_MIN = int(os.getenv("DB_READ_POOL_MIN", "1"))
+    DB_READ_POOL_MAX = int(os.getenv("DB_READ_POOL_MAX", str(WORKER_CONCURRENCY)))
+    INFERENCE_CONNECT_TIMEOUT = float(os.getenv("INFERENCE_CONNECT_TIMEOUT", "3"))
+    INFERENCE_READ_TIMEOUT = float(os.getenv("INFERENCE_READ_TIMEOUT", "60"))
+    # Extra attempts after a connection error / 5xx (each on a freshly chosen endpoint)
+    INFERENCE_RETRIES = int(os.getenv("INFERENCE_RETRIES", "1"))
+    
+    # Request deadlines: callers send X-Request-Timeout-Ms (or timeout_ms in the body);
+    # the pipeline stops retrying once the budget is spent
+    DEFAULT_REQUEST_BUDGET = float(os.getenv("DEFAULT_REQUEST_BUDGET", "60"))
+    MAX_REQUEST_BUDGET = float(os.getenv("MAX_REQUEST_BUDGET", "120"))
+    DEADLINE_SAFETY_MARGIN = float(os.getenv("DEADLINE_SAFETY_MARGIN", "1"))
+    MIN_CALL_BUDGET = float(os.getenv("MIN_CALL_BUDGET", "2"))
+    
+    # Adaptive per-model LLM timeouts: p99 latency x multiplier, clamped
+    LLM_MIN_TIMEOUT = float(os.getenv("LLM_MIN_TIMEOUT", "5"))
+    LLM_MAX_TIMEOUT = float(os.getenv("LLM_MAX_TIMEOUT", "60"))
+    ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "2"))
+    ADAPTIVE_TIMEOUT_MIN_SAMPLES = int(os.getenv("ADAPTIVE_TIMEOUT_MIN_SAMPLES", "20"))
+    
+    # Circuit breaker per LLM backend: consecutive failures before opening,
+    # seconds before a half-open probe, probes allowed while half-open
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "3"))
+    BREAKER_RECOVERY_TIMEOUT = float(os.getenv("BREAKER_RECOVERY_TIMEOUT", "30"))
+    BREAKER_HALF_OPEN_PROBES = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+    
+    # Inference backend pool: comma-separated 'kind=url[|max_concurrency]' entries,
+    # kind is 'ollama' or 'openai' (OpenAI-compatible, e.g. LM Studio). LM Studio is
+    # an ordinary 'openai' entry of the pool (default: LM_STUDIO_URL)
+    INFERENCE_ENDPOINTS = os.getenv(
+        "INFERENCE_ENDPOINTS", f"ollama=http://{OLLAMA_HOST}:11434,openai={LM_STUDIO_URL}"
+    )
+    ENDPOINT_MAX_CONCURRENCY = int(os.getenv("ENDPOINT_MAX_CONCURRENCY", "4"))
+    MODEL_DISCOVERY_INTERVAL = int(os.getenv("MODEL_DISCOVERY_INTERVAL", "60"))
+    # Calls waiting per endpoint once ENDPOINT_MAX_CONCURRENCY is reached (beyond: 429)
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "50"))
+    
     # Model Sequence (Fallback)
     MODEL_SEQUENCE = [
         {"name": "Primary", "model_identifier": "llama3.2:latest", "temperature": 0.1, "retry_count": 2},
         {"name": "Fallback", "model_identifier": "llama3.2:latest", "temperature": 0.3, "retry_count": 1}
     ]
+    
+    # Complexity routing: queries scoring at or below the threshold start on
+    # SECONDARY_MODEL and escalate to MODEL_SEQUENCE on failure (only once model discovery
+    # has found SECONDARY_MODEL on an endpoint; until then every query takes the full sequence)
+    MODEL_ROUTING = os.getenv("MODEL_ROUTING", "true").lower() == "true"
+    ROUTING_SIMPLE_THRESHOLD = int(os.getenv("ROUTING_SIMPLE_THRESHOLD", "1"))
+    
+    # Model registry: a model whose recent validation-pass rate drops below this
+    # is skipped by routing and tried after the others in the fallback sequence
+    MODEL_MIN_PASS_RATE = float(os.getenv("MODEL_MIN_PASS_RATE", "0.5"))
+    MODEL_STATS_MIN_SAMPLES = int(os.getenv("MODEL_STATS_MIN_SAMPLES", "10"))
+    
+    # Hedged generation: if the primary has not answered within its latency
+    # percentile, start the next model in parallel and keep the first working SQL
+    HEDGED_GENERATION = os.getenv("HEDGED_GENERATION", "false").lower() == "true"
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "90"))
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "2"))
+    HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "10"))
 
 # Export
 LM_STUDIO_URL = Config.LM_STUDIO_URL
@@ -0,0 +1,125 @@
+"""
+Result Continuation Tokens
+Signed, opaque cursors that let /ask/page fetch later pages of a validated query
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Any, Dict
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidContinuation(Exception):
+    """
+    Raised for a token that cannot be used.
+    status_code is 400 for a malformed or forged token, 410 once it expired
+    or the schema it was issued against has changed, 422 when the cost gate
+    refuses the query and 503 while paging is disabled.
+    """
+
+    def __init__(self, reason: str, status_code: int = 400):
+        super().__init__(reason)
+        self.status_code = status_code
+
+
+class ContinuationTokens:
+    """
+    Token = base64url(JSON payload) + "." + base64url(HMAC-SHA256 of the payload).
+
+    The payload holds the validated SQL, the row offset of the next page, the
+    page size, the schema fingerprint and the issue time. The signature stops
+    clients from swapping in their own SQL; pages re-validate it anyway.
+
+    Anyone who knows the key can sign arbitrary SQL, so there is no fallback
+    key: without CONTINUATION_SECRET no tokens are issued and every token is refused.
+
+    Example:
+        >>> tokens = ContinuationTokens(secret=b"k")
+        >>> token = tokens.issue("SELECT * FROM items;", offset=1000, page_size=1000, schema="abc")
+        >>> tokens.read(token)['offset']
+        1000
+    """
+
+    def __init__(self, secret: bytes = None, ttl: int = Config.CONTINUATION_TTL):
+        if secret is None:
+            secret = Config.CONTINUATION_SECRET.encode() or None
+        if secret is None:
+            logger.warning("CONTINUATION_SECRET is not set: truncated results get no continuation token")
+        self.secret = secret
+        self.ttl = ttl
+        self.issued = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.secret is not None
+
+    @staticmethod
+    def _encode(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    @staticmethod
+    def _decode(text: str) -> bytes:
+        return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+    def _sign(self, body: bytes) -> bytes:
+        return hmac.new(self.secret, body, hashlib.sha256).digest()
+
+    def issue(self, sql: str, offset: int, page_size: int, schema: str) -> str:
+        """Token for the page starting `offset` rows into the result of `sql`"""
+        body = json.dumps({
+            'sql': sql,
+            'offset': offset,
+            'page_size': page_size,
+            'schema': schema,
+            'issued_at': int(time.time())
+        }, separators=(",", ":")).encode()
+        self.issued += 1
+        return f"{self._encode(body)}.{self._encode(self._sign(body))}"
+
+    def read(self, token: str, schema: str = None) -> Dict[str, Any]:
+        """
+        Verify a token and return its payload.
+        `schema`: current schema fingerprint; a token from another schema is refused.
+        """
+        if not self.enabled:
+            raise InvalidContinuation("Paging is disabled (CONTINUATION_SECRET is not set)", status_code=503)
+        try:
+            body_part, signature_part = token.split(".")
+            body = self._decode(body_part)
+            signature = self._decode(signature_part)
+        except ValueError:
+            self.rejected += 1
+            raise InvalidContinuation("Malformed continuation token")
+
+        if not hmac.compare_digest(signature, self._sign(body)):
+            self.rejected += 1
+            raise InvalidContinuation("Invalid continuation token signature")
+
+        payload = json.loads(body)
+        if time.time() - payload['issued_at'] > self.ttl:
+            self.rejected += 1
+            raise InvalidContinuation("Continuation token expired", status_code=410)
+        if schema is not None and payload['schema'] != schema:
+            # Columns may have moved: the cached SQL is no longer trusted
+            self.rejected += 1
+            raise InvalidContinuation("Schema changed since the token was issued", status_code=410)
+        return payload
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'issued': self.issued,
+            'rejected': self.rejected,
+            'ttl_seconds': self.ttl
+        }
+
+
+# Global token issuer
+continuation_tokens = ContinuationTokens()
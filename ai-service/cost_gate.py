@@ -0,0 +1,194 @@
+"""
+EXPLAIN Cost Gate
+Estimates what a validated query would scan and stops or caps the expensive ones
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class CostGate:
+    """
+    Runs EXPLAIN FORMAT=JSON before a generated query and decides:
+
+    - allow:  estimated rows examined is within budget
+    - limit:  above COST_LIMIT_ROWS_EXAMINED, or a full scan of a table with
+              COST_FULL_SCAN_MIN_ROWS+ rows; executed with COST_FORCED_LIMIT
+              rows so MySQL can stop the scan early
+    - reject: above COST_MAX_ROWS_EXAMINED, or over the limit threshold when a
+              LIMIT cannot shorten the scan (ORDER BY, GROUP BY, DISTINCT, aggregates)
+
+    Verdicts are cached per SQL hash and dropped when the schema changes.
+    """
+
+    ALLOW = "allow"
+    LIMIT = "limit"
+    REJECT = "reject"
+
+    # Clauses that make MySQL read every qualifying row before returning the first one
+    FULL_READ = re.compile(r"\b(GROUP\s+BY|ORDER\s+BY|DISTINCT|COUNT|SUM|AVG|MIN|MAX)\b", re.IGNORECASE)
+    STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+
+    def __init__(self, connection_factory: Callable[[], Any], max_size: int = Config.COST_CACHE_SIZE,
+                 ttl_seconds: int = Config.COST_CACHE_TTL):
+        self._connection_factory = connection_factory
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.verdicts = {self.ALLOW: 0, self.LIMIT: 0, self.REJECT: 0}
+
+    @staticmethod
+    def _key(sql: str) -> str:
+        return hashlib.sha256(' '.join(sql.split()).encode()).hexdigest()
+
+    def check(self, sql: str) -> Optional[Dict[str, Any]]:
+        """
+        Verdict for a validated query: {'action', 'reason', 'rows_examined', 'full_scans', ...}.
+        None if EXPLAIN failed (the query is then run as usual).
+        """
+        key = self._key(sql)
+        with self._lock:
+            self.checks += 1
+            entry = self._cache.get(key)
+            if entry and time.time() - entry['at'] < self.ttl_seconds:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                self.verdicts[entry['verdict']['action']] += 1
+                return entry['verdict']
+
+        plan = self._explain(sql)
+        if plan is None:
+            return None
+        verdict = self.judge(sql, plan)
+
+        with self._lock:
+            self._cache[key] = {'verdict': verdict, 'at': time.time()}
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+            self.verdicts[verdict['action']] += 1
+
+        if verdict['action'] != self.ALLOW:
+            logger.warning(f"Cost gate: {verdict['action']} ({verdict['reason']}) for {sql[:200]}")
+        return verdict
+
+    def _explain(self, sql: str) -> Optional[Dict[str, Any]]:
+        conn = self._connection_factory()
+        if conn is None:
+            return None
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"EXPLAIN FORMAT=JSON {sql}")
+                row = cursor.fetchone()
+            return json.loads(next(iter(row.values())))
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            logger.warning(f"EXPLAIN FORMAT=JSON failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def judge(self, sql: str, plan: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the thresholds to a parsed EXPLAIN FORMAT=JSON document"""
+        tables: List[Dict[str, Any]] = []
+        examined = int(self._scan(plan, tables))
+        full_scans = [
+            t for t in tables
+            if t['access_type'] == 'ALL' and t['rows'] >= Config.COST_FULL_SCAN_MIN_ROWS
+        ]
+        cost = plan.get('query_block', {}).get('cost_info', {}).get('query_cost')
+
+        verdict = {
+            'action': self.ALLOW,
+            'reason': None,
+            'rows_examined': examined,
+            'full_scans': [t['table'] for t in full_scans],
+            'query_cost': float(cost) if cost is not None else None,
+            'max_rows': None
+        }
+
+        if examined > Config.COST_MAX_ROWS_EXAMINED:
+            verdict.update(action=self.REJECT, reason=f"~{examined} rows examined")
+        elif examined > Config.COST_LIMIT_ROWS_EXAMINED or full_scans:
+            reason = f"~{examined} rows examined" if not full_scans else f"full scan of {', '.join(verdict['full_scans'])}"
+            if self.FULL_READ.search(self.STRING_LITERAL.sub("''", sql)):
+                # Sorting / grouping reads every row first: a LIMIT would not shorten the scan
+                verdict.update(action=self.REJECT, reason=reason)
+            else:
+                verdict.update(action=self.LIMIT, reason=reason, max_rows=Config.COST_FORCED_LIMIT)
+        return verdict
+
+    @classmethod
+    def _scan(cls, node: Any, tables: List[Dict[str, Any]]) -> float:
+        """
+        Estimated rows examined under a plan node. In a nested loop each table
+        is scanned once per row produced by the tables before it.
+        Every table access is appended to `tables`.
+        """
+        if isinstance(node, list):
+            return sum(cls._scan(item, tables) for item in node)
+        if not isinstance(node, dict):
+            return 0.0
+
+        examined = 0.0
+        for key, value in node.items():
+            if key == 'nested_loop':
+                prefix = 1.0
+                for entry in value:
+                    table = entry.get('table', {})
+                    per_scan, once = cls._table(table, tables)
+                    examined += prefix * per_scan + once
+                    prefix = max(1.0, float(table.get('rows_produced_per_join', prefix)))
+            elif key == 'table':
+                per_scan, once = cls._table(value, tables)
+                examined += per_scan + once
+            elif isinstance(value, (dict, list)):
+                examined += cls._scan(value, tables)
+        return examined
+
+    @classmethod
+    def _table(cls, table: Dict[str, Any], tables: List[Dict[str, Any]]):
+        """(rows examined per scan, rows examined once to materialize a view or derived table)"""
+        rows = float(table.get('rows_examined_per_scan', 0))
+        tables.append({
+            'table': table.get('table_name'),
+            'access_type': table.get('access_type'),
+            'rows': int(rows)
+        })
+        return rows, cls._scan(table.get('materialized_from_subquery', {}), tables)
+
+    def invalidate(self, snapshot: Any = None):
+        """Schema listener: plans of the old schema no longer apply"""
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': Config.COST_GATE,
+                'checks': self.checks,
+                'cache_hits': self.cache_hits,
+                'cache_size': len(self._cache),
+                'errors': self.errors,
+                'verdicts': dict(self.verdicts),
+                'thresholds': {
+                    'max_rows_examined': Config.COST_MAX_ROWS_EXAMINED,
+                    'limit_rows_examined': Config.COST_LIMIT_ROWS_EXAMINED,
+                    'full_scan_min_rows': Config.COST_FULL_SCAN_MIN_ROWS,
+                    'forced_limit': Config.COST_FORCED_LIMIT
+                }
+            }
@@ -0,0 +1,147 @@
+"""
+Instrumented MySQL Connection Pool
+PooledDB with a bounded checkout queue, ping-on-checkout and exported statistics
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+import pymysql
+from dbutils.pooled_db import PooledDB
+
+from config import Config
+from rolling_stats import RollingWindow
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhausted(Exception):
+    """Raised when no connection became free within the checkout timeout"""
+
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f"DB pool {name} exhausted (no connection within {timeout:.1f}s)")
+        self.name = name
+        self.retry_after = timeout
+
+
+class InstrumentedPool:
+    """
+    Wraps DBUtils PooledDB:
+
+    - at most max_connections connections are checked out; further callers
+      queue for up to `timeout` seconds, then get PoolExhausted
+    - ping=1: every checkout pings the connection and transparently reconnects
+      one that died (e.g. after a MySQL restart)
+    - checkout wait times, active / idle / waiting counts and connection errors
+
+    Example:
+        >>> pool = InstrumentedPool("primary", host="db", user="u", password="p", database="ctis_sims")
+        >>> conn = pool.connection()
+        >>> conn.close()   # back to the pool, frees a checkout slot
+    """
+
+    def __init__(self, name: str, max_connections: int = Config.DB_POOL_MAX_CONNECTIONS,
+                 min_cached: int = Config.DB_POOL_MIN_CACHED, max_cached: int = Config.DB_POOL_MAX_CACHED,
+                 timeout: float = Config.DB_POOL_TIMEOUT, **connect_kwargs):
+        self.name = name
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._pool = PooledDB(
+            creator=pymysql,
+            mincached=min_cached,
+            maxcached=min(max_cached, max_connections),
+            maxconnections=max_connections,
+            # Checkouts are bounded by the semaphore below; blocking is a safety net only
+            blocking=True,
+            ping=1,
+            cursorclass=pymysql.cursors.DictCursor,
+            **connect_kwargs
+        )
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.last_error = None
+        self.wait_times = RollingWindow()
+
+    def connection(self) -> "_CheckedOutConnection":
+        """Check out a connection, waiting up to `timeout` seconds for a free slot"""
+        started = time.monotonic()
+        with self._lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.timeout)
+        with self._lock:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        self.wait_times.add(waited)
+        if not acquired:
+            with self._lock:
+                self.timeouts += 1
+            logger.warning(f"DB pool {self.name}: no free connection after {waited:.1f}s")
+            raise PoolExhausted(self.name, self.timeout)
+
+        try:
+            conn = self._pool.connection()
+        except Exception as e:
+            self._slots.release()
+            with self._lock:
+                self.errors += 1
+                self.last_error = str(e)
+            raise
+
+        with self._lock:
+            self.active += 1
+            self.checkouts += 1
+        return _CheckedOutConnection(self, conn)
+
+    def _release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_connections': self.max_connections,
+                'active': self.active,
+                # PooledDB keeps returned connections in its idle cache
+                'idle': len(getattr(self._pool, '_idle_cache', [])),
+                'waiting': self.waiting,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'connection_errors': self.errors,
+                'last_error': self.last_error,
+                'wait_seconds': self.wait_times.summary()
+            }
+
+
+class _CheckedOutConnection:
+    """Pooled connection whose close() also frees the checkout slot (once)"""
+
+    def __init__(self, pool: InstrumentedPool, conn: Any):
+        self._pool = pool
+        self._conn = conn
+        self._closed = False
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._conn.close()
+        finally:
+            self._pool._release()
+
+    def __del__(self):
+        # A caller that forgot close() must not hold its slot forever
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
@@ -0,0 +1,77 @@
+"""
+Request Deadlines
+Carries the caller's time budget through the pipeline so no stage outlives it
+"""
+import logging
+import time
+from typing import Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the remaining request budget is too small to continue"""
+    pass
+
+
+class Deadline:
+    """
+    Absolute deadline for one request (monotonic clock).
+
+    Example:
+        >>> deadline = Deadline(budget_seconds=30)
+        >>> deadline.timeout(60)   # a 60s call gets at most the remaining ~30s
+        29.99...
+    """
+
+    # Smallest budget a caller may ask for (header and body alike)
+    MIN_BUDGET_MS = 1000
+
+    def __init__(self, budget_seconds: float):
+        self.budget_seconds = budget_seconds
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + budget_seconds
+
+    @classmethod
+    def from_request(cls, header_ms: Optional[str] = None, body_ms: Optional[int] = None) -> "Deadline":
+        """
+        Build a deadline from X-Request-Timeout-Ms or the body's timeout_ms.
+        A header that is not a number or is below MIN_BUDGET_MS is ignored.
+        A safety margin is kept so the response still reaches the caller in time.
+        """
+        budget_ms = body_ms
+        if header_ms:
+            try:
+                value = int(header_ms)
+            except ValueError:
+                value = None
+            if value is not None and value >= cls.MIN_BUDGET_MS:
+                budget_ms = value
+            else:
+                logger.warning(f"Ignoring X-Request-Timeout-Ms {header_ms!r} (needs an integer >= {cls.MIN_BUDGET_MS})")
+
+        budget = budget_ms / 1000 if budget_ms else Config.DEFAULT_REQUEST_BUDGET
+        budget = min(budget, Config.MAX_REQUEST_BUDGET)
+        return cls(max(0.0, budget - Config.DEADLINE_SAFETY_MARGIN))
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def ensure(self, needed: float = 0.0, stage: str = "request"):
+        """Raise DeadlineExceeded unless at least `needed` seconds are left"""
+        if self.remaining() <= needed:
+            raise DeadlineExceeded(
+                f"Deadline exceeded before {stage} ({self.elapsed():.1f}s of {self.budget_seconds:.1f}s used)"
+            )
+
+    def timeout(self, preferred: float) -> float:
+        """Clamp a per-call timeout to the remaining budget"""
+        return min(preferred, self.remaining())
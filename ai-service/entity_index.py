@@ -0,0 +1,230 @@
+"""
+Entity Value Index
+Resolves names, categories, locations and holders in a question to exact database values
+"""
+import difflib
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class EntityIndex:
+    """
+    In-memory index of the distinct values behind the text columns of
+    view_general_inventory. The view has no timestamps, so values are read
+    from its base tables: an incremental refresh every ENTITY_REFRESH_INTERVAL
+    seconds picks up rows with a newer updated_at, a full rebuild every
+    ENTITY_FULL_REFRESH_INTERVAL drops values that no longer exist.
+
+    Matching is per word after Turkish case/accent folding ('İstanbul',
+    'istanbul' and 'ISTANBUL' are the same word): exact words, words with a
+    Turkish suffix ('ahmetin' -> 'ahmet') and close misspellings (difflib).
+
+    Example:
+        >>> index.resolve("ahmetin laptopları B212'de mi")
+        {'current_holder': ['Ahmet Yılmaz'], 'location': ['B212']}
+    """
+
+    # view column -> (base table, source column, filter)
+    SOURCES = {
+        'item_name': ('items', 'name', 'is_active = 1'),
+        'category_name': ('item_categories', 'category_name', None),
+        'location': ('items', 'location', 'is_active = 1'),
+        'current_holder': ('users', 'name', None),
+    }
+
+    TURKISH_FOLD = str.maketrans("ıçşğöüâîû", "icsgouaiu")
+
+    STOPWORDS = {
+        # English
+        "the", "a", "an", "of", "in", "on", "at", "to", "for", "is", "are", "do", "does", "we", "i", "me",
+        "my", "our", "have", "has", "what", "which", "where", "who", "show", "list", "all", "items", "item",
+        "how", "many", "much", "with", "and", "or", "by", "from", "this", "that", "there",
+        # Turkish
+        "ve", "ile", "bu", "su", "bir", "ne", "nerede", "hangi", "kim", "kimde", "mi", "mu", "var", "yok",
+        "tum", "butun", "kac", "tane", "olan", "icin", "de", "da", "goster", "listele",
+    }
+
+    # A Turkish suffix adds at most this many letters ('ahmet' -> 'ahmetlerin')
+    MAX_SUFFIX = 5
+
+    def __init__(self, connection_factory: Callable[[], Any],
+                 refresh_interval: int = Config.ENTITY_REFRESH_INTERVAL,
+                 full_refresh_interval: int = Config.ENTITY_FULL_REFRESH_INTERVAL):
+        self._connection_factory = connection_factory
+        self.refresh_interval = refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+        self._lock = threading.Lock()
+        self._thread = None
+        # column -> original values; folded word -> {(column, value)}
+        self._values: Dict[str, Set[str]] = {column: set() for column in self.SOURCES}
+        self._words: Dict[str, Set[Tuple[str, str]]] = {}
+        # first letter -> words, so a misspelling is only compared with plausible candidates
+        self._by_initial: Dict[str, Set[str]] = {}
+        self._watermark = None
+        self.full_refreshed_at = 0.0
+        self.full_refreshes = 0
+        self.incremental_refreshes = 0
+        self.refreshed_at = 0.0
+        self.lookups = 0
+        self.resolved = 0
+
+    @classmethod
+    def fold(cls, text: str) -> str:
+        """Turkish-aware lowercase without accents: 'İĞNE Işık' -> 'igne isik'"""
+        # Turkish casing first: 'I' lowers to dotless 'ı', 'İ' to 'i'
+        text = text.replace("I", "ı").replace("İ", "i").lower()
+        return text.translate(cls.TURKISH_FOLD)
+
+    @classmethod
+    def words(cls, text: str) -> List[str]:
+        # An apostrophe starts a suffix in Turkish ("B212'de", "Ahmet'in")
+        text = re.sub(r"['’]\w+", "", text)
+        return re.findall(r"[a-z0-9]+", cls.fold(text))
+
+    # --- Refresh ---
+
+    def start(self):
+        """Build the index and keep it fresh in the background"""
+        if self._thread or not Config.ENTITY_INDEX:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Entity index refresh failed: {e}")
+                time.sleep(self.refresh_interval)
+
+        self._thread = threading.Thread(target=loop, name="entity-index", daemon=True)
+        self._thread.start()
+
+    def refresh(self, full: bool = False):
+        """Incremental refresh, or a full rebuild when forced or due"""
+        full = full or self._watermark is None or time.time() - self.full_refreshed_at > self.full_refresh_interval
+
+        conn = self._connection_factory()
+        if conn is None:
+            return
+        try:
+            with conn.cursor() as cursor:
+                # DB clock, so app/DB clock skew cannot skip rows
+                cursor.execute("SELECT NOW() AS now")
+                now = cursor.fetchone()['now']
+                fetched = {}
+                for column, (table, source, condition) in self.SOURCES.items():
+                    conditions = [condition] if condition else []
+                    params = ()
+                    if not full:
+                        conditions.append("updated_at >= %s")
+                        params = (self._watermark,)
+                    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+                    cursor.execute(f"SELECT DISTINCT {source} AS value FROM {table}{where}", params)
+                    fetched[column] = {row['value'] for row in cursor.fetchall() if row['value']}
+        finally:
+            conn.close()
+
+        with self._lock:
+            if full:
+                self._values = fetched
+                self._words = {}
+                self._by_initial = {}
+                for column, values in fetched.items():
+                    self._add(column, values)
+                self.full_refreshed_at = time.time()
+                self.full_refreshes += 1
+            else:
+                for column, values in fetched.items():
+                    self._add(column, values - self._values[column])
+                    self._values[column] |= values
+                self.incremental_refreshes += 1
+            self._watermark = now
+            self.refreshed_at = time.time()
+
+        if full:
+            logger.info(f"Entity index built: {', '.join(f'{c}={len(v)}' for c, v in fetched.items())}")
+
+    def _add(self, column: str, values: Set[str]):
+        for value in values:
+            for word in self.words(value):
+                self._words.setdefault(word, set()).add((column, value))
+                self._by_initial.setdefault(word[0], set()).add(word)
+
+    # --- Lookup ---
+
+    def _match_word(self, word: str) -> Set[Tuple[str, str]]:
+        """Exact word, then the word minus a Turkish suffix, then a close misspelling"""
+        hits = self._words.get(word)
+        if hits:
+            return hits
+        for cut in range(1, min(self.MAX_SUFFIX, len(word) - 3) + 1):
+            hits = self._words.get(word[:-cut])
+            if hits:
+                return hits
+        if len(word) >= 4:
+            candidates = self._by_initial.get(word[0], ())
+            close = difflib.get_close_matches(word, candidates, n=1, cutoff=Config.ENTITY_FUZZY_CUTOFF)
+            if close:
+                return self._words[close[0]]
+        return set()
+
+    def resolve(self, *texts: str) -> Dict[str, List[str]]:
+        """
+        Exact values per view column for the words of the given texts
+        (original question and its translation). A column matched by more than
+        ENTITY_MAX_VALUES values is dropped: the word is too generic to pin down.
+        """
+        self.lookups += 1
+        words = []
+        for text in texts:
+            words.extend(w for w in self.words(text or "") if len(w) >= 2 and w not in self.STOPWORDS)
+
+        matches: Dict[str, Set[str]] = {}
+        with self._lock:
+            if not self._words:
+                return {}
+            for word in dict.fromkeys(words):
+                for column, value in self._match_word(word):
+                    matches.setdefault(column, set()).add(value)
+
+        resolved = {
+            column: sorted(values)
+            for column, values in matches.items()
+            if len(values) <= Config.ENTITY_MAX_VALUES
+        }
+        if resolved:
+            self.resolved += 1
+        return resolved
+
+    @staticmethod
+    def describe(entities: Dict[str, List[str]]) -> Optional[str]:
+        """Prompt lines for resolved values, as SQL literals"""
+        if not entities:
+            return None
+        lines = []
+        for column, values in entities.items():
+            literals = ", ".join("'" + value.replace("'", "''") + "'" for value in values)
+            lines.append(f"{column} = {literals}" if len(values) == 1 else f"{column} IN ({literals})")
+        return "Known values: " + "; ".join(lines)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            sizes = {column: len(values) for column, values in self._values.items()}
+            words = len(self._words)
+        return {
+            'enabled': Config.ENTITY_INDEX,
+            'values': sizes,
+            'words': words,
+            'full_refreshes': self.full_refreshes,
+            'incremental_refreshes': self.incremental_refreshes,
+            'seconds_since_refresh': round(time.time() - self.refreshed_at) if self.refreshed_at else None,
+            'lookups': self.lookups,
+            'resolve_rate': round(self.resolved / self.lookups * 100, 2) if self.lookups else 0
+        }
@@ -0,0 +1,210 @@
+"""
+Verified Example Store
+(question, SQL) pairs that executed successfully, retrieved as few-shot examples
+"""
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ExampleStore:
+    """
+    JSON-file backed store of verified examples.
+
+    Similarity is TF-IDF weighted cosine over word tokens: cheap enough to
+    score every stored example per request, no embedding model needed.
+
+    add() only updates memory; a background thread writes the file every
+    flush_interval seconds when something changed (and flush() on shutdown).
+
+    Example:
+        >>> store = ExampleStore(path="/tmp/examples.json")
+        >>> store.add("Where are the laptops?", "Generate SQL for: Where are the laptops?", "SELECT ...;", [])
+        >>> store.search("where are laptops", k=1)[0]['question']
+        'Where are the laptops?'
+    """
+
+    STOPWORDS = {
+        "the", "a", "an", "of", "in", "on", "at", "to", "for", "is", "are", "do", "does",
+        "we", "i", "me", "my", "our", "have", "has", "what", "which", "show", "list", "all"
+    }
+
+    def __init__(
+        self,
+        path: str = Config.EXAMPLE_STORE_PATH,
+        max_examples: int = Config.EXAMPLE_STORE_MAX,
+        flush_interval: int = Config.EXAMPLE_STORE_FLUSH_INTERVAL
+    ):
+        self.path = path
+        self.max_examples = max_examples
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._examples: List[Dict[str, Any]] = []
+        self._dirty = False
+        self._thread = None
+        self.retrievals = 0
+        self.hits = 0
+        self.added = 0
+        self.saves = 0
+        self.save_errors = 0
+        self._load()
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        words = re.findall(r"[a-z0-9çğıöşü]+", text.lower())
+        # Crude plural folding so 'laptop' matches 'laptops'
+        return [
+            w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+            for w in words if w not in cls.STOPWORDS
+        ]
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                examples = json.load(f)
+            for example in examples:
+                example['tokens'] = Counter(self.tokenize(example['question']))
+            self._examples = examples
+            logger.info(f"Loaded {len(examples)} verified examples from {self.path}")
+        except Exception as e:
+            logger.error(f"Could not load example store {self.path}: {e}")
+
+    def _save(self, examples: List[Dict[str, Any]]):
+        # Written to a temp file first so a crash never leaves half a JSON file
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                [{k: v for k, v in e.items() if k != 'tokens'} for e in examples],
+                f, ensure_ascii=False, indent=1
+            )
+        os.replace(tmp_path, self.path)
+
+    def flush(self):
+        """Write the store to disk if it changed since the last write"""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                examples = list(self._examples)
+                self._dirty = False
+            try:
+                self._save(examples)
+                self.saves += 1
+            except Exception as e:
+                self.save_errors += 1
+                with self._lock:
+                    self._dirty = True
+                logger.error(f"Could not persist example store: {e}")
+
+    def start(self):
+        """Flush pending examples in the background every flush_interval seconds"""
+        if self._thread:
+            return
+
+        def loop():
+            while True:
+                time.sleep(self.flush_interval)
+                self.flush()
+
+        self._thread = threading.Thread(target=loop, name="example-store-flush", daemon=True)
+        self._thread.start()
+
+    def add(self, question: str, request: str, sql: str, tables: List[str]):
+        """
+        Store a verified example. `request` is the exact user message the SQL
+        answered (question plus date range / aggregation lines).
+        A repeated request replaces the older SQL.
+        """
+        with self._lock:
+            if any(e['request'] == request and e['sql'] == sql for e in self._examples):
+                return
+            self._examples = [e for e in self._examples if e['request'] != request]
+            self._examples.append({
+                'question': question,
+                'request': request,
+                'sql': sql,
+                'tables': tables,
+                'added_at': time.time(),
+                'tokens': Counter(self.tokenize(question))
+            })
+            # Oldest examples go first once the store is full
+            if len(self._examples) > self.max_examples:
+                self._examples = self._examples[-self.max_examples:]
+            self.added += 1
+            self._dirty = True
+
+    def search(self, question: str, k: int = Config.EXAMPLE_TOP_K,
+               min_similarity: float = Config.EXAMPLE_MIN_SIMILARITY) -> List[Dict[str, Any]]:
+        """Top-k stored examples by similarity to the question, most similar first"""
+        query = Counter(self.tokenize(question))
+        with self._lock:
+            examples = list(self._examples)
+        self.retrievals += 1
+        if not query or not examples:
+            return []
+
+        # Document frequency over the store: common words weigh less
+        df = Counter()
+        for example in examples:
+            df.update(example['tokens'].keys())
+        total = len(examples)
+
+        def idf(word):
+            return math.log((1 + total) / (1 + df[word])) + 1
+
+        def vector(tokens):
+            return {word: count * idf(word) for word, count in tokens.items()}
+
+        query_vec = vector(query)
+        query_norm = math.sqrt(sum(v * v for v in query_vec.values()))
+
+        scored = []
+        for example in examples:
+            vec = vector(example['tokens'])
+            norm = math.sqrt(sum(v * v for v in vec.values()))
+            if not norm:
+                continue
+            dot = sum(weight * vec.get(word, 0.0) for word, weight in query_vec.items())
+            score = dot / (query_norm * norm)
+            if score >= min_similarity:
+                scored.append((score, example))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        top = [{**example, 'similarity': round(score, 3)} for score, example in scored[:k]]
+        if top:
+            self.hits += 1
+        return top
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': Config.EXAMPLE_STORE,
+            'path': self.path,
+            'examples': len(self._examples),
+            'max_examples': self.max_examples,
+            'added': self.added,
+            'pending_save': self._dirty,
+            'saves': self.saves,
+            'save_errors': self.save_errors,
+            'retrievals': self.retrievals,
+            'hit_rate': round(self.hits / self.retrievals * 100, 2) if self.retrievals else 0
+        }
+
+
+# Global store instance
+example_store = ExampleStore()
@@ -0,0 +1,194 @@
+"""
+FULLTEXT Search Rewrite
+Turns leading-wildcard LIKE predicates into MATCH ... AGAINST on FULLTEXT-indexed columns
+"""
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import sqlparse
+from sqlparse import tokens as T
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class FulltextRewriter:
+    """
+    Rewrites `col LIKE '%term%'` into `MATCH(col) AGAINST ('+term*' IN BOOLEAN MODE)`
+    when `col` belongs to a base table with a single-column FULLTEXT index
+    (scripts/setup_fulltext_indexes.sh). A LIKE with a leading wildcard can't
+    use a B-tree index; MATCH uses the inverted index.
+
+    Views are never rewritten: MySQL can't run MATCH against a view column, so
+    queries on view_general_inventory keep their LIKE (exact values from the
+    entity index are the fast path there).
+
+    The match is word-prefix based, not substring based: '%top%' finds
+    'Laptop' with LIKE but not with MATCH. Terms shorter than
+    innodb_ft_min_token_size, stopwords and terms with boolean-mode operators
+    are left alone.
+
+    Example:
+        >>> rewriter.rewrite("SELECT name FROM items WHERE name LIKE '%dell lat%';")
+        ("SELECT name FROM items WHERE MATCH(name) AGAINST ('+dell* +lat*' IN BOOLEAN MODE);", ['items.name'])
+    """
+
+    INDEXES_SQL = """
+        SELECT TABLE_NAME, INDEX_NAME, GROUP_CONCAT(COLUMN_NAME) AS columns
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = %s AND INDEX_TYPE = 'FULLTEXT'
+        GROUP BY TABLE_NAME, INDEX_NAME
+    """
+
+    CONTAINS = re.compile(r"^'%([^%_']+)%'$")
+    BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+    # InnoDB's default FULLTEXT stopwords: a required stopword matches nothing
+    STOPWORDS = {
+        "a", "about", "an", "are", "as", "at", "be", "by", "com", "de", "en", "for", "from", "how", "i", "in",
+        "is", "it", "la", "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "who",
+        "will", "with", "und", "www",
+    }
+
+    def __init__(self, connection_factory: Callable[[], Any], database: str = Config.DB_NAME,
+                 check_interval: int = Config.SCHEMA_CHECK_INTERVAL,
+                 min_token_size: int = Config.FULLTEXT_MIN_TOKEN_SIZE):
+        self._connection_factory = connection_factory
+        self.database = database
+        self.check_interval = check_interval
+        self.min_token_size = min_token_size
+        self._lock = threading.Lock()
+        # (table, column) pairs with a single-column FULLTEXT index, lower case
+        self._indexed: Set[Tuple[str, str]] = set()
+        self._loaded_at = 0.0
+        self.checked = 0
+        self.rewritten = 0
+        self.predicates = 0
+
+    def indexed_columns(self) -> Set[Tuple[str, str]]:
+        """FULLTEXT-indexed columns, re-read every check interval (new indexes don't change the schema fingerprint)"""
+        if time.time() - self._loaded_at < self.check_interval:
+            return self._indexed
+        conn = self._connection_factory()
+        if conn is None:
+            return self._indexed
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(self.INDEXES_SQL, (self.database,))
+                rows = cursor.fetchall()
+            # MATCH needs an index over exactly its column list
+            self._indexed = {
+                (row['TABLE_NAME'].lower(), row['columns'].lower())
+                for row in rows if ',' not in row['columns']
+            }
+        except Exception as e:
+            logger.warning(f"Could not read FULLTEXT indexes: {e}")
+        finally:
+            conn.close()
+            self._loaded_at = time.time()
+        return self._indexed
+
+    def rewrite(self, sql: str) -> Tuple[str, List[str]]:
+        """Return (sql, rewritten 'table.column' list); the SQL is unchanged when nothing applies"""
+        with self._lock:
+            self.checked += 1
+        indexed = self.indexed_columns()
+        if not indexed:
+            return sql, []
+
+        statements = sqlparse.parse(sql)
+        if len(statements) != 1:
+            return sql, []
+        tokens = list(statements[0].flatten())
+        significant = [i for i, tok in enumerate(tokens) if not tok.is_whitespace]
+
+        def sig(pos):
+            return tokens[significant[pos]] if 0 <= pos < len(significant) else None
+
+        aliases = self._aliases(sig, len(significant))
+        tables = set(aliases.values())
+        rewritten = []
+
+        for pos in range(len(significant)):
+            op = sig(pos)
+            # sqlparse keeps the case of comparison operators: `like` stays lowercase
+            if op.ttype not in T.Operator.Comparison or op.value.upper() != "LIKE":
+                continue
+            column_tok, literal = sig(pos - 1), sig(pos + 1)
+            if column_tok is None or literal is None or literal.ttype not in T.String.Single:
+                continue
+            column = column_tok.value.strip("`").lower()
+
+            qualified = sig(pos - 2) is not None and sig(pos - 2).value == "."
+            if qualified:
+                table = aliases.get(sig(pos - 3).value.strip("`").lower())
+            else:
+                # Unqualified columns are only unambiguous with a single table
+                table = next(iter(tables)) if len(tables) == 1 else None
+            if table is None or (table, column) not in indexed:
+                continue
+
+            against = self._against(literal.value)
+            if against is None:
+                continue
+
+            first = significant[pos - 3] if qualified else significant[pos - 1]
+            tokens[first].value = "MATCH(" + tokens[first].value
+            column_tok.value = column_tok.value + ")"
+            op.value = "AGAINST"
+            literal.value = f"('{against}' IN BOOLEAN MODE)"
+            rewritten.append(f"{table}.{column}")
+
+        if not rewritten:
+            return sql, []
+        with self._lock:
+            self.rewritten += 1
+            self.predicates += len(rewritten)
+        return "".join(tok.value for tok in tokens), rewritten
+
+    @staticmethod
+    def _aliases(sig, count) -> Dict[str, str]:
+        """alias or table name (lower) -> base table (lower) for every FROM / JOIN entry"""
+        aliases = {}
+        for pos in range(count):
+            tok = sig(pos)
+            if tok.ttype not in T.Keyword or not (tok.normalized == "FROM" or tok.normalized.endswith("JOIN")):
+                continue
+            nxt = pos + 1
+            while sig(nxt) is not None and sig(nxt).ttype in T.Name:
+                table = sig(nxt).value.strip("`").lower()
+                aliases[table] = table
+                alias_pos = nxt + 2 if sig(nxt + 1) is not None and sig(nxt + 1).normalized == "AS" else nxt + 1
+                alias = sig(alias_pos)
+                after = nxt + 1
+                if alias is not None and alias.ttype in T.Name:
+                    aliases[alias.value.strip("`").lower()] = table
+                    after = alias_pos + 1
+                # FROM a, b
+                if sig(after) is None or sig(after).value != ",":
+                    break
+                nxt = after + 1
+        return aliases
+
+    def _against(self, literal: str) -> Optional[str]:
+        """Boolean-mode search string for a '%term%' literal: every word required, as a prefix"""
+        match = self.CONTAINS.match(literal)
+        if not match or self.BOOLEAN_OPERATORS.search(match.group(1)):
+            return None
+        words = match.group(1).lower().split()
+        if not words or any(len(w) < self.min_token_size or w in self.STOPWORDS for w in words):
+            return None
+        return " ".join(f"+{w}*" for w in words)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': Config.FULLTEXT_REWRITE,
+            'indexed_columns': sorted(f"{t}.{c}" for t, c in self._indexed),
+            'checked': self.checked,
+            'rewritten': self.rewritten,
+            'predicates': self.predicates
+        }
@@ -0,0 +1,102 @@
+"""
+Shared HTTP Client for Inference Backends
+Pooled keep-alive session used for every Ollama / OpenAI-compatible call
+"""
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceHttpClient:
+    """
+    Thin wrapper around a pooled requests.Session.
+    Connections are kept alive between calls; when all pool slots are busy
+    callers block instead of opening extra sockets.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = Config.INFERENCE_POOL_SIZE,
+        connect_timeout: float = Config.INFERENCE_CONNECT_TIMEOUT,
+        read_timeout: float = Config.INFERENCE_READ_TIMEOUT
+    ):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        self.adapter = HTTPAdapter(
+            pool_connections=10,     # distinct hosts kept in the pool manager
+            pool_maxsize=pool_size,  # keep-alive connections per host
+            pool_block=True,
+            max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+        self._lock = threading.Lock()
+        self.total_requests = 0
+        self.errors = 0
+        self.in_flight = 0
+
+    def _timeout(self, read_timeout: Optional[float]):
+        return (self.connect_timeout, read_timeout if read_timeout is not None else self.read_timeout)
+
+    def request(self, method: str, url: str, read_timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """Send a request through the shared pool with separate connect/read timeouts"""
+        with self._lock:
+            self.total_requests += 1
+            self.in_flight += 1
+        try:
+            return self.session.request(method, url, timeout=self._timeout(read_timeout), **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def post(self, url: str, read_timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        return self.request("POST", url, read_timeout=read_timeout, **kwargs)
+
+    def get(self, url: str, read_timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        return self.request("GET", url, read_timeout=read_timeout, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool statistics (per host: connections opened, free slots, requests served)"""
+        hosts = []
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            # urllib3 pre-fills the queue with placeholders, so qsize() counts free slots
+            slots = getattr(pool, "pool", None)
+            hosts.append({
+                'host': f"{pool.host}:{pool.port}",
+                'connections_opened': getattr(pool, "num_connections", 0),
+                'requests': getattr(pool, "num_requests", 0),
+                'free_slots': slots.qsize() if slots is not None else 0
+            })
+
+        return {
+            'pool_size': self.pool_size,
+            'connect_timeout': self.connect_timeout,
+            'read_timeout': self.read_timeout,
+            'total_requests': self.total_requests,
+            'in_flight': self.in_flight,
+            'errors': self.errors,
+            'hosts': hosts
+        }
+
+
+# Global client instance shared by all inference calls
+http_client = InferenceHttpClient()
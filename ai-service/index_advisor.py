@@ -0,0 +1,550 @@
+"""
+Index Advisor
+Ranks index recommendations from the executed SQL log, EXPLAIN plans and the current indexes
+"""
+import argparse
+import json
+import logging
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import pymysql
+import sqlparse
+from sqlparse import tokens as T
+from sqlparse.sql import Identifier, IdentifierList
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class IndexAdvisor:
+    """
+    Offline counterpart of scripts/setup_indexes.sh, driven by what users
+    actually ask: reads the executed SQL log (sql_log.py), groups the queries by
+    shape, and per shape
+
+    - extracts equality / range / join predicates, GROUP BY and ORDER BY
+      columns with sqlparse, resolving aliases and view columns to base tables
+    - runs EXPLAIN on the statement that was executed
+    - proposes, for every table the plan scans (type ALL / index) or sorts
+      (filesort, temporary table), an index of equality columns, then the
+      GROUP BY / ORDER BY columns, else the first range column
+
+    Estimated benefit is rows-based, not measured: the rows a table scan reads
+    beyond what its predicates keep (EXPLAIN filtered) plus the rows a sort
+    handles, as a share of all rows the plan reads, times the time the query
+    shape took in the log. Candidates already covered by the left prefix of an
+    existing index are dropped.
+
+    Example:
+        $ docker compose exec ai-service python index_advisor.py --top 5
+        1. CREATE INDEX idx_items_status_location ON items (status, location);
+           ~4210 ms saved (38.2% of logged time), 3 query shapes, 57 executions
+    """
+
+    SCAN_TYPES = {'ALL', 'index'}
+    MAX_COLUMNS = 4
+    # Keywords sqlparse may emit for column names ('location', 'status', ...) are
+    # accepted; these never are
+    NOT_COLUMNS = {
+        'AND', 'OR', 'NOT', 'IN', 'IS', 'NULL', 'BETWEEN', 'LIKE', 'AS', 'ASC', 'DESC', 'ON', 'DISTINCT',
+        'TRUE', 'FALSE', 'INTERVAL', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END', 'WITH', 'ROLLUP'
+    }
+
+    def __init__(self, connection_factory: Callable[[], Any], database: str = Config.DB_NAME,
+                 min_rows: int = 1000):
+        self._connection_factory = connection_factory
+        self.database = database
+        self.min_rows = min_rows
+        self.columns: Dict[str, Set[str]] = {}
+        self.indexes: Dict[str, List[Tuple[str, ...]]] = {}
+        self.fulltext: Set[Tuple[str, str]] = set()
+        self.table_rows: Dict[str, int] = {}
+        self.views: Dict[str, Dict[str, Any]] = {}
+
+    # --- Log ---
+
+    @staticmethod
+    def fingerprint(sql: str) -> str:
+        """Query shape: literals replaced by ?, IN lists collapsed, whitespace and case normalized"""
+        parts = []
+        for tok in sqlparse.parse(sql)[0].flatten():
+            if tok.is_whitespace:
+                continue
+            parts.append("?" if tok.ttype in T.Literal else tok.value.lower())
+        # IN (1, 2) and IN (1, 2, 3) are the same shape
+        return re.sub(r"\( \?(?: , \?)+ \)", "( ? )", " ".join(parts))
+
+    def load_log(self, path: str = Config.SQL_LOG_PATH) -> "OrderedDict[str, Dict[str, Any]]":
+        """Successful executions grouped by shape, the rotated file first"""
+        shapes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        for file_path in (f"{path}.1", path):
+            if not os.path.exists(file_path):
+                continue
+            with open(file_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get('error') or not entry.get('sql'):
+                        continue
+                    key = self.fingerprint(entry['sql'])
+                    shape = shapes.setdefault(key, {'executions': 0, 'total_ms': 0.0})
+                    shape['executions'] += 1
+                    shape['total_ms'] += entry.get('ms') or 0.0
+                    # Latest statement represents the shape
+                    shape['sql'] = entry['sql']
+                    shape['executed'] = entry.get('executed') or entry['sql']
+        return shapes
+
+    # --- Schema ---
+
+    def load_schema(self, conn):
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT TABLE_NAME, COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = %s",
+                (self.database,)
+            )
+            for row in cursor.fetchall():
+                self.columns.setdefault(row['TABLE_NAME'].lower(), set()).add(row['COLUMN_NAME'].lower())
+
+            cursor.execute("""
+                SELECT TABLE_NAME, INDEX_NAME, INDEX_TYPE, COLUMN_NAME
+                FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = %s
+                ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+            """, (self.database,))
+            grouped: "OrderedDict[Tuple[str, str], List[str]]" = OrderedDict()
+            for row in cursor.fetchall():
+                table = row['TABLE_NAME'].lower()
+                if row['INDEX_TYPE'] == 'FULLTEXT':
+                    self.fulltext.add((table, row['COLUMN_NAME'].lower()))
+                    continue
+                grouped.setdefault((table, row['INDEX_NAME']), []).append(row['COLUMN_NAME'].lower())
+            for (table, _), cols in grouped.items():
+                self.indexes.setdefault(table, []).append(tuple(cols))
+
+            cursor.execute(
+                "SELECT TABLE_NAME, TABLE_ROWS FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = %s",
+                (self.database,)
+            )
+            self.table_rows = {row['TABLE_NAME'].lower(): int(row['TABLE_ROWS'] or 0) for row in cursor.fetchall()}
+
+            cursor.execute(
+                "SELECT TABLE_NAME, VIEW_DEFINITION FROM INFORMATION_SCHEMA.VIEWS WHERE TABLE_SCHEMA = %s",
+                (self.database,)
+            )
+            for row in cursor.fetchall():
+                self.views[row['TABLE_NAME'].lower()] = self._parse_view(row['VIEW_DEFINITION'])
+
+    def _parse_view(self, definition: str) -> Dict[str, Any]:
+        """
+        View column -> (base table, column), the view's own aliases and the
+        predicates of its joins / WHERE, from MySQL's stored definition
+        ("select `i`.`name` AS `item_name`,... from (`db`.`items` `i` left join ...)").
+        """
+        plain = re.sub(rf"`{re.escape(self.database)}`\.", "", definition, flags=re.IGNORECASE).replace("`", "")
+        aliases = {}
+        for table, alias in re.findall(r"(?:from|join)\s+\(*\s*(\w+)(?:\s+(?!on\b|left\b|right\b|inner\b|join\b|where\b)(\w+))?",
+                                       plain, flags=re.IGNORECASE):
+            aliases[(alias or table).lower()] = table.lower()
+        select_list = re.split(r"\bfrom\b", plain, maxsplit=1, flags=re.IGNORECASE)[0]
+        columns = {}
+        for qualifier, column, name in re.findall(r"(\w+)\.(\w+)\s+AS\s+(\w+)", select_list, flags=re.IGNORECASE):
+            if qualifier.lower() in aliases:
+                columns[name.lower()] = (aliases[qualifier.lower()], column.lower())
+        return {
+            'columns': columns,
+            'aliases': aliases,
+            'usage': self.usage(plain, aliases)
+        }
+
+    # --- Query parsing ---
+
+    @staticmethod
+    def aliases(sql: str) -> Dict[str, str]:
+        """alias or table name (lower) -> table (lower), from FROM / JOIN identifiers as SQLValidator reads them"""
+        aliases = {}
+        from_seen = False
+        for token in sqlparse.parse(sql)[0].tokens:
+            if token.ttype is T.Keyword and (token.normalized == 'FROM' or token.normalized.endswith('JOIN')):
+                from_seen = True
+                continue
+            if not from_seen or token.is_whitespace:
+                continue
+            identifiers = token.get_identifiers() if isinstance(token, IdentifierList) else [token]
+            for identifier in identifiers:
+                if isinstance(identifier, Identifier) and identifier.get_real_name():
+                    table = identifier.get_real_name().lower()
+                    aliases[table] = table
+                    if identifier.get_alias():
+                        aliases[identifier.get_alias().lower()] = table
+            from_seen = False
+        return aliases
+
+    def usage(self, sql: str, aliases: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Column usage of a statement, resolved to base tables:
+        {'filter': [(table, column, 'eq' | 'in' | 'range' | 'join')], 'group': [...], 'order': [...],
+         'has_or': bool, 'wildcard': [(table, column)], 'wrapped': [(table, column)]}
+        group / order are None when a column can't be resolved (select alias, aggregate,
+        several tables, mixed directions): an index can't serve them.
+        """
+        tokens = [tok for tok in sqlparse.parse(sql)[0].flatten() if not tok.is_whitespace]
+
+        def sig(pos):
+            return tokens[pos] if 0 <= pos < len(tokens) else None
+
+        result = {'filter': [], 'group': [], 'order': [], 'has_or': False, 'wildcard': [], 'wrapped': []}
+        directions = set()
+        clause = None
+
+        for pos, tok in enumerate(tokens):
+            if tok.ttype in T.Keyword.DML:
+                clause = None
+                continue
+            if tok.ttype in T.Keyword:
+                keyword = tok.normalized
+                if keyword in ('WHERE', 'ON', 'GROUP BY', 'ORDER BY'):
+                    clause = keyword
+                    continue
+                if keyword in ('FROM', 'HAVING', 'LIMIT') or keyword.endswith('JOIN'):
+                    clause = None
+                    continue
+                if keyword == 'OR' and clause in ('WHERE', 'ON'):
+                    result['has_or'] = True
+                    continue
+            if clause is None:
+                continue
+
+            if not self._is_column(tok, sig(pos + 1)):
+                if clause in ('GROUP BY', 'ORDER BY'):
+                    if tok.ttype in T.Keyword.Order:
+                        directions.add(tok.normalized)
+                    elif tok.value not in (',', ';', '.') and not (sig(pos + 1) is not None and sig(pos + 1).value == '.'):
+                        # ORDER BY 1, COUNT(*), ...: not a plain column list
+                        result['group' if clause == 'GROUP BY' else 'order'] = None
+                continue
+            qualified = sig(pos - 1) is not None and sig(pos - 1).value == '.'
+            first = pos - 2 if qualified else pos
+            resolved = self._resolve(
+                tok.value.strip('`').lower(),
+                sig(pos - 2).value.strip('`').lower() if qualified else None,
+                aliases
+            )
+
+            if clause in ('GROUP BY', 'ORDER BY'):
+                key = 'group' if clause == 'GROUP BY' else 'order'
+                if resolved is None or sig(first - 1) is not None and sig(first - 1).value == '(':
+                    result[key] = None
+                elif result[key] is not None:
+                    result[key].append(resolved)
+                continue
+
+            if resolved is None:
+                continue
+            # YEAR(col) = 2024, LOWER(col) = ...: the function hides the column from an index
+            if sig(first - 1) is not None and sig(first - 1).value == '(' and \
+                    sig(first - 2) is not None and sig(first - 2).ttype in T.Name:
+                result['wrapped'].append(resolved)
+                continue
+            kind = self._predicate_kind(tokens, first, pos)
+            if kind == 'wildcard':
+                result['wildcard'].append(resolved)
+            elif kind:
+                result['filter'].append(resolved + (kind,))
+
+        if len(directions) > 1:
+            result['order'] = None
+        for key in ('group', 'order'):
+            if result[key] and len({table for table, _ in result[key]}) > 1:
+                result[key] = None
+        return result
+
+    def _is_column(self, tok, nxt) -> bool:
+        if tok.ttype not in T.Name and not (tok.ttype in T.Keyword and tok.normalized not in self.NOT_COLUMNS):
+            return False
+        # Qualifier of a dotted name, or a function call
+        return nxt is None or nxt.value not in ('.', '(')
+
+    def _resolve(self, column: str, qualifier: Optional[str], aliases: Dict[str, str]) -> Optional[Tuple[str, str]]:
+        """(base table, column) of a column reference; view columns map to the column behind them"""
+        if qualifier:
+            table = aliases.get(qualifier)
+        else:
+            owners = {t for t in aliases.values() if column in self.columns.get(t, ()) or
+                      column in self.views.get(t, {}).get('columns', {})}
+            table = owners.pop() if len(owners) == 1 else None
+        if table is None:
+            return None
+        if table in self.views:
+            return self.views[table]['columns'].get(column)
+        return (table, column) if column in self.columns.get(table, ()) else None
+
+    def _predicate_kind(self, tokens, first: int, last: int) -> Optional[str]:
+        """eq / range / join / wildcard for the column spanning tokens[first..last], None if not sargable"""
+        def at(pos):
+            return tokens[pos] if 0 <= pos < len(tokens) else None
+
+        before, after = at(first - 1), at(last + 1)
+        if after is not None and (after.ttype in T.Operator.Comparison or
+                                  after.ttype in T.Keyword and after.normalized in ('IN', 'IS', 'BETWEEN', 'NOT')):
+            op, other_pos = after.normalized.upper(), last + 2
+        elif before is not None and before.ttype in T.Operator.Comparison:
+            op, other_pos = before.normalized.upper(), first - 2
+        else:
+            return None
+
+        other = at(other_pos)
+        # col = other_table.col is a join; col = CURDATE() is not
+        following = at(other_pos + 1)
+        other_is_column = other is not None and other.ttype in T.Name and (following is None or following.value != '(')
+        if op in ('=', '<=>'):
+            return 'join' if other_is_column else 'eq'
+        if op == 'IS':
+            return 'eq'
+        if op == 'IN':
+            # Several values: one seek per value, rows come back out of index order
+            values = 0
+            for tok in tokens[last + 2:]:
+                if tok.value == ')':
+                    break
+                values += tok.value == ','
+            return 'eq' if values == 0 else 'in'
+        if op in ('<', '>', '<=', '>=', 'BETWEEN'):
+            return 'range'
+        if op == 'LIKE':
+            # Only a fixed prefix can seek in a B-tree
+            pattern = other.value.strip("'") if other is not None and other.ttype in T.String else ''
+            return 'wildcard' if not pattern or pattern[0] in '%_' else 'range'
+        return None
+
+    # --- Analysis ---
+
+    @staticmethod
+    def explain(conn, sql: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"EXPLAIN {sql.rstrip().rstrip(';')}")
+                return cursor.fetchall()
+        except Exception as e:
+            logger.warning(f"EXPLAIN failed for {sql[:120]}: {e}")
+            return None
+
+    def candidates(self, usage: Dict[str, Any], plan: List[Dict[str, Any]],
+                   aliases: Dict[str, str]) -> List[Dict[str, Any]]:
+        """Index candidates for one query shape, each with the share of the plan's work it saves"""
+        examined, prefix = [], 1.0
+        for row in plan:
+            rows = float(row.get('rows') or 0)
+            examined.append(prefix * rows)
+            prefix = max(1.0, prefix * rows * float(row.get('filtered') or 100) / 100)
+        first_extra = (plan[0].get('Extra') or '') if plan else ''
+        sorting = 'Using filesort' in first_extra or 'Using temporary' in first_extra
+        sorted_rows = prefix if sorting else 0.0
+        total_work = sum(examined) + sorted_rows
+        if total_work <= 0:
+            return []
+
+        found = []
+        for position, row in enumerate(plan):
+            table = aliases.get((row.get('table') or '').lower())
+            if table is None or self.table_rows.get(table, 0) < self.min_rows:
+                continue
+            filters = [] if usage['has_or'] else [f for f in usage['filter'] if f[0] == table]
+            eq = [c for _, c, kind in filters if kind in ('eq', 'in')]
+            # Join columns only help the inner side of the nested loop
+            joins = [c for _, c, kind in filters if kind == 'join'] if position > 0 else []
+            ranges = [c for _, c, kind in filters if kind == 'range']
+
+            sort_columns = []
+            if position == 0 and not any(kind == 'in' for _, _, kind in filters):
+                for key in ('group', 'order'):
+                    if usage[key] and usage[key][0][0] == table:
+                        sort_columns = [c for _, c in usage[key]]
+                        break
+
+            columns = list(dict.fromkeys(eq + joins + (sort_columns or ranges[:1])))[:self.MAX_COLUMNS]
+            if not columns or self._covered(table, columns):
+                continue
+
+            saving, reasons = 0.0, []
+            if row.get('type') in self.SCAN_TYPES and (eq or joins or ranges):
+                kept = float(row.get('filtered') or 100) / 100
+                saving += examined[position] * (1 - kept)
+                kind = "full scan" if row['type'] == 'ALL' else "full index scan"
+                reasons.append(f"{kind} of {table} (~{int(row.get('rows') or 0)} rows, {kept:.0%} kept)")
+            if sort_columns and sorting:
+                saving += sorted_rows
+                reasons.append("filesort" if 'Using filesort' in first_extra else "temporary table")
+            if saving > 0:
+                found.append({
+                    'table': table,
+                    'columns': tuple(columns),
+                    'share': saving / total_work,
+                    'reasons': reasons
+                })
+        return found
+
+    def _covered(self, table: str, columns: List[str]) -> bool:
+        return any(index[:len(columns)] == tuple(columns) for index in self.indexes.get(table, ()))
+
+    def analyze(self, shapes: "OrderedDict[str, Dict[str, Any]]") -> Dict[str, Any]:
+        conn = self._connection_factory()
+        try:
+            self.load_schema(conn)
+            recommendations: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = {}
+            notes = {'wildcard': {}, 'wrapped': {}, 'or_shapes': 0, 'unexplained': 0}
+
+            for shape in shapes.values():
+                aliases = self.aliases(shape['sql'])
+                usage = self.usage(shape['sql'], aliases)
+                # Predicates of the views a query reads come with it
+                plan_aliases = dict(aliases)
+                for table in set(aliases.values()) & set(self.views):
+                    view = self.views[table]
+                    usage['filter'].extend(view['usage']['filter'])
+                    plan_aliases.update(view['aliases'])
+
+                for key in ('wildcard', 'wrapped'):
+                    for table, column in usage[key]:
+                        name = f"{table}.{column}"
+                        notes[key][name] = notes[key].get(name, 0) + shape['executions']
+                notes['or_shapes'] += usage['has_or']
+
+                plan = self.explain(conn, shape['executed'])
+                if not plan:
+                    notes['unexplained'] += 1
+                    continue
+
+                for candidate in self.candidates(usage, plan, plan_aliases):
+                    key = (candidate['table'], candidate['columns'])
+                    rec = recommendations.setdefault(key, {
+                        'table': candidate['table'],
+                        'columns': list(candidate['columns']),
+                        'saving_ms': 0.0,
+                        'shapes': 0,
+                        'executions': 0,
+                        'reasons': [],
+                        'example': None,
+                        'example_saving': -1.0
+                    })
+                    saving = shape['total_ms'] * candidate['share']
+                    rec['saving_ms'] += saving
+                    rec['shapes'] += 1
+                    rec['executions'] += shape['executions']
+                    rec['reasons'].extend(r for r in candidate['reasons'] if r not in rec['reasons'])
+                    if saving > rec['example_saving']:
+                        rec['example'], rec['example_saving'] = shape['sql'], saving
+        finally:
+            conn.close()
+
+        ranked = self._merge_prefixes(list(recommendations.values()))
+        total_ms = sum(shape['total_ms'] for shape in shapes.values())
+        for rec in ranked:
+            rec.pop('example_saving', None)
+            rec['saving_ms'] = round(rec['saving_ms'], 1)
+            rec['share_of_logged_time'] = round(rec['saving_ms'] / total_ms * 100, 1) if total_ms else 0.0
+            name = f"idx_{rec['table']}_{'_'.join(rec['columns'])}"[:64]
+            rec['ddl'] = f"CREATE INDEX {name} ON {rec['table']} ({', '.join(rec['columns'])});"
+
+        notes['wildcard'] = {
+            column: count for column, count in notes['wildcard'].items()
+            if tuple(column.split('.', 1)) not in self.fulltext
+        }
+        return {
+            'shapes': len(shapes),
+            'executions': sum(shape['executions'] for shape in shapes.values()),
+            'logged_ms': round(total_ms, 1),
+            'recommendations': ranked,
+            'notes': notes
+        }
+
+    @staticmethod
+    def _merge_prefixes(recs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """An index on (a, b) also serves (a): fold shorter candidates into a longer one they prefix"""
+        recs.sort(key=lambda r: -len(r['columns']))
+        kept = []
+        for rec in recs:
+            wider = next((
+                k for k in kept
+                if k['table'] == rec['table'] and k['columns'][:len(rec['columns'])] == rec['columns']
+            ), None)
+            if wider is None:
+                kept.append(rec)
+                continue
+            wider['saving_ms'] += rec['saving_ms']
+            wider['shapes'] += rec['shapes']
+            wider['executions'] += rec['executions']
+            wider['reasons'].extend(r for r in rec['reasons'] if r not in wider['reasons'])
+        return sorted(kept, key=lambda r: -r['saving_ms'])
+
+
+def format_report(report: Dict[str, Any], top: int) -> str:
+    lines = [
+        f"{report['executions']} executions, {report['shapes']} query shapes, "
+        f"{report['logged_ms']:.0f} ms logged",
+        ""
+    ]
+    recommendations = report['recommendations'][:top]
+    if not recommendations:
+        lines.append("No index recommendations: every logged query already uses an index or reads small tables.")
+    for rank, rec in enumerate(recommendations, 1):
+        lines.append(f"{rank}. {rec['ddl']}")
+        lines.append(
+            f"   ~{rec['saving_ms']:.0f} ms saved ({rec['share_of_logged_time']}% of logged time), "
+            f"{rec['shapes']} query shapes, {rec['executions']} executions"
+        )
+        lines.append(f"   why: {'; '.join(rec['reasons'])}")
+        lines.append(f"   e.g. {' '.join(rec['example'].split())[:160]}")
+
+    notes = report['notes']
+    if notes['wildcard']:
+        lines += ["", "LIKE '%...' (no B-tree index helps; see scripts/setup_fulltext_indexes.sh):"]
+        lines += [f"   {column}: {count} executions" for column, count in sorted(notes['wildcard'].items(), key=lambda i: -i[1])]
+    if notes['wrapped']:
+        lines += ["", "Columns inside functions (rewrite as a range to use an index):"]
+        lines += [f"   {column}: {count} executions" for column, count in sorted(notes['wrapped'].items(), key=lambda i: -i[1])]
+    if notes['or_shapes']:
+        lines += ["", f"{notes['or_shapes']} query shapes with OR predicates were only checked for sorting."]
+    if notes['unexplained']:
+        lines += ["", f"{notes['unexplained']} query shapes could not be EXPLAINed (schema changed since they ran?)."]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index recommendations from the executed SQL log")
+    parser.add_argument("--log", default=Config.SQL_LOG_PATH, help="executed SQL log (JSONL)")
+    parser.add_argument("--top", type=int, default=10, help="recommendations to print")
+    parser.add_argument("--min-rows", type=int, default=1000, help="ignore tables smaller than this")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    def connect():
+        return pymysql.connect(
+            host=Config.DB_HOST,
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            database=Config.DB_NAME,
+            cursorclass=pymysql.cursors.DictCursor
+        )
+
+    advisor = IndexAdvisor(connect, min_rows=args.min_rows)
+    shapes = advisor.load_log(args.log)
+    if not shapes:
+        print(f"No successful queries in {args.log}")
+        return
+    report = advisor.analyze(shapes)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(report, args.top))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    main()
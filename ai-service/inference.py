@@ -0,0 +1,241 @@
+"""
+Unified Inference Client
+One chat call for every backend: pooling, admission, retries, timeouts,
+streaming and token accounting, whatever driver the endpoint uses
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from http_client import http_client
+from sql_stream import SQLStreamScanner
+from rolling_stats import RollingWindow
+from deadline import DeadlineExceeded
+from backend_pool import BackendPool, InferenceEndpoint, backend_pool
+
+logger = logging.getLogger(__name__)
+
+
+class CallTimeout(Exception):
+    """A chat call ran past its time limit"""
+    pass
+
+
+class ChatResult:
+    """Outcome of one completed chat call"""
+
+    def __init__(self, content: str, model: str, endpoint: str, usage: Dict[str, Any],
+                 finish_reason: str, elapsed: float):
+        self.content = content
+        self.model = model
+        self.endpoint = endpoint
+        self.usage = usage
+        self.finish_reason = finish_reason  # 'stop' or 'early_stop' (connection closed after the first SQL)
+        self.elapsed = elapsed
+
+    @property
+    def total_tokens(self) -> int:
+        return self.usage.get('prompt_tokens', 0) + self.usage.get('completion_tokens', 0)
+
+
+class InferenceClient:
+    """
+    Streams chat completions from whichever endpoint of the pool serves the model.
+
+    - the endpoint is picked by the pool (least loaded, healthy, admission queue)
+    - the call timeout adapts to the observed latency and is clamped to the deadline
+    - transport errors, 5xx and timeouts are retried on a fresh endpoint while budget remains;
+      a timeout only counts against the endpoint's breaker when the adaptive limit,
+      not the request deadline, cut the call short
+    - token usage is counted per model; early-stopped streams are estimated by chunk count
+    """
+
+    def __init__(self, pool: BackendPool = backend_pool, retries: int = Config.INFERENCE_RETRIES):
+        self.pool = pool
+        self.retries = retries
+        self.latency = defaultdict(RollingWindow)
+        self.stats = {'generations': 0, 'early_stops': 0, 'timeouts': 0, 'errors': 0, 'retries': 0}
+        self.tokens = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """Register callback(stats_key, result) called after every completed chat"""
+        self._listeners.append(callback)
+
+    def chat(self, messages: List[Dict], model: str, temperature: float = 0.1, max_tokens: Optional[int] = None,
+             stop: Optional[List[str]] = None, stop_at_sql_end: bool = False, cancel_event=None, deadline=None,
+             stats_key: Optional[str] = None, priority: str = "interactive",
+             response_schema: Optional[Dict[str, Any]] = None) -> Optional[ChatResult]:
+        """
+        Run one chat completion.
+        response_schema asks the backend for JSON matching the schema.
+        Returns None when no endpoint serves the model, the call failed after
+        its retries, ran past its time limit or was cancelled.
+        Raises CircuitOpenError, AdmissionRejected and DeadlineExceeded so
+        callers can fail fast.
+        """
+        stats_key = stats_key or model
+
+        for attempt in range(self.retries + 1):
+            time_limit = self.call_timeout(stats_key)
+            if deadline:
+                deadline.ensure(Config.MIN_CALL_BUDGET, stage=f"{stats_key} call")
+                time_limit = deadline.timeout(time_limit)
+
+            endpoint = self.pool.acquire(model, timeout=time_limit, priority=priority)
+            if endpoint is None:
+                logger.error(f"No inference endpoint available for {model}")
+                return None
+
+            started = time.monotonic()
+            try:
+                clamped = False
+                if deadline:
+                    # The admission queue may have used up the budget
+                    try:
+                        deadline.ensure(Config.MIN_CALL_BUDGET, stage=f"{stats_key} call")
+                    except DeadlineExceeded:
+                        # Nothing was sent: free a half-open probe slot without an outcome
+                        endpoint.breaker.release_probe()
+                        raise
+                    clamped = deadline.remaining() < time_limit
+                    time_limit = deadline.timeout(time_limit)
+                payload = endpoint.driver.build_payload(messages, model, temperature, max_tokens, stop, response_schema)
+                try:
+                    result = self._stream(endpoint, payload, stop_at_sql_end, cancel_event, time_limit)
+                except Exception as e:
+                    timed_out = isinstance(e, CallTimeout) or time.monotonic() - started >= time_limit
+                    if timed_out and clamped:
+                        # The request ran out of budget, not the backend: no outcome, just free the probe slot
+                        endpoint.breaker.release_probe()
+                        self._count('timeouts')
+                        logger.warning(f"{endpoint.name} call stopped at the request deadline ({time_limit:.1f}s)")
+                        return None
+                    # Connection error, 5xx or a call slower than its adaptive limit: count against the endpoint
+                    endpoint.breaker.record_failure()
+                    self._count('timeouts' if timed_out else 'errors')
+                    logger.error(f"Chat call to {endpoint.name} failed: {e}")
+                    if cancel_event and cancel_event.is_set():
+                        return None
+                    if attempt < self.retries:
+                        self._count('retries')
+                    continue
+
+                endpoint.breaker.record_success()
+                if result is None:
+                    return None
+
+                elapsed = time.monotonic() - started
+                self.latency[stats_key].add(elapsed)
+                content, usage, finish_reason = result
+                self._record_tokens(model, usage)
+                reply = ChatResult(content, model, endpoint.name, usage, finish_reason, elapsed)
+                self._notify(stats_key, reply)
+                return reply
+            finally:
+                self.pool.release(endpoint, time.monotonic() - started)
+
+        return None
+
+    def _stream(self, endpoint: InferenceEndpoint, payload: Dict, stop_at_sql_end: bool, cancel_event, time_limit: float):
+        """
+        Read a streamed chat response; raises on transport errors, 5xx and error
+        chunks, and CallTimeout past time_limit seconds.
+        Returns (content, usage, finish_reason), or None if the request was
+        refused (4xx) or cancelled.
+        """
+        stop_at = time.monotonic() + time_limit
+        # read timeout bounds each socket read; stop_at bounds the whole stream
+        res = http_client.post(endpoint.chat_url, json=payload, stream=True, read_timeout=max(0.1, time_limit))
+        try:
+            if res.status_code >= 500:
+                res.raise_for_status()
+            if res.status_code != 200:
+                # 4xx (e.g. unknown model): the backend is up, the request is wrong
+                logger.error(f"{endpoint.name} Error: {res.text}")
+                return None
+
+            scanner = SQLStreamScanner() if stop_at_sql_end else None
+            parts = []
+            usage = None
+            finish_reason = "stop"
+            for line in res.iter_lines():
+                if not line:
+                    continue
+                piece, done, chunk_usage = endpoint.driver.parse_line(line)
+                if chunk_usage:
+                    usage = chunk_usage
+                if piece:
+                    parts.append(piece)
+                if done:
+                    break
+                if cancel_event and cancel_event.is_set():
+                    return None
+                if time.monotonic() > stop_at:
+                    raise CallTimeout(f"{endpoint.name} call exceeded {time_limit:.1f}s - generation aborted")
+                if scanner and scanner.feed(piece):
+                    # Closing the connection cancels generation on the server
+                    self._count('early_stops')
+                    finish_reason = "early_stop"
+                    break
+        finally:
+            res.close()
+
+        self._count('generations')
+        if usage is None:
+            # Stream closed before the final chunk: roughly one token per chunk
+            usage = {'prompt_tokens': 0, 'completion_tokens': len(parts), 'estimated': True}
+        return "".join(parts).strip(), usage, finish_reason
+
+    def call_timeout(self, stats_key: str) -> float:
+        """
+        Per-model call timeout adapted to observed latency: a multiple of p99,
+        clamped to [LLM_MIN_TIMEOUT, LLM_MAX_TIMEOUT]. Until enough samples
+        exist the maximum is used.
+        """
+        window = self.latency[stats_key]
+        if len(window) < Config.ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+            return Config.LLM_MAX_TIMEOUT
+        adaptive = window.percentile(99) * Config.ADAPTIVE_TIMEOUT_MULTIPLIER
+        return min(Config.LLM_MAX_TIMEOUT, max(Config.LLM_MIN_TIMEOUT, adaptive))
+
+    def _notify(self, stats_key: str, reply: ChatResult):
+        for callback in self._listeners:
+            try:
+                callback(stats_key, reply)
+            except Exception as e:
+                logger.error(f"Inference listener failed: {e}")
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _record_tokens(self, model: str, usage: Dict[str, Any]):
+        with self._lock:
+            tokens = self.tokens.setdefault(
+                model, {'calls': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'estimated_calls': 0}
+            )
+            tokens['calls'] += 1
+            tokens['prompt_tokens'] += usage.get('prompt_tokens', 0)
+            tokens['completion_tokens'] += usage.get('completion_tokens', 0)
+            if usage.get('estimated'):
+                tokens['estimated_calls'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Call counters, token usage per model and latency per stats key"""
+        with self._lock:
+            tokens = {model: dict(counts) for model, counts in self.tokens.items()}
+        return {
+            **self.stats,
+            'retry_limit': self.retries,
+            'tokens': tokens,
+            'latency': {key: window.summary() for key, window in list(self.latency.items())}
+        }
+
+
+# Global client over the configured backend pool
+inference_client = InferenceClient()
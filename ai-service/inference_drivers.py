@@ -0,0 +1,157 @@
+"""
+Inference Wire Protocols
+Request / response formats of the native Ollama API and OpenAI-compatible servers
+"""
+import json
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+
+
+class ChatDriver(ABC):
+    """
+    Translates between the shared chat call and one server API.
+    parse_line() returns (content_piece, done, usage) for one streamed line;
+    usage is a dict of token counts and is only present on the final chunk.
+    """
+
+    kind = ""
+
+    @abstractmethod
+    def chat_url(self, base_url: str) -> str:
+        ...
+
+    @abstractmethod
+    def models_url(self, base_url: str) -> str:
+        ...
+
+    @abstractmethod
+    def parse_models(self, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Model entries of a model-list response, each with at least an 'id'"""
+
+    @abstractmethod
+    def build_payload(self, messages: List[Dict], model: str, temperature: float,
+                      max_tokens: Optional[int] = None, stop: Optional[List[str]] = None,
+                      response_schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """response_schema: JSON schema the reply must follow (constrained decoding)"""
+
+    @abstractmethod
+    def parse_line(self, line: bytes) -> Tuple[str, bool, Optional[Dict[str, Any]]]:
+        ...
+
+
+class OllamaDriver(ChatDriver):
+    """Native /api/chat: one JSON object per line"""
+
+    kind = "ollama"
+
+    def chat_url(self, base_url: str) -> str:
+        return f"{base_url}/api/chat"
+
+    def models_url(self, base_url: str) -> str:
+        return f"{base_url}/api/tags"
+
+    def parse_models(self, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [{'id': m["name"], **m} for m in body.get("models", [])]
+
+    def build_payload(self, messages, model, temperature, max_tokens=None, stop=None, response_schema=None):
+        options = {"temperature": temperature}
+        # Fixed num_ctx: changing it makes Ollama reload the model and drop the prefix cache
+        if Config.OLLAMA_NUM_CTX:
+            options["num_ctx"] = Config.OLLAMA_NUM_CTX
+        if Config.OLLAMA_NUM_KEEP:
+            options["num_keep"] = Config.OLLAMA_NUM_KEEP
+        if max_tokens:
+            options["num_predict"] = max_tokens
+        if stop:
+            options["stop"] = stop
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+            "keep_alive": Config.OLLAMA_KEEP_ALIVE,
+            "options": options
+        }
+        if response_schema:
+            # Ollama >= 0.5 constrains sampling to the schema
+            payload["format"] = response_schema
+        return payload
+
+    def parse_line(self, line):
+        chunk = json.loads(line)
+        if chunk.get("error"):
+            raise ValueError(chunk["error"])
+
+        usage = None
+        if chunk.get("done"):
+            usage = {
+                'prompt_tokens': chunk.get("prompt_eval_count", 0),
+                'completion_tokens': chunk.get("eval_count", 0),
+                # Durations are reported in nanoseconds
+                'load_seconds': chunk.get("load_duration", 0) / 1e9
+            }
+        return chunk.get("message", {}).get("content", ""), chunk.get("done", False), usage
+
+
+class OpenAIDriver(ChatDriver):
+    """OpenAI-compatible /chat/completions (LM Studio, vLLM, llama.cpp server): server-sent events"""
+
+    kind = "openai"
+
+    def chat_url(self, base_url: str) -> str:
+        return f"{base_url}/chat/completions"
+
+    def models_url(self, base_url: str) -> str:
+        return f"{base_url}/models"
+
+    def parse_models(self, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return list(body.get("data", []))
+
+    def build_payload(self, messages, model, temperature, max_tokens=None, stop=None, response_schema=None):
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+            "temperature": temperature,
+            # Final chunk carries the token usage
+            "stream_options": {"include_usage": True}
+        }
+        if max_tokens:
+            payload["max_tokens"] = max_tokens
+        if stop:
+            payload["stop"] = stop
+        if response_schema:
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "strict": True, "schema": response_schema}
+            }
+        return payload
+
+    def parse_line(self, line):
+        if not line.startswith(b"data:"):
+            return "", False, None
+        data = line[len(b"data:"):].strip()
+        if data == b"[DONE]":
+            return "", True, None
+
+        chunk = json.loads(data)
+        if chunk.get("error"):
+            raise ValueError(chunk["error"])
+
+        usage = None
+        if chunk.get("usage"):
+            usage = {
+                'prompt_tokens': chunk["usage"].get("prompt_tokens", 0),
+                'completion_tokens': chunk["usage"].get("completion_tokens", 0)
+            }
+        # The usage chunk has no choices; [DONE] follows it
+        choice = (chunk.get("choices") or [{}])[0]
+        return choice.get("delta", {}).get("content") or "", False, usage
+
+
+DRIVERS = {
+    "ollama": OllamaDriver(),
+    "openai": OpenAIDriver(),
+}
@@ -3,25 +3,27 @@ LM Studio Client
 OpenAI-compatible API client for LM Studio local server
 """
 
-from openai import OpenAI
 import logging
 from typing import Optional, Dict, Any
-from config import LM_STUDIO_URL, PRIMARY_MODEL, SECONDARY_MODEL
+from config import PRIMARY_MODEL, SECONDARY_MODEL
+from inference import InferenceClient, inference_client
+from model_manager import ModelManager, model_manager
 
 logger = logging.getLogger(__name__)
 
 class LMStudioClient:
     """
     Client for LM Studio API (OpenAI-compatible)
-    Supports multiple models and fallback strategies
+    Supports multiple models and fallback strategies.
+    Thin wrapper over the shared pool: LM Studio is an 'openai' entry of
+    INFERENCE_ENDPOINTS, so calls share the pipeline's InferenceClient
+    (breaker, admission, retries, latency and token accounting) and the
+    model list comes from backend_pool discovery.
     """
     
-    def __init__(self, base_url: str = LM_STUDIO_URL):
-        self.client = OpenAI(
-            base_url=base_url,
-            api_key="lm-studio"  # LM Studio doesn't validate this
-        )
-        self.base_url = base_url
+    def __init__(self, client: InferenceClient = inference_client, models: ModelManager = model_manager):
+        self.client = client
+        self.models = models
         
     def generate_sql(
         self,
@@ -49,43 +51,42 @@ class LMStudioClient:
                 'confidence': 0.95
             }
         """
-        try:
-            logger.info(f"Generating SQL with model: {model}")
-            
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert SQL generator for a MySQL 8.0 database. Generate only valid MySQL SQL syntax, no explanations."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens,
-                stop=["--", "/*", "EXPLAIN"]  # Stop at comments
-            )
-            
-            sql = response.choices[0].message.content.strip()
-            
-            # Clean up response
-            sql = self._clean_sql(sql)
-            
-            return {
-                'sql': sql,
-                'model_used': model,
-                'tokens_used': response.usage.total_tokens if response.usage else 0,
-                'confidence': self._estimate_confidence(sql),
-                'finish_reason': response.choices[0].finish_reason
-            }
-            
-        except Exception as e:
-            logger.error(f"LM Studio error: {e}")
-            raise Exception(f"SQL generation failed: {str(e)}")
-    
+        logger.info(f"Generating SQL with model: {model}")
+
+        # CircuitOpenError propagates: the caller decides how to degrade
+        response = self.client.chat(
+            [
+                {
+                    "role": "system",
+                    "content": "You are an expert SQL generator for a MySQL 8.0 database. Generate only valid MySQL SQL syntax, no explanations."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stop=["--", "/*", "EXPLAIN"]  # Stop at comments
+        )
+        if response is None:
+            logger.error("LM Studio error: no response")
+            raise Exception("SQL generation failed: no response from LM Studio")
+
+        sql = response.content
+
+        # Clean up response
+        sql = self._clean_sql(sql)
+
+        return {
+            'sql': sql,
+            'model_used': model,
+            'tokens_used': response.total_tokens,
+            'confidence': self._estimate_confidence(sql),
+            'finish_reason': response.finish_reason
+        }
+
     def _clean_sql(self, sql: str) -> str:
         """
         Clean and normalize SQL response
@@ -162,9 +163,8 @@ Return JSON with:
 - suggestions: list of improvements
 """
             
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
+            response = self.client.chat(
+                [
                     {
                         "role": "system",
                         "content": "You are a SQL validator. Return only valid JSON."
@@ -174,12 +174,15 @@ Return JSON with:
                         "content": prompt
                     }
                 ],
+                model,
                 temperature=0.0,
                 max_tokens=300
             )
+            if response is None:
+                raise Exception("no response from LM Studio")
             
             import json
-            result = json.loads(response.choices[0].message.content)
+            result = json.loads(response.content)
             return result
             
         except Exception as e:
@@ -194,142 +197,13 @@ Return JSON with:
     
     def test_connection(self) -> bool:
         """
-        Test LM Studio connection
+        Test the inference pool connection (re-runs model discovery)
         """
-        try:
-            response = self.client.models.list()
-            models = [m.id for m in response.data]
-            logger.info(f"LM Studio connected. Available models: {models}")
-            return True
-        except Exception as e:
-            logger.error(f"LM Studio connection failed: {e}")
-            return False
+        return self.models.test_connection()
     
     def list_models(self) -> Dict[str, Any]:
         """
-        Get list of all available models from LM Studio
-        
-        Returns:
-            {
-                'success': True,
-                'models': [
-                    {
-                        'id': 'llama-3.2-8b-instruct',
-                        'name': 'Llama 3.2 8B Instruct',
-                        'size': '8B parameters',
-                        'type': 'chat',
-                        'capabilities': ['sql', 'chat', 'analysis']
-                    },
-                    ...
-                ],
-                'count': 5
-            }
-        """
-        try:
-            response = self.client.models.list()
-            
-            models = []
-            for model in response.data:
-                model_info = {
-                    'id': model.id,
-                    'name': self._format_model_name(model.id),
-                    'size': self._extract_model_size(model.id),
-                    'type': self._detect_model_type(model.id),
-                    'capabilities': self._detect_capabilities(model.id),
-                    'created': getattr(model, 'created', None),
-                    'owned_by': getattr(model, 'owned_by', 'local')
-                }
-                models.append(model_info)
-            
-            return {
-                'success': True,
-                'models': models,
-                'count': len(models)
-            }
-            
-        except Exception as e:
-            logger.error(f"Failed to list models: {e}")
-            return {
-                'success': False,
-                'error': str(e),
-                'models': [],
-                'count': 0
-            }
-    
-    def _format_model_name(self, model_id: str) -> str:
-        """
-        Convert model ID to human-readable name
-        e.g., 'llama-3.2-8b-instruct' -> 'Llama 3.2 8B Instruct'
-        """
-        # Replace hyphens with spaces and capitalize
-        parts = model_id.split('-')
-        formatted = []
-        
-        for part in parts:
-            if part.replace('.', '').isdigit():
-                formatted.append(part)  # Keep version numbers as-is
-            elif part.lower() in ['b', 'gb', 'mb']:
-                formatted.append(part.upper())  # Parameter size
-            else:
-                formatted.append(part.capitalize())
-        
-        return ' '.join(formatted)
-    
-    def _extract_model_size(self, model_id: str) -> str:
-        """
-        Extract parameter size from model ID
-        e.g., '8b' -> '8B parameters'
+        Get list of all models the pool serves, with display name, size, type
+        and capabilities (see ModelManager.get_available_models)
         """
-        import re
-        match = re.search(r'(\d+)b', model_id.lower())
-        if match:
-            size = match.group(1)
-            return f"{size}B parameters"
-        
-        match = re.search(r'(\d+)m', model_id.lower())
-        if match:
-            size = match.group(1)
-            return f"{size}M parameters"
-        
-        return "Unknown size"
-    
-    def _detect_model_type(self, model_id: str) -> str:
-        """
-        Detect model type from ID
-        """
-        model_id_lower = model_id.lower()
-        
-        if 'code' in model_id_lower or 'sql' in model_id_lower:
-            return 'code'
-        elif 'instruct' in model_id_lower or 'chat' in model_id_lower:
-            return 'chat'
-        elif 'embed' in model_id_lower:
-            return 'embedding'
-        else:
-            return 'general'
-    
-    def _detect_capabilities(self, model_id: str) -> list:
-        """
-        Detect model capabilities based on name/type
-        """
-        model_id_lower = model_id.lower()
-        capabilities = []
-        
-        # SQL/Code generation
-        if any(x in model_id_lower for x in ['code', 'sql', 'sqlcoder']):
-            capabilities.append('sql')
-            capabilities.append('code')
-        
-        # Chat/Instruction following
-        if any(x in model_id_lower for x in ['instruct', 'chat', 'llama', 'mistral']):
-            capabilities.append('chat')
-        
-        # Analysis/Reasoning
-        if any(x in model_id_lower for x in ['llama', 'qwen', 'mistral']):
-            capabilities.append('analysis')
-        
-        # If nothing detected, assume general chat
-        if not capabilities:
-            capabilities.append('general')
-        
-        return capabilities
+        return self.models.get_available_models()
@@ -1,10 +1,26 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
+from typing import Optional, Literal
 from pipeline import Pipeline
 from input_sanitizer import InputSanitizer
 from query_enhancer import QueryEnhancer
 from query_cache import cache
-from lm_studio_client import LMStudioClient
+from http_client import http_client
+from circuit_breaker import breakers, CircuitOpenError
+from backend_pool import backend_pool
+from inference import inference_client
+from model_warmup import model_warmer
+from model_manager import model_manager
+from example_store import example_store
+from sql_repair import repairer
+from continuation import continuation_tokens, InvalidContinuation
+from query_watchdog import query_watchdog
+from db_pool import PoolExhausted
+from sql_log import sql_log
+from model_router import model_router
+from deadline import Deadline, DeadlineExceeded
+from admission import AdmissionRejected
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -12,43 +28,60 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="CTIS-SIMS AI Service", version="2.3.0")
 pipeline = None
-lm_client = None
 
 @app.on_event("startup")
 def startup():
-    global pipeline, lm_client
+    global pipeline
     pipeline = Pipeline()
-    lm_client = LMStudioClient()
     
-    # Test LM Studio connection
-    if lm_client.test_connection():
-        logger.info("✅ LM Studio connected successfully")
-    else:
-        logger.warning("⚠️  LM Studio not available - using fallback")
+    # Discover which models each inference endpoint serves (refreshed periodically)
+    backend_pool.start_discovery()
+    # Load the configured models now instead of on the first query
+    model_warmer.start()
+    # Build the entity value index and refresh it incrementally
+    pipeline.entity_index.start()
+    # Re-check replica lag in the background (requests only read the result)
+    pipeline.read_router.start()
+    # Persist verified examples off the request path
+    example_store.start()
     
     logger.info("✅ AI Service started successfully with query enhancement and caching")
 
+@app.on_event("shutdown")
+def shutdown():
+    # Write examples added since the last background flush
+    example_store.flush()
+
 @app.get("/health")
 def health():
-    """Health check endpoint with cache stats"""
+    """Health check endpoint with cache stats and LLM backend breaker state"""
+    breaker_states = {name: breaker.get_stats() for name, breaker in breakers.items()}
+    degraded = any(b['state'] != 'closed' for b in breaker_states.values())
     return {
-        "status": "healthy",
+        "status": "degraded" if degraded else "healthy",
         "service": "CTIS-SIMS AI",
         "version": "2.3.0",
         "features": ["input_sanitization", "sql_validation", "query_enhancement", "time_based_queries", "statistical_queries", "query_caching"],
-        "cache": cache.get_stats()
+        "cache": cache.get_stats(),
+        "schema": pipeline.schema_cache.get_stats() if pipeline else None,
+        "circuit_breakers": breaker_states
     }
 
 class Query(BaseModel):
     query: str = Field(..., min_length=3, max_length=500, description="User query in Turkish or English")
+    timeout_ms: Optional[int] = Field(None, ge=Deadline.MIN_BUDGET_MS, description="Caller's time budget; X-Request-Timeout-Ms header takes precedence")
+    priority: Literal["interactive", "batch"] = Field("interactive", description="Queue priority for LLM calls")
 
 @app.post("/ask")
-def ask(q: Query):
+def ask(q: Query, x_request_timeout_ms: Optional[str] = Header(None)):
     """
     Process natural language query and return SQL results.
     Enhanced with time-based and statistical query support.
     Includes input sanitization, SQL validation, and response caching.
+    The caller's timeout bounds all retries; past it the request fails with 504.
     """
+    deadline = Deadline.from_request(x_request_timeout_ms, q.timeout_ms)
+    
     # 1. Sanitize input to prevent prompt injection
     sanitized_query = InputSanitizer.sanitize(q.query)
     
@@ -75,7 +108,7 @@ def ask(q: Query):
     
     # 4. Process through AI pipeline (now with SQL validation)
     try:
-        result = pipeline.run_pipeline(enhanced_query, query_metadata)
+        result = pipeline.run_pipeline(enhanced_query, query_metadata, deadline, q.priority)
         
         # Add enhancement metadata to result
         result['query_enhancement'] = query_metadata
@@ -85,6 +118,28 @@ def ask(q: Query):
         cache.set(sanitized_query, result)
         
         return result
+    except CircuitOpenError as e:
+        return _backend_unavailable(sanitized_query, e)
+    except AdmissionRejected as e:
+        logger.warning(f"Shed query ({e}): {sanitized_query[:50]}...")
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"detail": "The AI service is busy. Please try again shortly."},
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
+    except PoolExhausted as e:
+        logger.warning(f"{e}: {sanitized_query[:50]}...")
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "The database is busy. Please try again shortly."},
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
+    except DeadlineExceeded as e:
+        logger.warning(f"{e}: {sanitized_query[:50]}...")
+        raise HTTPException(
+            status_code=504,
+            detail="The query could not be answered within the time limit. Please try a simpler question."
+        )
     except Exception as e:
         logger.error(f"Pipeline error: {e}")
         raise HTTPException(
@@ -92,6 +147,54 @@ def ask(q: Query):
             detail="An error occurred while processing your query. Please try again."
         )
 
+class PageRequest(BaseModel):
+    token: str = Field(..., min_length=1, max_length=16000, description="continuation_token from /ask or a previous page")
+
+@app.post("/ask/page")
+def ask_page(p: PageRequest):
+    """
+    Fetch the next page of a truncated /ask result.
+    The token carries the validated SQL and row offset, so no LLM call is made;
+    each page returns the token for the one after it while rows remain.
+    """
+    try:
+        result = pipeline.fetch_page(p.token)
+    except InvalidContinuation as e:
+        logger.warning(f"Rejected continuation token: {e}")
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except PoolExhausted as e:
+        logger.warning(str(e))
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "The database is busy. Please try again shortly."},
+            headers={"Retry-After": str(max(1, int(e.retry_after)))}
+        )
+    if result.get('error'):
+        raise HTTPException(
+            status_code=500,
+            detail="An error occurred while fetching the next page. Please try again."
+        )
+    return result
+
+def _backend_unavailable(sanitized_query: str, error: CircuitOpenError):
+    """
+    Answer while the LLM backend's circuit is open: serve a stale cached
+    result if there is one, otherwise a fast 503 so the caller can use its
+    rule-based fallback responses.
+    """
+    stale_result = cache.get_stale(sanitized_query)
+    if stale_result and not stale_result.get('error'):
+        logger.warning(f"{error} - serving stale cache for: {sanitized_query[:50]}...")
+        return {**stale_result, 'cached': True, 'stale': True}
+
+    logger.warning(f"{error} - rejecting query")
+    retry_after = max(1, int(error.retry_after))
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "AI backend is temporarily unavailable. Please try again shortly."},
+        headers={"Retry-After": str(retry_after)}
+    )
+
 @app.post("/cache/clear")
 def clear_cache():
     """Clear AI query cache (admin only in production)"""
@@ -114,16 +217,41 @@ def cache_stats():
     """Get cache statistics"""
     return cache.get_stats()
 
+@app.get("/metrics")
+def metrics():
+    """Runtime statistics of caches and connection pools"""
+    return {
+        "cache": cache.get_stats(),
+        "schema": pipeline.schema_cache.get_stats() if pipeline else None,
+        "http_pool": http_client.get_stats(),
+        "db_pool": pipeline.pool.get_stats() if pipeline and pipeline.pool else None,
+        "backend_pool": backend_pool.get_stats(),
+        "generation": pipeline.get_stats() if pipeline else None,
+        "inference": inference_client.get_stats(),
+        "warmup": model_warmer.get_stats(),
+        "examples": example_store.get_stats(),
+        "repair": repairer.get_stats(),
+        "continuation": continuation_tokens.get_stats(),
+        "query_limits": query_watchdog.get_stats(),
+        "cost_gate": pipeline.cost_gate.get_stats() if pipeline else None,
+        "read_routing": pipeline.read_router.get_stats() if pipeline else None,
+        "entities": pipeline.entity_index.get_stats() if pipeline else None,
+        "fulltext": pipeline.fulltext.get_stats() if pipeline else None,
+        "sql_log": sql_log.get_stats(),
+        "routing": model_router.get_stats()
+    }
+
 @app.get("/models/list")
 def list_models():
-    """Get all available LM Studio models"""
-    if not lm_client:
-        raise HTTPException(503, "LM Studio not available")
-    return lm_client.list_models()
+    """Models served by the inference pool (Ollama and LM Studio endpoints)"""
+    return model_manager.get_available_models()
+
+@app.get("/models/stats")
+def model_stats():
+    """Per-model latency, tokens/s, validation-pass and execution-error rates"""
+    return model_manager.get_stats()
 
 @app.get("/models/test")
 def test_models():
-    """Test LM Studio connection"""
-    if not lm_client:
-        return {"connected": False}
-    return {"connected": lm_client.test_connection()}
\ No newline at end of file
+    """Re-run model discovery; connected if any inference endpoint answers"""
+    return {"connected": model_manager.test_connection()}
\ No newline at end of file
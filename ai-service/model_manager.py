@@ -1,41 +1,252 @@
 """
-Model Manager for LM Studio
-Handles model listing, selection, and configuration
+Model Manager
+Live registry of the models served by the inference pool and how they perform
 """
 
-from lm_studio_client import LMStudioClient
-from typing import Dict, Any, Optional
 import logging
+import re
+import threading
+from typing import Dict, Any, List, Optional
+
+from config import Config
+from rolling_stats import RollingWindow
+from backend_pool import BackendPool, backend_pool
+from inference import InferenceClient, ChatResult, inference_client
 
 logger = logging.getLogger(__name__)
 
+
+class ModelPerformance:
+    """
+    Rolling behaviour of one configured model (keyed by its MODEL_SEQUENCE name).
+    Rates are kept as 0/1 samples in a RollingWindow, so their mean is the recent rate.
+    """
+
+    OUTCOMES = ("success", "empty", "rejected", "db_error")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counters = {'launched': 0, 'speculative': 0, 'wins': 0, 'cancelled': 0, 'generation_seconds': 0.0}
+        self.outcomes = {outcome: 0 for outcome in self.OUTCOMES}
+        self.retries_caused = 0
+        self.tokens_per_second = RollingWindow()
+        self.validation_passed = RollingWindow()
+        self.execution_errors = RollingWindow()
+
+    def record_attempt(self, outcome: str):
+        """
+        One generate-validate-execute attempt.
+        empty: no SQL extracted, rejected: failed validation, db_error: failed on MySQL.
+        Not thread-safe on its own: ModelManager.record_attempt calls it under its lock.
+        """
+        self.outcomes[outcome] += 1
+        if outcome != "success":
+            # Every failed attempt forces a retry or an escalation to the next model
+            self.retries_caused += 1
+        if outcome != "empty":
+            self.validation_passed.add(0.0 if outcome == "rejected" else 1.0)
+        if outcome in ("success", "db_error"):
+            self.execution_errors.add(1.0 if outcome == "db_error" else 0.0)
+
+
 class ModelManager:
     """
-    Centralized model management for LM Studio
+    Centralized model management.
+
+    - catalog: models each endpoint serves, as last seen by backend_pool discovery
+    - performance: latency percentiles (from InferenceClient), tokens/s,
+      validation-pass rate, execution-error rate and retries caused per model
+
+    Routing and fallback consult is_reliable() / order_sequence().
     """
-    
-    def __init__(self):
-        self.client = LMStudioClient()
+
+    def __init__(self, client: InferenceClient = inference_client, pool: BackendPool = backend_pool):
+        self.client = client
+        self.pool = pool
         self.current_model = None
-        self.model_cache = None
-    
+        self.performance = {}
+        # Attempt outcomes per SQL output mode ('text' / 'json'), to compare retry causes
+        self.output_modes = {}
+        self._lock = threading.Lock()
+
+        client.subscribe(self.observe)
+
+    # --- Catalog ---
+
     def get_available_models(self) -> Dict[str, Any]:
-        """Get all available models from LM Studio"""
-        try:
-            if self.model_cache is None:
-                self.model_cache = self.client.list_models()
-            return self.model_cache
-        except Exception as e:
-            logger.error(f"Failed to get models: {e}")
-            return {"success": False, "models": [], "error": str(e)}
-    
+        """Models served by the pool, from the pool's periodic discovery (no extra polling)"""
+        models = []
+        errors = []
+        for endpoint in self.pool.endpoints:
+            for entry in endpoint.model_entries:
+                models.append({
+                    'id': entry['id'],
+                    'name': self._format_model_name(entry['id']),
+                    'size': self._extract_model_size(entry['id']),
+                    'type': self._detect_model_type(entry['id']),
+                    'capabilities': self._detect_capabilities(entry['id']),
+                    'created': entry.get('created'),
+                    'owned_by': entry.get('owned_by', 'local'),
+                    'endpoint': endpoint.name,
+                    'kind': endpoint.kind
+                })
+            if endpoint.discovery_error:
+                errors.append(f"{endpoint.name}: {endpoint.discovery_error}")
+
+        return {
+            "success": bool(models) or not errors,
+            "models": models,
+            "count": len(models),
+            "errors": errors
+        }
+
     def refresh_models(self) -> Dict[str, Any]:
-        """Force refresh model list"""
-        self.model_cache = None
+        """Run discovery now instead of waiting for the next interval"""
+        self.pool.discover()
         return self.get_available_models()
-    
+
     def test_connection(self) -> bool:
-        """Test LM Studio connection"""
-        return self.client.test_connection()
+        """True if at least one endpoint answers"""
+        return bool(self.refresh_models()["models"])
+
+    @staticmethod
+    def _format_model_name(model_id: str) -> str:
+        """'llama-3.2-8b-instruct' -> 'Llama 3.2 8B Instruct'"""
+        formatted = []
+        for part in model_id.split('-'):
+            if part.replace('.', '').isdigit():
+                formatted.append(part)  # Keep version numbers as-is
+            elif part.lower() in ['b', 'gb', 'mb']:
+                formatted.append(part.upper())  # Parameter size
+            else:
+                formatted.append(part.capitalize())
+        return ' '.join(formatted)
+
+    @staticmethod
+    def _extract_model_size(model_id: str) -> str:
+        """'8b' -> '8B parameters'"""
+        match = re.search(r'(\d+)b', model_id.lower())
+        if match:
+            return f"{match.group(1)}B parameters"
+        match = re.search(r'(\d+)m', model_id.lower())
+        if match:
+            return f"{match.group(1)}M parameters"
+        return "Unknown size"
+
+    @staticmethod
+    def _detect_model_type(model_id: str) -> str:
+        model_id_lower = model_id.lower()
+        if 'code' in model_id_lower or 'sql' in model_id_lower:
+            return 'code'
+        if 'instruct' in model_id_lower or 'chat' in model_id_lower:
+            return 'chat'
+        if 'embed' in model_id_lower:
+            return 'embedding'
+        return 'general'
+
+    @staticmethod
+    def _detect_capabilities(model_id: str) -> List[str]:
+        """Capabilities guessed from the model name"""
+        model_id_lower = model_id.lower()
+        capabilities = []
+        if any(x in model_id_lower for x in ['code', 'sql', 'sqlcoder']):
+            capabilities += ['sql', 'code']
+        if any(x in model_id_lower for x in ['instruct', 'chat', 'llama', 'mistral']):
+            capabilities.append('chat')
+        if any(x in model_id_lower for x in ['llama', 'qwen', 'mistral']):
+            capabilities.append('analysis')
+        return capabilities or ['general']
+
+    # --- Performance ---
+
+    def stats(self, name: str) -> ModelPerformance:
+        with self._lock:
+            if name not in self.performance:
+                self.performance[name] = ModelPerformance(name)
+            return self.performance[name]
+
+    def count(self, name: str, counter: str, amount: float = 1):
+        """Bump a launch / win / cancel / generation-time counter (hedged lanes run concurrently)"""
+        perf = self.stats(name)
+        with self._lock:
+            perf.counters[counter] += amount
+
+    def record_attempt(self, name: str, outcome: str, mode: str = "text"):
+        perf = self.stats(name)
+        # Hedged lanes record attempts concurrently: the outcome counters are read-modify-writes
+        with self._lock:
+            perf.record_attempt(outcome)
+            outcomes = self.output_modes.setdefault(mode, {o: 0 for o in ModelPerformance.OUTCOMES})
+            outcomes[outcome] += 1
+
+    def observe(self, stats_key: str, reply: ChatResult):
+        """Inference listener: generation speed per model"""
+        completion = reply.usage.get('completion_tokens', 0)
+        if completion and reply.elapsed > 0:
+            self.stats(stats_key).tokens_per_second.add(completion / reply.elapsed)
+
+    def latency(self, name: str) -> RollingWindow:
+        """Call latency window of a model (shared with the adaptive timeouts)"""
+        return self.client.latency[name]
+
+    def is_reliable(self, name: str) -> bool:
+        """
+        False once the model's recent validation-pass rate has dropped below
+        MODEL_MIN_PASS_RATE (judged after MODEL_STATS_MIN_SAMPLES attempts)
+        """
+        window = self.stats(name).validation_passed
+        if len(window) < Config.MODEL_STATS_MIN_SAMPLES:
+            return True
+        return window.mean() >= Config.MODEL_MIN_PASS_RATE
+
+    def order_sequence(self, sequence: List[Dict]) -> List[Dict]:
+        """Move unreliable models behind the reliable ones, keeping the configured order otherwise"""
+        return sorted(sequence, key=lambda cfg: not self.is_reliable(cfg['name']))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-model performance for /models/stats"""
+        def rate(window: RollingWindow) -> Optional[float]:
+            mean = window.mean()
+            return round(mean * 100, 2) if mean is not None else None
+
+        with self._lock:
+            performance = list(self.performance.values())
+            counters = {perf.name: dict(perf.counters) for perf in performance}
+            outcome_counts = {perf.name: (dict(perf.outcomes), perf.retries_caused) for perf in performance}
+            output_modes = {}
+            for mode, outcomes in self.output_modes.items():
+                attempts = sum(outcomes.values())
+                output_modes[mode] = {
+                    'attempts': attempts,
+                    **outcomes,
+                    'empty_rate': round(outcomes['empty'] / attempts * 100, 2) if attempts else 0,
+                    'rejected_rate': round(outcomes['rejected'] / attempts * 100, 2) if attempts else 0
+                }
+
+        models = {}
+        for perf in performance:
+            counts = counters[perf.name]
+            launched = counts['launched']
+            models[perf.name] = {
+                **counts,
+                'generation_seconds': round(counts['generation_seconds'], 2),
+                'win_rate': round(counts['wins'] / launched * 100, 2) if launched else 0,
+                'latency': self.latency(perf.name).summary(),
+                'tokens_per_second': perf.tokens_per_second.summary(),
+                'attempts': outcome_counts[perf.name][0],
+                'validation_pass_rate': rate(perf.validation_passed),
+                'execution_error_rate': rate(perf.execution_errors),
+                'retries_caused': outcome_counts[perf.name][1],
+                'reliable': self.is_reliable(perf.name)
+            }
+
+        discovered = [e.last_discovery for e in self.pool.endpoints if e.last_discovery]
+        return {
+            'models': models,
+            'output_modes': output_modes,
+            'catalog_refreshed_at': max(discovered) if discovered else None,
+            'catalog_size': sum(len(e.model_entries) for e in self.pool.endpoints) if discovered else None
+        }
+
 
 model_manager = ModelManager()
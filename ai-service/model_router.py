@@ -0,0 +1,138 @@
+"""
+Complexity-Based Model Routing
+Sends simple lookups to the small secondary model and escalates on failure
+"""
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from rolling_stats import RollingWindow
+from model_manager import model_manager
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRouter:
+    """
+    Scores query complexity from QueryEnhancer metadata, length, entity count
+    and join likelihood. Queries at or below ROUTING_SIMPLE_THRESHOLD start on
+    the secondary model; MODEL_SEQUENCE follows as the escalation path.
+    """
+
+    # Words that usually need tables beyond view_general_inventory
+    JOIN_HINTS = [
+        r'\btransactions?\b', r'\bhistory\b', r'\bborrow', r'\breturn', r'\boverdue\b',
+        r'\bvendors?\b', r'\bsuppliers?\b', r'\bpurchase', r'\bmaintenance\b', r'\broles?\b',
+        r'\bper\b', r'\beach\b', r'\bcompare', r'\bwho\b.*\bmost\b', r'\bgroup(ed)? by\b'
+    ]
+
+    # Aggregations that need a numeric column (COUNT(*) alone is trivial)
+    HEAVY_AGGREGATIONS = ('SUM', 'AVG', 'MAX', 'MIN')
+
+    SECONDARY_CFG = {
+        "name": "Secondary",
+        "model_identifier": Config.SECONDARY_MODEL,
+        "temperature": 0.1,
+        "retry_count": 1
+    }
+
+    def __init__(self, simple_threshold: int = Config.ROUTING_SIMPLE_THRESHOLD):
+        self.simple_threshold = simple_threshold
+        self._lock = threading.Lock()
+        self.decisions = {'simple': 0, 'complex': 0}
+        self.escalations = 0
+        self.estimated_seconds_saved = 0.0
+        self.latency = {'simple': RollingWindow(), 'complex': RollingWindow()}
+
+    def score(self, query: str, metadata: Optional[Dict] = None) -> Tuple[int, Dict[str, int]]:
+        """
+        Return (score, factors). Each factor adds points:
+        length, entities (capitalised names, codes, numbers), join hints,
+        time filter and non-COUNT aggregation.
+        """
+        metadata = metadata or {}
+        words = query.split()
+
+        factors = {
+            'length': (len(words) > 12) + (len(words) > 25),
+            'entities': min(2, max(0, len(self._entities(query)) - 1)),
+            'joins': min(2, sum(1 for hint in self.JOIN_HINTS if re.search(hint, query, re.IGNORECASE))),
+            'time_filter': int(bool(metadata.get('has_time_filter'))),
+            'aggregation': int(
+                bool(metadata.get('has_statistical_intent'))
+                and (metadata.get('statistical_info') or {}).get('aggregation') in self.HEAVY_AGGREGATIONS
+            )
+        }
+        return sum(factors.values()), factors
+
+    @staticmethod
+    def _entities(query: str) -> List[str]:
+        # Skip the first word: it is capitalised because it starts the sentence
+        words = query.split()[1:]
+        return [
+            w for w in words
+            if re.match(r"^[A-ZÇĞİÖŞÜ][\w'-]+", w) or re.search(r'\d', w) or w.startswith(("'", '"'))
+        ]
+
+    def route(self, query: str, metadata: Optional[Dict], sequence: List[Dict], available=None) -> Tuple[List[Dict], Dict[str, Any]]:
+        """
+        Pick the model sequence for a query.
+        `available` is an optional predicate telling whether a model can be served at all
+        (the pipeline passes discovery-confirmed availability: the secondary is optional).
+        Returns (sequence, decision) where decision is reported with the result.
+        """
+        score, factors = self.score(query, metadata)
+        secondary = self.SECONDARY_CFG['model_identifier']
+        simple = (
+            Config.MODEL_ROUTING
+            and score <= self.simple_threshold
+            and (available is None or available(secondary))
+            # A secondary model that keeps producing invalid SQL only adds an escalation
+            and model_manager.is_reliable(self.SECONDARY_CFG['name'])
+        )
+
+        route = 'simple' if simple else 'complex'
+        with self._lock:
+            self.decisions[route] += 1
+
+        decision = {'route': route, 'score': score, 'factors': factors}
+        if simple:
+            return [self.SECONDARY_CFG] + list(sequence), decision
+        return list(sequence), decision
+
+    def record_outcome(self, decision: Dict[str, Any], model_name: Optional[str], elapsed: float,
+                       primary_p50: Optional[float] = None):
+        """
+        Record how a routed query ended. A simple query answered by the
+        secondary model saves roughly the primary's median latency minus ours.
+        """
+        route = decision['route']
+        self.latency[route].add(elapsed)
+        if route != 'simple':
+            return
+
+        with self._lock:
+            if model_name != self.SECONDARY_CFG['name']:
+                self.escalations += 1
+            elif primary_p50 is not None:
+                self.estimated_seconds_saved += max(0.0, primary_p50 - elapsed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Routing decisions and latency per route"""
+        simple = self.decisions['simple']
+        return {
+            'enabled': Config.MODEL_ROUTING,
+            'secondary_model': self.SECONDARY_CFG['model_identifier'],
+            'simple_threshold': self.simple_threshold,
+            'decisions': dict(self.decisions),
+            'escalations': self.escalations,
+            'escalation_rate': round(self.escalations / simple * 100, 2) if simple else 0,
+            'estimated_seconds_saved': round(self.estimated_seconds_saved, 2),
+            'latency': {route: window.summary() for route, window in self.latency.items()}
+        }
+
+
+# Global router instance
+model_router = ModelRouter()
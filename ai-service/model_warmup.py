@@ -0,0 +1,197 @@
+"""
+Model Warm-up and Keep-Alive
+Preloads the configured models and keeps them resident so no query pays a cold load
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, List
+
+from config import Config
+from http_client import http_client
+from circuit_breaker import CircuitBreaker
+from backend_pool import BackendPool, InferenceEndpoint, backend_pool
+from inference import InferenceClient, ChatResult, inference_client
+
+logger = logging.getLogger(__name__)
+
+
+class ModelWarmer:
+    """
+    Loads every configured model on every endpoint that serves it, then pings
+    idle endpoints each MODEL_KEEPALIVE_INTERVAL seconds. Each ping is a one-token
+    chat carrying keep_alive, which resets Ollama's unload timer.
+
+    Pings take a free admission slot without queuing (skipped, not shed, when
+    none is free) and only go to endpoints whose breaker is closed; their outcome is
+    recorded on the breaker like any other call. Only models that discovery has
+    seen on an endpoint are pinged there.
+
+    Cold starts are detected on real calls (via InferenceClient.subscribe):
+    Ollama reports load_duration directly; for other servers a latency spike
+    of COLD_START_SPIKE_FACTOR x the model's p50 is taken as a reload.
+    """
+
+    PING_MESSAGES = [{"role": "user", "content": "ping"}]
+
+    def __init__(self, client: InferenceClient = inference_client, pool: BackendPool = backend_pool,
+                 interval: int = Config.MODEL_KEEPALIVE_INTERVAL):
+        self.client = client
+        self.pool = pool
+        self.interval = interval
+        self._thread = None
+        self._lock = threading.Lock()
+
+        self.warmed = {}           # "model@endpoint" -> last successful ping (epoch seconds)
+        self.pings = 0
+        self.ping_failures = 0
+        self.pings_skipped = 0     # no free admission slot at ping time
+        self.evictions = 0         # pings that found the model unloaded
+        self.cold_starts = {}      # stats key -> count
+        self.last_cold_start = None
+
+        client.subscribe(self.observe)
+
+    @staticmethod
+    def configured_models() -> List[str]:
+        """Models the pipeline can call: MODEL_SEQUENCE, the routing model and the translator"""
+        models = [cfg['model_identifier'] for cfg in Config.MODEL_SEQUENCE]
+        if Config.MODEL_ROUTING:
+            models.append(Config.SECONDARY_MODEL)
+        models.append(Config.TRANSLATION_MODEL)
+        # Keep order, drop duplicates
+        return list(dict.fromkeys(models))
+
+    def ping(self, endpoint: InferenceEndpoint, model: str) -> bool:
+        """Load (or keep loaded) one model on one endpoint"""
+        if endpoint.breaker.state != CircuitBreaker.CLOSED:
+            return False
+        # Never queue behind (or ahead of) real traffic: ping only if a slot is free now
+        if not endpoint.admission.try_acquire():
+            with self._lock:
+                self.pings_skipped += 1
+            return False
+        if not endpoint.breaker.allow_request():
+            endpoint.admission.release()
+            return False
+
+        payload = endpoint.driver.build_payload(self.PING_MESSAGES, model, 0.0, max_tokens=1)
+        # A cold load can take a while; this runs in the background thread
+        started = time.monotonic()
+        try:
+            res = http_client.post(endpoint.chat_url, json=payload, stream=True, read_timeout=Config.LLM_MAX_TIMEOUT)
+            try:
+                res.raise_for_status()
+                usage = None
+                for line in res.iter_lines():
+                    if not line:
+                        continue
+                    _, done, chunk_usage = endpoint.driver.parse_line(line)
+                    usage = chunk_usage or usage
+                    if done:
+                        break
+            finally:
+                res.close()
+        except Exception as e:
+            endpoint.breaker.record_failure()
+            with self._lock:
+                self.pings += 1
+                self.ping_failures += 1
+            logger.warning(f"Warm-up of {model} on {endpoint.name} failed: {e}")
+            return False
+        finally:
+            # No hold time: a cold load would inflate the wait estimate used for shedding
+            endpoint.admission.release()
+
+        endpoint.breaker.record_success()
+        load_seconds = (usage or {}).get('load_seconds', 0.0)
+        key = f"{model}@{endpoint.name}"
+        with self._lock:
+            self.pings += 1
+            if load_seconds >= Config.COLD_START_LOAD_SECONDS and key in self.warmed:
+                # It was loaded before, so the server evicted it in between
+                self.evictions += 1
+                logger.warning(f"{model} had been unloaded from {endpoint.name} (reload took {load_seconds:.1f}s)")
+            self.warmed[key] = time.time()
+
+        logger.info(f"🔥 {model} warm on {endpoint.name} ({time.monotonic() - started:.1f}s)")
+        return True
+
+    def warm_up(self, idle_only: bool = False):
+        """Ping every configured model on each healthy endpoint discovery has seen it on"""
+        for model in self.configured_models():
+            for endpoint in self.pool.endpoints:
+                if not endpoint.serves(model, assume=False):
+                    continue
+                # A busy endpoint keeps its models loaded by itself
+                if idle_only and endpoint.outstanding:
+                    continue
+                self.ping(endpoint, model)
+
+    def start(self):
+        """Warm up now and keep models resident in the background"""
+        if self._thread or not Config.MODEL_WARMUP:
+            return
+
+        def loop():
+            # Discovery starts alongside; wait for its first pass so pings only target served models
+            waited = 0
+            while not any(e.last_discovery for e in self.pool.endpoints) and waited < self.interval:
+                time.sleep(1)
+                waited += 1
+            self.warm_up()
+            while True:
+                time.sleep(self.interval)
+                self.warm_up(idle_only=True)
+
+        self._thread = threading.Thread(target=loop, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def observe(self, stats_key: str, reply: ChatResult):
+        """Inference listener: flag calls that paid for a model load"""
+        load_seconds = reply.usage.get('load_seconds')
+        if load_seconds is not None:
+            cold = load_seconds >= Config.COLD_START_LOAD_SECONDS
+        else:
+            window = self.client.latency[stats_key]
+            median = window.percentile(50)
+            cold = (
+                len(window) >= Config.COLD_START_MIN_SAMPLES
+                and median is not None
+                and reply.elapsed > median * Config.COLD_START_SPIKE_FACTOR
+            )
+        if not cold:
+            return
+
+        with self._lock:
+            self.cold_starts[stats_key] = self.cold_starts.get(stats_key, 0) + 1
+            self.last_cold_start = {
+                'stats_key': stats_key,
+                'model': reply.model,
+                'endpoint': reply.endpoint,
+                'elapsed': round(reply.elapsed, 2),
+                'load_seconds': round(load_seconds, 2) if load_seconds is not None else None,
+                'at': time.time()
+            }
+        logger.warning(f"Cold start: {reply.model} on {reply.endpoint} took {reply.elapsed:.1f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Warm models, ping results and detected cold starts"""
+        with self._lock:
+            return {
+                'enabled': Config.MODEL_WARMUP,
+                'keepalive_interval_seconds': self.interval,
+                'keep_alive': Config.OLLAMA_KEEP_ALIVE,
+                'models': self.configured_models(),
+                'seconds_since_ping': {key: round(time.time() - at) for key, at in self.warmed.items()},
+                'pings': self.pings,
+                'ping_failures': self.ping_failures,
+                'pings_skipped': self.pings_skipped,
+                'evictions': self.evictions,
+                'cold_starts': dict(self.cold_starts),
+                'last_cold_start': self.last_cold_start
+            }
+
+
+# Global warmer over the shared pool and client
+model_warmer = ModelWarmer()
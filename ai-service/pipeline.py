@@ -1,69 +1,194 @@
 import time
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import json
 import re
-import requests
 import pymysql
 import sqlparse
-from dbutils.pooled_db import PooledDB
 from zemberek import TurkishMorphology
 import dspy
 from config import Config
 from sql_validator import SQLValidator
+from schema_cache import SchemaCache
+from query_cache import cache
+from circuit_breaker import CircuitOpenError
+from backend_pool import backend_pool
+from model_router import model_router
+from deadline import Deadline, DeadlineExceeded
+from admission import AdmissionRejected
+from inference import inference_client
+from model_manager import model_manager
+from example_store import example_store
+from sql_repair import repairer
+from continuation import continuation_tokens, InvalidContinuation
+from query_watchdog import query_watchdog
+from cost_gate import CostGate
+from read_router import ReadRouter
+from db_pool import InstrumentedPool, PoolExhausted
+from entity_index import EntityIndex
+from fulltext_rewrite import FulltextRewriter
+from sql_log import sql_log
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
 class Pipeline:
+    # Prompts are kept byte-identical across requests so the backend can reuse
+    # its KV cache for the prefix; everything request-specific goes at the end.
+    TRANSLATION_SYSTEM_PROMPT = """You are a translation engine. Your ONLY job is to translate Turkish inventory queries to English.
+
+RULES:
+1. Output ONLY the translated text. No "Here is the translation".
+2. Treat 'hibe' as 'donated'.
+3. Treat 'zimmetli' as 'lent'.
+4. Treat 'boşta' as 'available'.
+"""
+
+    # Few-Shot (Örnekleri Chat Geçmişi gibi veriyoruz)
+    TRANSLATION_EXAMPLES = [
+        {"role": "user", "content": "monitörler nerede"},
+        {"role": "assistant", "content": "Where are the monitors?"},
+        {"role": "user", "content": "ahmetin eşyaları"},
+        {"role": "assistant", "content": "What items does Ahmet have?"},
+    ]
+
+    SQL_SYSTEM_PROMPT = """You are a MySQL expert. Output ONLY valid SQL query. No explanations.
+
+DATABASE SCHEMA:
+{schema}
+
+RULES:
+1. USE `view_general_inventory` for ALL general queries (items, holders, status).
+   - Columns: item_name, category_name, location, status, current_holder.
+2. DO NOT JOIN `users` if using `view_general_inventory`.
+3. For 'available' items: status = 'available'.
+4. For 'donated' items: status = 'donated'.
+5. If the request lists known values, filter those columns with = or IN (...) using the exact literals given.
+   Otherwise use LIKE '%term%' for fuzzy search on names.
+6. If the request gives a date range, filter on created_at:
+   WHERE created_at BETWEEN 'start_date' AND 'end_date 23:59:59'
+7. If the request gives an aggregation, use that function:
+   - For COUNT: Use COUNT(*) to count rows.
+   - For SUM/AVG/MAX/MIN: Apply to relevant numeric columns.
+   - Include GROUP BY if needed for meaningful aggregation.
+"""
+
+    SQL_EXAMPLES = [
+        {"role": "user", "content": "Generate SQL for: Where are the monitors?"},
+        {"role": "assistant", "content": "SELECT location, item_name, status FROM view_general_inventory WHERE item_name LIKE '%Monitor%' OR category_name LIKE '%Monitor%';"},
+        {"role": "user", "content": "Generate SQL for: What items does Ahmet have?"},
+        {"role": "assistant", "content": "SELECT item_name, location FROM view_general_inventory WHERE current_holder LIKE '%Ahmet%';"},
+        {"role": "user", "content": "Generate SQL for: Show me items added this week"},
+        {"role": "assistant", "content": "SELECT item_name, category_name, created_at FROM view_general_inventory WHERE created_at >= CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY;"},
+        {"role": "user", "content": "Generate SQL for: How many monitors do we have?\nAggregation: COUNT"},
+        {"role": "assistant", "content": "SELECT COUNT(*) as total_monitors FROM view_general_inventory WHERE item_name LIKE '%Monitor%';"},
+        {"role": "user", "content": "Generate SQL for: Which items are in room B212 with Ayşe?\nKnown values: location = 'B212'; current_holder = 'Ayşe Öztürk'"},
+        {"role": "assistant", "content": "SELECT item_name, category_name, status FROM view_general_inventory WHERE location = 'B212' AND current_holder = 'Ayşe Öztürk';"},
+    ]
+
+    # JSON modu: backend çıktıyı bu şemaya kısıtlar, SQL regex olmadan okunur
+    SQL_OUTPUT_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "sql": {"type": "string"},
+            "tables": {"type": "array", "items": {"type": "string"}}
+        },
+        "required": ["sql", "tables"],
+        "additionalProperties": False
+    }
+
+    SQL_JSON_INSTRUCTION = """
+OUTPUT FORMAT:
+Respond with a JSON object: {"sql": "<one MySQL SELECT statement>", "tables": ["<tables and views used>"]}
+"""
+
+    # Aynı örnekler, JSON cevap biçiminde
+    SQL_JSON_EXAMPLES = [
+        message if message["role"] == "user" else {
+            "role": "assistant",
+            "content": json.dumps({"sql": message["content"], "tables": ["view_general_inventory"]})
+        }
+        for message in SQL_EXAMPLES
+    ]
+
     def __init__(self):
         self.config = Config()
         self.morphology = TurkishMorphology.create_with_defaults()
-        self._schema_cache = None
+        # Tüm LLM çağrıları tek istemciden: Ollama ve OpenAI uyumlu sürücüler
+        self.llm = inference_client
+        # Model başına performans (gecikme, doğrulama oranı, hedge sayaçları)
+        self.models = model_manager
+        # Hedged generation lanes run here, outside the request threadpool
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config.WORKER_CONCURRENCY * len(self.config.MODEL_SEQUENCE),
+            thread_name_prefix="hedge"
+        )
         
         # 1. DB Connection Pool
         try:
-            self.pool = PooledDB(
-                creator=pymysql,
-                mincached=1,
-                maxcached=5,
+            # Sınırlı, ping'li ve ölçümlü havuz (boyut WORKER_CONCURRENCY'den)
+            self.pool = InstrumentedPool(
+                "primary",
                 host=self.config.DB_HOST,
+                port=self.config.DB_PORT,
                 user=self.config.DB_USER,
                 password=self.config.DB_PASSWORD,
                 database=self.config.DB_NAME,
-                cursorclass=pymysql.cursors.DictCursor
+                connect_timeout=self.config.DB_CONNECT_TIMEOUT
             )
             logger.info("✅ DB Pool Ready")
         except Exception as e:
             logger.error(f"❌ DB Pool Error: {e}")
             self.pool = None
 
+        # Üretilen sorgular replikalara gider (gecikme eşiği aşılırsa primary)
+        self.read_router = ReadRouter.from_config(self.pool)
+
+        # 2. Versioned schema cache (rebuilt after migrations)
+        self.schema_cache = SchemaCache(
+            self.get_db_connection,
+            self.config.DB_NAME,
+            check_interval=self.config.SCHEMA_CHECK_INTERVAL
+        )
+        self.schema_cache.subscribe(self._on_schema_change)
+
+        # 3. EXPLAIN cost gate (verdicts cached per SQL, dropped on schema change)
+        self.cost_gate = CostGate(self.get_read_connection)
+        self.schema_cache.subscribe(self.cost_gate.invalidate)
+
+        # 4. Distinct entity values (names, categories, locations, holders) for exact-match literals
+        self.entity_index = EntityIndex(self.get_read_connection)
+
+        # 5. Optional LIKE '%term%' -> MATCH ... AGAINST on FULLTEXT-indexed base tables
+        self.fulltext = FulltextRewriter(self.get_read_connection)
+
     def get_db_connection(self):
         return self.pool.connection() if self.pool else None
 
+    def get_read_connection(self):
+        """Connection for generated queries: a replica within the lag threshold, else the primary"""
+        return self.read_router.route().connection()
+
     def get_schema(self):
-        if self._schema_cache: return self._schema_cache
-        conn = self.get_db_connection()
-        if not conn: return "Schema Unavailable"
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE 
-                    FROM INFORMATION_SCHEMA.COLUMNS 
-                    WHERE TABLE_SCHEMA = %s 
-                    ORDER BY TABLE_NAME, ORDINAL_POSITION
-                """, (self.config.DB_NAME,))
-                rows = cursor.fetchall()
-                schema = {}
-                for row in rows:
-                    t = row['TABLE_NAME']
-                    c = f"{row['COLUMN_NAME']} ({row['DATA_TYPE']})"
-                    if t not in schema: schema[t] = []
-                    schema[t].append(c)
-                res = "\n".join([f"Table '{t}': {', '.join(cols)}" for t, cols in schema.items()])
-                self._schema_cache = res
-                return res
-        finally:
-            conn.close()
+        snapshot = self.schema_cache.get()
+        return snapshot.text if snapshot else "Schema Unavailable"
+
+    def get_stats(self):
+        """Generation statistics for /metrics"""
+        llm_stats = self.llm.get_stats()
+        return {
+            'generations': llm_stats['generations'],
+            'early_stops': llm_stats['early_stops'],
+            'timeouts': llm_stats['timeouts'],
+            'hedged': self.config.HEDGED_GENERATION,
+            'models': self.models.get_stats()['models']
+        }
+
+    def _on_schema_change(self, snapshot):
+        # Cached results were produced against the old columns
+        dropped = cache.invalidate_all()
+        logger.info(f"Schema v{snapshot.version}: invalidated {dropped} cached results")
 
     def analyze_word_zemberek(self, text):
         words = text.split()
@@ -80,59 +205,71 @@ class Pipeline:
                 continue
         return ", ".join(analysis)
 
-    def _call_ollama_chat(self, messages, model, temp=0.1):
-        """
-        KRİTİK GÜNCELLEME: /api/generate yerine /api/chat kullanıyoruz.
-        Bu sayede model 'System', 'User' ve 'Assistant' rollerini ayırt edebilir.
-        Örnekleri cevap sanıp tekrar etme sorunu biter.
-        """
-        try:
-            # URL'i /api/chat olarak değiştirdik (Config'den bağımsız)
-            url = f"http://{self.config.OLLAMA_HOST}:11434/api/chat"
-            
-            payload = {
-                "model": model,
-                "messages": messages, # Prompt string yerine Mesaj Listesi gidiyor
-                "stream": False,
-                "options": {"temperature": temp}
-            }
-            res = requests.post(url, json=payload, timeout=60)
-            if res.status_code != 200:
-                logger.error(f"Ollama Error: {res.text}")
-                return None
-            
-            # Chat API yanıt yapısı farklıdır
-            return res.json().get("message", {}).get("content", "").strip()
-        except Exception as e:
-            logger.error(f"Ollama Chat Failed: {e}")
-            return None
-
-    def translate_to_english(self, user_query):
+    def translate_to_english(self, user_query, deadline=None, priority="interactive"):
         morphology = self.analyze_word_zemberek(user_query)
+
+        messages = [{"role": "system", "content": self.TRANSLATION_SYSTEM_PROMPT}]
+        messages.extend(self.TRANSLATION_EXAMPLES)
+        # Değişken içerik en sona: morfoloji ipucu ve kullanıcı sorgusu
+        if morphology:
+            messages.append({"role": "system", "content": f"Morphology of the next query: {morphology}"})
+        messages.append({"role": "user", "content": user_query})
         
-        system_content = f"""
-        You are a translation engine. Your ONLY job is to translate Turkish inventory queries to English.
-        
-        RULES:
-        1. Output ONLY the translated text. No "Here is the translation".
-        2. Treat 'hibe' as 'donated'.
-        3. Treat 'zimmetli' as 'lent'.
-        4. Treat 'boşta' as 'available'.
-        
-        Morphology: {morphology}
+        reply = self.llm.chat(
+            messages,
+            self.config.TRANSLATION_MODEL,
+            max_tokens=self.config.TRANSLATION_NUM_PREDICT,
+            deadline=deadline,
+            stats_key="Translation",
+            priority=priority
+        )
+        return reply.content if reply else None
+
+    def build_sql_messages(self, schema, translated_query, query_metadata, examples=None, entities=None):
         """
+        Build the SQL generation chat: static prefix (rules, schema, examples)
+        followed by a single request message holding all per-query context.
+        In JSON output mode the prefix asks for {"sql", "tables"} objects.
+        examples: retrieved verified examples, placed after the static prefix.
+        entities: column -> exact values resolved from the question (EntityIndex).
+        """
+        system_prompt = self.SQL_SYSTEM_PROMPT.format(schema=schema)
+        if self.config.SQL_OUTPUT_MODE == "json":
+            system_prompt += self.SQL_JSON_INSTRUCTION
+            static_examples = self.SQL_JSON_EXAMPLES
+        else:
+            static_examples = self.SQL_EXAMPLES
 
-        # Few-Shot (Örnekleri Chat Geçmişi gibi veriyoruz)
-        messages = [
-            {"role": "system", "content": system_content},
-            {"role": "user", "content": "monitörler nerede"},
-            {"role": "assistant", "content": "Where are the monitors?"},
-            {"role": "user", "content": "ahmetin eşyaları"},
-            {"role": "assistant", "content": "What items does Ahmet have?"},
-            {"role": "user", "content": user_query}
-        ]
-        
-        return self._call_ollama_chat(messages, self.config.TRANSLATION_MODEL)
+        messages = [{"role": "system", "content": system_prompt}]
+        messages.extend(static_examples)
+        # Benzer doğrulanmış örnekler önekten sonra: önek (KV cache) değişmez
+        for example in examples or []:
+            messages.append({"role": "user", "content": example['request']})
+            messages.append({"role": "assistant", "content": self._example_answer(example)})
+        messages.append({"role": "user", "content": self._build_sql_request(translated_query, query_metadata, entities)})
+        return messages
+
+    def _example_answer(self, example):
+        if self.config.SQL_OUTPUT_MODE == "json":
+            return json.dumps({"sql": example['sql'], "tables": example.get('tables', [])})
+        return example['sql']
+
+    def _build_sql_request(self, translated_query, query_metadata, entities=None):
+        request = f"Generate SQL for: {translated_query}"
+
+        known_values = EntityIndex.describe(entities)
+        if known_values:
+            request += f"\n{known_values}"
+
+        time_period = query_metadata.get('time_period')
+        if query_metadata.get('has_time_filter') and time_period:
+            request += f"\nDate range: {time_period['start_date']} to {time_period['end_date']}"
+
+        stat_info = query_metadata.get('statistical_info')
+        if query_metadata.get('has_statistical_intent') and stat_info:
+            request += f"\nAggregation: {stat_info['aggregation']}"
+
+        return request
 
     def extract_sql(self, text):
         if not text: return ""
@@ -141,9 +278,7 @@ class Pipeline:
         # Regex: Sadece SQL komutunu bul (öncesindeki ve sonrasındaki gevezelikleri at)
         match = re.search(r'(SELECT|WITH)\s[\s\S]*?(?:;|$)', text, re.IGNORECASE)
         if match:
-            sql = match.group(0).strip()
-            if not sql.endswith(';'): sql += ';'
-            return sqlparse.format(sql, reindent=True, keyword_case='upper')
+            return self._format_sql(match.group(0))
         
         # Eğer regex bulamazsa ama metin SELECT içeriyorsa, manuel temizlik dene
         if "SELECT" in text.upper():
@@ -151,10 +286,51 @@ class Pipeline:
             
         return ""
 
-    def run_pipeline(self, user_query, query_metadata=None):
+    def _referenced_tables(self, result):
+        if result.get('tables'):
+            return result['tables']
+        return sorted(
+            t for t in SQLValidator.APPROVED_TABLES
+            if re.search(rf"\b{re.escape(t)}\b", result['sql'], re.IGNORECASE)
+        )
+
+    def _format_sql(self, sql):
+        sql = sql.strip()
+        if not sql.endswith(';'): sql += ';'
+        return sqlparse.format(sql, reindent=True, keyword_case='upper')
+
+    def parse_structured_sql(self, text):
+        """
+        Read a JSON-mode reply. Returns (sql, tables); ("", []) when the reply
+        is not a JSON object with a SQL string (e.g. cut off by num_predict).
+        """
+        if not text:
+            return "", []
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return "", []
+        if not isinstance(data, dict) or not isinstance(data.get("sql"), str) or not data["sql"].strip():
+            return "", []
+
+        tables = data.get("tables")
+        tables = [t for t in tables if isinstance(t, str)] if isinstance(tables, list) else []
+        return self._format_sql(data["sql"]), tables
+
+    def run_pipeline(self, user_query, query_metadata=None, deadline=None, priority="interactive"):
+        """
+        Translate, generate, validate and execute.
+        deadline: remaining request budget; raises DeadlineExceeded once it runs out.
+        priority: 'interactive' or 'batch', used to order queued LLM calls.
+        """
+        deadline = deadline or Deadline(self.config.DEFAULT_REQUEST_BUDGET)
+
         # 1. Çeviri
-        translated_query = self.translate_to_english(user_query)
-        if not translated_query: return {"error": "Translation failed"}
+        translated_query = self.translate_to_english(user_query, deadline, priority)
+        if not translated_query:
+            # Çeviri süre aşımından düştüyse hata yerine DeadlineExceeded
+            deadline.ensure(self.config.MIN_CALL_BUDGET, stage="SQL generation")
+            return {"error": "Translation failed"}
         
         # Ekstra Güvenlik: Hala ":" içeriyorsa (örn: "Translation: ...") temizle
         if "translation:" in translated_query.lower():
@@ -163,124 +339,418 @@ class Pipeline:
         logger.info(f"🇹🇷: {user_query} -> 🇺🇸: {translated_query}")
         
         schema = self.get_schema()
-        error_memory = []
-        
-        # Extract enhancement metadata
         query_metadata = query_metadata or {}
-        has_time_filter = query_metadata.get('has_time_filter', False)
-        has_statistical_intent = query_metadata.get('has_statistical_intent', False)
-        time_period = query_metadata.get('time_period')
-        stat_info = query_metadata.get('statistical_info')
 
-        # 2. SQL Üretim
-        for model_cfg in self.config.MODEL_SEQUENCE:
-            for attempt in range(model_cfg['retry_count']):
-                
-                # Build enhanced system prompt with time and statistical context
-                time_instructions = ""
-                if has_time_filter and time_period:
-                    time_instructions = f"""
-                6. IMPORTANT: Filter results by date range: {time_period['start_date']} to {time_period['end_date']}.
-                   - Use created_at column for filtering.
-                   - Format: WHERE created_at BETWEEN '{time_period['start_date']}' AND '{time_period['end_date']} 23:59:59'
-                """
-                
-                stat_instructions = ""
-                if has_statistical_intent and stat_info:
-                    aggregation = stat_info['aggregation']
-                    stat_instructions = f"""
-                7. IMPORTANT: Use {aggregation} aggregation function.
-                   - For COUNT: Use COUNT(*) to count rows.
-                   - For SUM/AVG/MAX/MIN: Apply to relevant numeric columns.
-                   - Include GROUP BY if needed for meaningful aggregation.
-                """
-                
-                system_content = f"""
-                You are a MySQL expert. Output ONLY valid SQL query. No explanations.
-                
-                DATABASE SCHEMA:
-                {schema}
-                
-                RULES:
-                1. USE `view_general_inventory` for ALL general queries (items, holders, status).
-                   - Columns: item_name, category_name, location, status, current_holder.
-                2. DO NOT JOIN `users` if using `view_general_inventory`.
-                3. For 'available' items: status = 'available'.
-                4. For 'donated' items: status = 'donated'.
-                5. Use LIKE '%term%' for fuzzy search on names.
-                {time_instructions}
-                {stat_instructions}
-                """
-                
-                # Chat Geçmişi ile Context Oluşturma
-                messages = [
-                    {"role": "system", "content": system_content},
-                    {"role": "user", "content": "Where are the monitors?"},
-                    {"role": "assistant", "content": "SELECT location, item_name, status FROM view_general_inventory WHERE item_name LIKE '%Monitor%' OR category_name LIKE '%Monitor%';"},
-                    {"role": "user", "content": "What items does Ahmet have?"},
-                    {"role": "assistant", "content": "SELECT item_name, location FROM view_general_inventory WHERE current_holder LIKE '%Ahmet%';"},
-                ]
-                
-                # Add time-based example if relevant
-                if has_time_filter:
-                    messages.extend([
-                        {"role": "user", "content": "Show me items added this week"},
-                        {"role": "assistant", "content": f"SELECT item_name, category_name, created_at FROM view_general_inventory WHERE created_at >= CURDATE() - INTERVAL WEEKDAY(CURDATE()) DAY;"}
-                    ])
-                
-                # Add statistical example if relevant
-                if has_statistical_intent:
-                    messages.extend([
-                        {"role": "user", "content": "How many monitors do we have?"},
-                        {"role": "assistant", "content": "SELECT COUNT(*) as total_monitors FROM view_general_inventory WHERE item_name LIKE '%Monitor%';"}
-                    ])
-                
-                messages.append({"role": "user", "content": f"Generate SQL for: {translated_query}\nAvoid Errors: {'; '.join(error_memory)}"})
-                
-                raw_res = self._call_ollama_chat(messages, model_cfg['model_identifier'], model_cfg['temperature'])
-                sql = self.extract_sql(raw_res)
-                
-                if not sql: 
-                    error_memory.append("Empty SQL")
-                    continue
-
-                logger.info(f"Generated SQL: {sql}")
-                
-                # Validate SQL with strict AST-based validator
-                is_valid, validation_error = SQLValidator.validate(sql)
-                if not is_valid:
-                    logger.error(f"SQL REJECTED: {validation_error}\nSQL: {sql}")
-                    error_memory.append(f"Security: {validation_error}")
-                    continue
-
-                # Execute only if validated
-                conn = self.get_db_connection()
+        # Önceki başarılı sorgulardan en benzer örnekler
+        examples = example_store.search(translated_query) if self.config.EXAMPLE_STORE else []
+
+        # "ahmet", "B212" gibi terimler veritabanındaki tam değerlere çözülür (LIKE yerine = / IN)
+        entities = self.entity_index.resolve(user_query, translated_query) if self.config.ENTITY_INDEX else {}
+
+        # Tek sohbet: retry'lar geçmişi yeniden kurmak yerine hatayı sohbete ekler
+        messages = self.build_sql_messages(schema, translated_query, query_metadata, examples, entities)
+        request = messages[-1]['content']
+
+        # 2. Model seçimi: basit sorgular küçük modelle başlar, hata olursa büyük modele geçer
+        sequence, routing = model_router.route(
+            translated_query, query_metadata, self.config.MODEL_SEQUENCE, backend_pool.is_confirmed
+        )
+        # Son zamanlarda çoğunlukla geçersiz SQL üreten model yedeğin arkasına düşer
+        sequence = self.models.order_sequence(sequence)
+
+        # 3. SQL Üretim
+        started = time.monotonic()
+        if self.config.HEDGED_GENERATION and len(sequence) > 1:
+            result, error_memory = self._generate_hedged(messages, translated_query, deadline, sequence, priority)
+        else:
+            result, error_memory = self._generate_sequential(messages, translated_query, deadline, sequence, priority)
+
+        primary_name = self.config.MODEL_SEQUENCE[0]['name']
+        model_router.record_outcome(
+            routing,
+            result['model'] if result else None,
+            time.monotonic() - started,
+            self.models.latency(primary_name).percentile(50)
+        )
+
+        if not result:
+            return {"error": "Failed", "details": error_memory}
+
+        # Boş sonuç doğrulama sayılmaz: yalnızca satır döndüren sorgular örnek olur.
+        # Onarılan ya da maliyet kapısının sınırladığı SQL örnek olmaz: model onu kendisi üretmedi
+        # ve sınırlı sonuç sorunun tam cevabı değil
+        if (self.config.EXAMPLE_STORE and result['result_count'] > 0
+                and not result.get('repairs') and not result.get('cost_gate')):
+            example_store.add(translated_query, request, result['sql'], self._referenced_tables(result))
+
+        # Kesilen sonucun devamı /ask/page ile LLM'siz alınır
+        # Sayfa boyutu ilk sayfanınki: maliyet kapısının düşürdüğü LIMIT sonraki sayfalarda da geçerli
+        if result['truncated'] and continuation_tokens.enabled:
+            page_size = result['result_count']
+            result['continuation_token'] = continuation_tokens.issue(
+                result['sql'], page_size, page_size, self._schema_fingerprint()
+            )
+
+        response = {
+            "original_query": user_query,
+            "translated_query": translated_query,
+            **result,
+            "routing": routing
+        }
+        if entities:
+            response["entities"] = entities
+        return response
+
+    def _generate_sequential(self, messages, translated_query, deadline, sequence, priority):
+        """Try the model sequence one after another on a shared chat"""
+        error_memory = []
+        for model_cfg in sequence:
+            self.models.count(model_cfg['name'], 'launched')
+            result = self._run_model(model_cfg, messages, translated_query, error_memory, deadline, priority)
+            if result:
+                self.models.count(model_cfg['name'], 'wins')
+                return result, error_memory
+        return None, error_memory
+
+    def _generate_hedged(self, messages, translated_query, deadline, sequence, priority):
+        """
+        Start the primary model; if it has not produced a working query within
+        its hedge delay, launch the next model in parallel. The first lane whose
+        SQL validates and executes wins and the others are cancelled.
+        """
+        cancel_event = threading.Event()
+        lanes = {}
+        upcoming = iter(sequence)
+
+        def launch(model_cfg, speculative):
+            self.models.count(model_cfg['name'], 'launched')
+            if speculative:
+                self.models.count(model_cfg['name'], 'speculative')
+            lane_memory = []
+            # Her kulvar kendi sohbet kopyasında ilerler
+            future = self.executor.submit(
+                self._run_model, model_cfg, list(messages), translated_query, lane_memory,
+                deadline, priority, cancel_event
+            )
+            lanes[future] = (model_cfg, lane_memory)
+            return future
+
+        primary = next(upcoming)
+        pending = {launch(primary, speculative=False)}
+        next_cfg = next(upcoming, None)
+
+        while pending:
+            hedge_delay = self._hedge_delay(primary['name']) if next_cfg else None
+            timeout = deadline.timeout(hedge_delay) if hedge_delay is not None else deadline.remaining()
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done and deadline.expired():
+                cancel_event.set()
+                deadline.ensure(stage="hedged generation")
+
+            if not done:
+                # Primary is slower than usual: hedge with the next model
+                logger.info(f"Hedging: launching {next_cfg['name']} after {timeout:.1f}s")
+                pending.add(launch(next_cfg, speculative=True))
+                next_cfg = next(upcoming, None)
+                continue
+
+            for future in done:
                 try:
-                    with conn.cursor() as cursor:
-                        cursor.execute(sql)
-                        results = cursor.fetchall()
-                    conn.close()
-                    
-                    # Limit results to prevent massive data dumps
-                    if len(results) > 1000:
-                        logger.warning(f"Query returned {len(results)} rows - truncating to 1000")
-                        results = results[:1000]
-                    
-                    return {
-                        "original_query": user_query,
-                        "translated_query": translated_query,
-                        "sql": sql,
-                        "results": results,
-                        "result_count": len(results),
-                        "model": model_cfg['name']
-                    }
-                except Exception as db_err:
-                    if conn: conn.close()
-                    logger.error(f"DB Error: {db_err}")
+                    result = future.result()
+                except (CircuitOpenError, DeadlineExceeded, AdmissionRejected, PoolExhausted):
+                    # Backend is down, overloaded (LLM queue or DB pool) or the budget is gone: stop the other lanes and fail fast
+                    cancel_event.set()
+                    raise
+                if result:
+                    cancel_event.set()
+                    model_cfg = lanes[future][0]
+                    self.models.count(model_cfg['name'], 'wins')
+                    for other in pending:
+                        self.models.count(lanes[other][0]['name'], 'cancelled')
+                    return result, self._merge_lane_errors(lanes)
+
+            # Every running lane failed: move on without waiting for the timer
+            if not pending and next_cfg:
+                pending.add(launch(next_cfg, speculative=False))
+                next_cfg = next(upcoming, None)
+
+        return None, self._merge_lane_errors(lanes)
+
+    def _merge_lane_errors(self, lanes):
+        errors = []
+        for model_cfg, lane_memory in lanes.values():
+            errors.extend(f"{model_cfg['name']}: {error}" for error in lane_memory)
+        return errors
+
+    def _hedge_delay(self, model_name):
+        """Hedge after the primary's latency percentile, once enough samples exist"""
+        window = self.models.latency(model_name)
+        if len(window) < self.config.HEDGE_MIN_SAMPLES:
+            return self.config.HEDGE_DEFAULT_DELAY
+        return max(self.config.HEDGE_MIN_DELAY, window.percentile(self.config.HEDGE_PERCENTILE))
+
+    def _run_model(self, model_cfg, messages, translated_query, error_memory, deadline, priority, cancel_event=None):
+        """
+        Run up to retry_count attempts with one model.
+        Returns the result fields on success, None when all attempts failed or the lane was cancelled.
+        Raises DeadlineExceeded when there is no budget left for another attempt.
+        """
+        mode = self.config.SQL_OUTPUT_MODE
+        json_mode = mode == "json"
+        for attempt in range(model_cfg['retry_count']):
+            if cancel_event and cancel_event.is_set():
+                return None
+            deadline.ensure(self.config.MIN_CALL_BUDGET, stage=f"{model_cfg['name']} attempt {attempt + 1}")
+
+            if error_memory:
+                messages.append({
+                    "role": "user",
+                    "content": f"That did not work: {error_memory[-1]}\nGenerate corrected SQL for: {translated_query}"
+                })
+
+            started = time.time()
+            reply = self.llm.chat(
+                messages,
+                model_cfg['model_identifier'],
+                model_cfg['temperature'],
+                max_tokens=self.config.SQL_JSON_NUM_PREDICT if json_mode else self.config.SQL_NUM_PREDICT,
+                # JSON modunda ';' SQL string'inin içinde kalır: erken durdurma yok
+                stop_at_sql_end=not json_mode,
+                cancel_event=cancel_event,
+                deadline=deadline,
+                stats_key=model_cfg['name'],
+                priority=priority,
+                response_schema=self.SQL_OUTPUT_SCHEMA if json_mode else None
+            )
+            self.models.count(model_cfg['name'], 'generation_seconds', time.time() - started)
+            raw_res = reply.content if reply else None
+
+            messages.append({"role": "assistant", "content": raw_res or ""})
+            if json_mode:
+                sql, tables = self.parse_structured_sql(raw_res)
+            else:
+                sql, tables = self.extract_sql(raw_res), None
+            
+            if not sql: 
+                if cancel_event and cancel_event.is_set():
+                    return None
+                self.models.record_attempt(model_cfg['name'], "empty", mode)
+                error_memory.append("Empty SQL")
+                continue
+
+            # Mekanik hatalar (yanlış kolon/alias, enum büyük-küçük harf) LLM'siz düzeltilir
+            snapshot = self.schema_cache.get()
+            sql, fixes = repairer.repair(sql, snapshot)
+
+            logger.info(f"Generated SQL: {sql}")
+            
+            # Validate SQL with strict AST-based validator
+            is_valid, validation_error = SQLValidator.validate(sql)
+            if not is_valid:
+                logger.error(f"SQL REJECTED: {validation_error}\nSQL: {sql}")
+                self.models.record_attempt(model_cfg['name'], "rejected", mode)
+                error_memory.append(f"Security: {validation_error}")
+                continue
+
+            if cancel_event and cancel_event.is_set():
+                return None
+
+            # Pahalı sorgular (EXPLAIN tahmini) reddedilir ya da küçük LIMIT ile çalışır
+            max_rows = self.config.MAX_RESULT_ROWS
+            search_sql, search_rewrites = self._search_rewrite(sql)
+            verdict = self.cost_gate.check(search_sql) if self.config.COST_GATE else None
+            if verdict and verdict['action'] == CostGate.REJECT:
+                self.models.record_attempt(model_cfg['name'], "rejected", mode)
+                error_memory.append(
+                    f"SQL: {sql} -> Too expensive: {verdict['reason']}. "
+                    "Add selective WHERE filters (exact matches, a date range) and join only on key columns."
+                )
+                continue
+            if verdict and verdict['action'] == CostGate.LIMIT:
+                max_rows = min(max_rows, verdict['max_rows'])
+
+            # Execute only if validated
+            results, db_err = self._execute(sql, max_rows=max_rows, deadline=deadline, run_sql=search_sql)
+            if db_err is not None:
+                # Bilinmeyen kolon/tablo (1054/1146): önce yerelde onar, tekrar dene
+                repaired = repairer.repair_after_error(sql, db_err, snapshot)
+                if repaired and SQLValidator.validate(repaired)[0]:
+                    logger.info(f"Retrying locally repaired SQL: {repaired}")
+                    sql = repaired
+                    search_sql, search_rewrites = self._search_rewrite(sql)
+                    # Onarılan sorgu yeni bir sorgu: maliyet kapısından yeniden geçer
+                    verdict = self.cost_gate.check(search_sql) if self.config.COST_GATE else None
+                    if verdict and verdict['action'] == CostGate.REJECT:
+                        self.models.record_attempt(model_cfg['name'], "rejected", mode)
+                        error_memory.append(
+                            f"SQL: {sql} -> Too expensive: {verdict['reason']}. "
+                            "Add selective WHERE filters (exact matches, a date range) and join only on key columns."
+                        )
+                        continue
+                    max_rows = self.config.MAX_RESULT_ROWS
+                    if verdict and verdict['action'] == CostGate.LIMIT:
+                        max_rows = min(max_rows, verdict['max_rows'])
+                    results, db_err = self._execute(sql, max_rows=max_rows, deadline=deadline, run_sql=search_sql)
+
+            if db_err is not None:
+                logger.error(f"DB Error: {db_err}")
+                self.models.record_attempt(model_cfg['name'], "db_error", mode)
+                if query_watchdog.cancellation_kind(db_err):
+                    # Süre aşımı: modele sorgunun neden durdurulduğunu söyle
+                    error_memory.append(
+                        f"SQL: {sql} -> Cancelled: it ran past the execution time limit. "
+                        "Add selective WHERE filters and join only on key columns."
+                    )
+                else:
                     error_memory.append(f"SQL: {sql} -> Error: {db_err}")
-                    continue
+                continue
+
+            # _execute fetched one row past the cap: its presence means there is more
+            truncated = len(results) > max_rows
+            if truncated:
+                results = results[:max_rows]
+                logger.warning(f"Query returned more than {max_rows} rows - truncated")
+            
+            self.models.record_attempt(model_cfg['name'], "success", mode)
+            result = {
+                "sql": sql,
+                "results": results,
+                "result_count": len(results),
+                "truncated": truncated,
+                "estimated_total": self._estimate_total(search_sql, max_rows + 1) if truncated else len(results),
+                "model": model_cfg['name']
+            }
+            if tables is not None:
+                result["tables"] = tables
+            if fixes:
+                result["repairs"] = fixes
+            if verdict and verdict['action'] != CostGate.ALLOW:
+                result["cost_gate"] = verdict
+            if search_rewrites:
+                result["fulltext"] = search_rewrites
+            return result
+
+        return None
+
+    def _schema_fingerprint(self):
+        snapshot = self.schema_cache.get()
+        return snapshot.fingerprint if snapshot else None
+
+    def fetch_page(self, token):
+        """
+        Later page of a truncated result: re-executes the token's SQL at its offset, no LLM involved.
+        Raises InvalidContinuation for a forged, expired or stale token, or a query the cost gate rejects.
+        """
+        schema = self._schema_fingerprint()
+        page = continuation_tokens.read(token, schema)
+        sql, offset, page_size = page['sql'], page['offset'], page['page_size']
+
+        # The signature proves we issued it; validation still runs on every execution
+        is_valid, validation_error = SQLValidator.validate(sql)
+        if not is_valid:
+            raise InvalidContinuation(f"SQL rejected: {validation_error}")
+
+        # Pages skip the LLM, not the cost gate
+        search_sql = self._search_rewrite(sql)[0]
+        if self.config.COST_GATE:
+            verdict = self.cost_gate.check(search_sql)
+            if verdict and verdict['action'] == CostGate.REJECT:
+                raise InvalidContinuation(f"Query rejected by the cost gate: {verdict['reason']}", status_code=422)
+            if verdict and verdict['action'] == CostGate.LIMIT:
+                page_size = min(page_size, verdict['max_rows'])
+
+        results, db_err = self._execute(sql, offset, page_size, run_sql=search_sql)
+        if db_err is not None:
+            logger.error(f"DB Error on page at offset {offset}: {db_err}")
+            return {"error": "Failed", "details": [f"SQL: {sql} -> Error: {db_err}"]}
+
+        truncated = len(results) > page_size
+        results = results[:page_size]
+        response = {
+            "sql": sql,
+            "results": results,
+            "result_count": len(results),
+            "offset": offset,
+            "truncated": truncated
+        }
+        if truncated:
+            response["continuation_token"] = continuation_tokens.issue(sql, offset + page_size, page_size, schema)
+        return response
+
+    def _search_rewrite(self, sql):
+        """
+        (SQL to run, rewritten columns): the FULLTEXT form when FULLTEXT_REWRITE is on.
+        The generated SQL itself is kept as is for the response, examples and pages.
+        """
+        if not self.config.FULLTEXT_REWRITE:
+            return sql, []
+        return self.fulltext.rewrite(sql)
+
+    def _execute(self, sql, offset=0, max_rows=None, deadline=None, run_sql=None):
+        """
+        Run a validated query; returns (rows, None) or (None, error).
+        run_sql is the statement to send (the _search_rewrite form, computed once
+        by the caller); sql is the generated query it came from, for the logs.
+        The LIMIT is rewritten to max_rows + 1 so MySQL stops after one row past
+        the cap, and rows are streamed (SSDictCursor) instead of buffered.
+        The statement carries a MAX_EXECUTION_TIME bounded by the deadline and
+        is killed by the watchdog if it still runs after that.
+        """
+        max_rows = max_rows or self.config.MAX_RESULT_ROWS
+        limit_ms = query_watchdog.limit_ms(deadline)
+        run_sql = run_sql or sql
+        limited_sql = query_watchdog.limit(SQLValidator.enforce_limit(run_sql, max_rows + 1, offset), limit_ms)
+        target = self.read_router.route()
+        conn = target.connection()
+        started = time.perf_counter()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT CONNECTION_ID() AS id")
+                connection_id = cursor.fetchone()['id']
+
+            results = []
+            # KILL QUERY has to reach the server the query runs on
+            with query_watchdog.watch(connection_id, limit_ms, target.connect), conn.cursor(pymysql.cursors.SSDictCursor) as cursor:
+                cursor.execute(limited_sql)
+                while True:
+                    batch = cursor.fetchmany(self.config.RESULT_FETCH_SIZE)
+                    if not batch:
+                        break
+                    results.extend(batch)
+            conn.close()
+            sql_log.record(sql, limited_sql, (time.perf_counter() - started) * 1000, rows=len(results), target=target.name)
+            return results, None
+        except Exception as db_err:
+            if conn: conn.close()
+            sql_log.record(sql, limited_sql, (time.perf_counter() - started) * 1000, target=target.name, error=str(db_err))
+            kind = query_watchdog.cancellation_kind(db_err)
+            if kind:
+                query_watchdog.record_cancellation(kind, sql, limit_ms)
+                logger.warning(f"Query cancelled ({kind}) after {limit_ms}ms limit")
+            return None, db_err
+
+    def _estimate_total(self, run_sql, seen):
+        """
+        Optimizer estimate of the full result size (EXPLAIN rows x filtered over
+        the join) of the statement actually run, never below the `seen` rows
+        already fetched. None if EXPLAIN fails.
+        """
+        conn = self.get_read_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"EXPLAIN {run_sql}")
+                plan = cursor.fetchall()
+            conn.close()
+        except Exception as e:
+            if conn: conn.close()
+            logger.warning(f"EXPLAIN failed: {e}")
+            return None
 
-        return {"error": "Failed", "details": error_memory}
+        estimate = 1.0
+        for row in plan:
+            estimate *= (row.get('rows') or 1) * float(row.get('filtered') or 100) / 100
+        return max(int(estimate), seen)
     
     def _is_safe_sql(self, sql):
         """
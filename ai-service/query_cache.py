@@ -13,14 +13,18 @@ class QueryCache:
     Simple in-memory LRU cache for AI query results
     Cache TTL: 5 minutes
     Max Cache Size: 100 entries
+    Expired entries are kept for stale_ttl_seconds more so they can be served
+    while the LLM backend is down
     """
     
-    def __init__(self, ttl_seconds: int = 300, max_size: int = 100):
+    def __init__(self, ttl_seconds: int = 300, max_size: int = 100, stale_ttl_seconds: int = 3600):
         self.cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
         self.ttl_seconds = ttl_seconds
+        self.stale_ttl_seconds = stale_ttl_seconds
         self.max_size = max_size
         self.hits = 0
         self.misses = 0
+        self.stale_hits = 0
     
     def _generate_key(self, query: str) -> str:
         """Generate cache key from query (normalized)"""
@@ -33,10 +37,11 @@ class QueryCache:
         return time.time() - entry['timestamp'] > self.ttl_seconds
     
     def _cleanup_expired(self):
-        """Remove expired entries"""
+        """Remove entries that are past their stale window"""
+        max_age = self.ttl_seconds + self.stale_ttl_seconds
         expired_keys = [
             key for key, entry in self.cache.items()
-            if self._is_expired(entry)
+            if time.time() - entry['timestamp'] > max_age
         ]
         for key in expired_keys:
             del self.cache[key]
@@ -66,6 +71,20 @@ class QueryCache:
         self.misses += 1
         return None
     
+    def get_stale(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached result even if its TTL has passed
+        Used as a degraded answer while the LLM backend is unavailable
+        """
+        self._cleanup_expired()
+        
+        entry = self.cache.get(self._generate_key(query))
+        if entry is None:
+            return None
+        
+        self.stale_hits += 1
+        return entry['result']
+    
     def set(self, query: str, result: Dict[str, Any]):
         """Cache query result"""
         key = self._generate_key(query)
@@ -85,6 +104,7 @@ class QueryCache:
         self.cache.clear()
         self.hits = 0
         self.misses = 0
+        self.stale_hits = 0
     
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
@@ -96,6 +116,7 @@ class QueryCache:
             'max_size': self.max_size,
             'hits': self.hits,
             'misses': self.misses,
+            'stale_hits': self.stale_hits,
             'total_requests': total_requests,
             'hit_rate': round(hit_rate, 2),
             'ttl_seconds': self.ttl_seconds
@@ -117,6 +138,15 @@ class QueryCache:
             del self.cache[key]
         
         return len(keys_to_delete)
+    
+    def invalidate_all(self) -> int:
+        """
+        Drop every cached result but keep hit/miss statistics
+        Used when the database schema changes
+        """
+        count = len(self.cache)
+        self.cache.clear()
+        return count
 
 
 # Global cache instance
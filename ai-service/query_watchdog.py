@@ -0,0 +1,147 @@
+"""
+Query Execution Limits
+Server-side time limit on every generated query, with KILL QUERY as a backstop
+"""
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import pymysql
+import sqlparse
+from sqlparse.tokens import DML
+
+from config import Config
+from deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+
+class QueryWatchdog:
+    """
+    Two layers against runaway SELECTs:
+
+    1. limit(): a MAX_EXECUTION_TIME optimizer hint, so MySQL aborts the
+       statement itself (error 3024) once the budget is spent.
+    2. watch(): a timer that fires QUERY_KILL_GRACE seconds after that budget and
+       runs KILL QUERY on a separate connection, for anything the hint does
+       not stop (error 1317 on the victim).
+
+    Example:
+        >>> limit_ms = query_watchdog.limit_ms(deadline)
+        >>> sql = query_watchdog.limit(sql, limit_ms)
+        >>> with query_watchdog.watch(connection_id, limit_ms):
+        ...     cursor.execute(sql)
+    """
+
+    TIMEOUT_ERRORS = {
+        3024: "timeout",   # ER_QUERY_TIMEOUT: maximum statement execution time exceeded
+        1317: "killed",    # ER_QUERY_INTERRUPTED: KILL QUERY from the watchdog
+    }
+
+    def __init__(self, max_execution_ms: int = Config.QUERY_MAX_EXECUTION_MS,
+                 kill_grace: float = Config.QUERY_KILL_GRACE):
+        self.max_execution_ms = max_execution_ms
+        self.kill_grace = kill_grace
+        self._lock = threading.Lock()
+        self.cancellations = {kind: 0 for kind in self.TIMEOUT_ERRORS.values()}
+        self.kills_sent = 0
+        self.kill_failures = 0
+        self.last_cancelled = None
+
+    def limit_ms(self, deadline: Optional[Deadline] = None) -> int:
+        """Execution budget: QUERY_MAX_EXECUTION_MS, cut to what is left of the request deadline"""
+        limit = self.max_execution_ms
+        if deadline is not None:
+            limit = min(limit, int(deadline.remaining() * 1000))
+        return max(1, limit)
+
+    @staticmethod
+    def limit(sql: str, limit_ms: int) -> str:
+        """
+        Add the MAX_EXECUTION_TIME hint to a validated query. The hint belongs to
+        the top-level SELECT: for WITH queries the one after the CTE list
+        (the CTE bodies are grouped inside their parentheses by sqlparse).
+        """
+        stmt = sqlparse.parse(sql)[0]
+        for token in stmt.tokens:
+            if token.ttype is DML and token.normalized == 'SELECT':
+                token.value = f"{token.value} /*+ MAX_EXECUTION_TIME({limit_ms}) */"
+                return str(stmt)
+        return sql
+
+    def watch(self, connection_id: int, limit_ms: int, connect: Optional[Callable[[], Any]] = None) -> "_Watch":
+        """
+        Context manager arming KILL QUERY for one statement.
+        connect: factory for the connection the KILL is sent on (defaults to the primary DB).
+        """
+        return _Watch(self, connection_id, limit_ms / 1000 + self.kill_grace, connect or self._connect)
+
+    @staticmethod
+    def _connect():
+        # Not from the pool: a pool exhausted by slow queries must not block the kill
+        return pymysql.connect(
+            host=Config.DB_HOST,
+            port=Config.DB_PORT,
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            database=Config.DB_NAME,
+            connect_timeout=Config.DB_CONNECT_TIMEOUT
+        )
+
+    def _kill(self, connection_id: int, connect: Callable[[], Any]):
+        logger.warning(f"Query on connection {connection_id} outlived its limit - sending KILL QUERY")
+        try:
+            conn = connect()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"KILL QUERY {int(connection_id)}")
+            finally:
+                conn.close()
+            with self._lock:
+                self.kills_sent += 1
+        except Exception as e:
+            with self._lock:
+                self.kill_failures += 1
+            logger.error(f"KILL QUERY {connection_id} failed: {e}")
+
+    def cancellation_kind(self, error: Exception) -> Optional[str]:
+        """'timeout' / 'killed' if a DB error means the query was stopped for running too long"""
+        code = error.args[0] if getattr(error, "args", None) else None
+        return self.TIMEOUT_ERRORS.get(code)
+
+    def record_cancellation(self, kind: str, sql: str, limit_ms: int):
+        with self._lock:
+            self.cancellations[kind] += 1
+            self.last_cancelled = {'kind': kind, 'sql': sql[:500], 'limit_ms': limit_ms, 'at': time.time()}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'max_execution_ms': self.max_execution_ms,
+                'kill_grace_seconds': self.kill_grace,
+                'cancellations': dict(self.cancellations),
+                'kills_sent': self.kills_sent,
+                'kill_failures': self.kill_failures,
+                'last_cancelled': self.last_cancelled
+            }
+
+
+class _Watch:
+    """Armed KILL QUERY timer for one statement; disarmed on exit"""
+
+    def __init__(self, watchdog: QueryWatchdog, connection_id: int, delay: float, connect: Callable[[], Any]):
+        self._timer = threading.Timer(delay, watchdog._kill, args=(connection_id, connect))
+        self._timer.daemon = True
+
+    def __enter__(self):
+        self._timer.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._timer.cancel()
+        return False
+
+
+# Global watchdog for generated queries
+query_watchdog = QueryWatchdog()
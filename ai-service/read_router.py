@@ -0,0 +1,208 @@
+"""
+Read-Replica Routing
+Sends generated queries to read replicas and falls back to the primary while they lag
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import pymysql
+
+from config import Config
+from db_pool import InstrumentedPool
+
+logger = logging.getLogger(__name__)
+
+
+class ReadTarget:
+    """
+    One MySQL server generated queries can run on, with its own connection pool.
+    connect() opens an unpooled connection to the same server (used for KILL QUERY).
+    """
+
+    def __init__(self, name: str, host: str, port: int, user: str, password: str, pool: Any):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.pool = pool
+        # Replication state, refreshed by ReadRouter
+        self.lag: Optional[float] = None
+        self.healthy = True
+        self.last_error: Optional[str] = None
+        self.reads = 0
+
+    def connection(self):
+        return self.pool.connection() if self.pool else None
+
+    def connect(self):
+        return pymysql.connect(
+            host=self.host,
+            port=self.port,
+            user=self.user,
+            password=self.password,
+            database=Config.DB_NAME,
+            connect_timeout=Config.DB_CONNECT_TIMEOUT
+        )
+
+
+class ReadRouter:
+    """
+    Round-robin over the replicas in DB_READ_HOSTS whose replication lag is at
+    most REPLICA_MAX_LAG seconds; the primary serves reads when none qualifies
+    (or when no replica is configured).
+
+    Lag (Seconds_Behind_Source) is re-read every REPLICA_LAG_CHECK_INTERVAL
+    seconds by a background thread (start()), so an unreachable replica never
+    stalls a request. Replicas join the rotation after their first successful
+    check. Needs REPLICATION CLIENT.
+    """
+
+    def __init__(self, primary: ReadTarget, replicas: List[ReadTarget],
+                 max_lag: float = Config.REPLICA_MAX_LAG,
+                 check_interval: float = Config.REPLICA_LAG_CHECK_INTERVAL):
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._cycle = itertools.cycle(replicas) if replicas else None
+        self._lock = threading.Lock()
+        self._thread = None
+        self.last_check = 0.0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_config(cls, primary_pool: Any) -> "ReadRouter":
+        """Primary = the existing pipeline pool; replicas from DB_READ_HOSTS with the read credentials"""
+        primary = ReadTarget(
+            "primary", Config.DB_HOST, Config.DB_PORT, Config.DB_USER, Config.DB_PASSWORD, pool=primary_pool
+        )
+        replicas = []
+        for entry in filter(None, (h.strip() for h in Config.DB_READ_HOSTS.split(","))):
+            host, _, port = entry.partition(":")
+            port = int(port or Config.DB_PORT)
+            # Pools are built by the first lag check, off the request path
+            replica = ReadTarget(entry, host, port, Config.DB_READ_USER, Config.DB_READ_PASSWORD, pool=None)
+            replica.healthy, replica.last_error = False, "not checked yet"
+            replicas.append(replica)
+        if replicas:
+            logger.info(f"✅ Read replicas: {', '.join(r.name for r in replicas)}")
+        return cls(primary, replicas)
+
+    @staticmethod
+    def _replica_pool(name: str, host: str, port: int) -> Any:
+        """Replica pool, sized independently of the primary's"""
+        try:
+            return InstrumentedPool(
+                name,
+                max_connections=Config.DB_READ_POOL_MAX,
+                min_cached=Config.DB_READ_POOL_MIN,
+                host=host,
+                port=port,
+                user=Config.DB_READ_USER,
+                password=Config.DB_READ_PASSWORD,
+                database=Config.DB_NAME,
+                connect_timeout=Config.DB_CONNECT_TIMEOUT
+            )
+        except Exception as e:
+            # Stays out of rotation: the lag check fails on a missing pool
+            logger.error(f"❌ Read pool {name} error: {e}")
+            return None
+
+    def start(self):
+        """Check replica lag now and then every check_interval seconds in the background"""
+        if self._thread or not self.replicas:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.check_lag()
+                except Exception as e:
+                    logger.error(f"Replica lag check failed: {e}")
+                time.sleep(self.check_interval)
+
+        self._thread = threading.Thread(target=loop, name="replica-lag", daemon=True)
+        self._thread.start()
+
+    def route(self) -> ReadTarget:
+        """Target for the next generated query"""
+        with self._lock:
+            if not self.replicas:
+                self.primary.reads += 1
+                return self.primary
+            for _ in range(len(self.replicas)):
+                replica = next(self._cycle)
+                if replica.healthy:
+                    replica.reads += 1
+                    return replica
+            self.fallbacks += 1
+            self.primary.reads += 1
+        return self.primary
+
+    def check_lag(self):
+        for replica in self.replicas:
+            self._check(replica)
+        self.last_check = time.time()
+
+    def _check(self, replica: ReadTarget):
+        was_healthy, previous_error = replica.healthy, replica.last_error
+        if replica.pool is None:
+            # First check, or the replica was down when the pool was last built
+            replica.pool = self._replica_pool(replica.name, replica.host, replica.port)
+        try:
+            status = self._replica_status(replica)
+            lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master')) if status else None
+            replica.lag = float(lag) if lag is not None else None
+            if status is None:
+                replica.healthy, replica.last_error = False, "not a replica (empty replica status)"
+            elif lag is None:
+                # NULL: the replication SQL thread is not running
+                replica.healthy, replica.last_error = False, "replication stopped"
+            else:
+                replica.healthy = replica.lag <= self.max_lag
+                replica.last_error = None if replica.healthy else f"lag {replica.lag:.0f}s > {self.max_lag:.0f}s"
+        except Exception as e:
+            replica.healthy, replica.lag, replica.last_error = False, None, str(e)
+
+        if not replica.healthy and (was_healthy or previous_error == "not checked yet"):
+            logger.warning(f"Replica {replica.name} out of rotation: {replica.last_error}")
+        elif replica.healthy and not was_healthy:
+            logger.info(f"Replica {replica.name} in rotation (lag {replica.lag:.0f}s)")
+
+    @staticmethod
+    def _replica_status(replica: ReadTarget) -> Optional[Dict[str, Any]]:
+        conn = replica.connection()
+        if conn is None:
+            raise ConnectionError("pool unavailable")
+        try:
+            with conn.cursor() as cursor:
+                try:
+                    cursor.execute("SHOW REPLICA STATUS")
+                except pymysql.err.ProgrammingError:
+                    # MySQL < 8.0.22 / MariaDB
+                    cursor.execute("SHOW SLAVE STATUS")
+                return cursor.fetchone()
+        finally:
+            conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'replicas': {
+                r.name: {
+                    'healthy': r.healthy,
+                    'lag_seconds': r.lag,
+                    'reads': r.reads,
+                    'last_error': r.last_error,
+                    'pool': r.pool.get_stats() if r.pool else None
+                }
+                for r in self.replicas
+            },
+            'primary_reads': self.primary.reads,
+            'fallbacks': self.fallbacks,
+            'seconds_since_check': round(time.time() - self.last_check) if self.last_check else None,
+            'max_lag_seconds': self.max_lag
+        }
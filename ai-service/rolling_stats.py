@@ -0,0 +1,61 @@
+"""
+Rolling Statistics
+Fixed-size sample windows for latency percentiles
+"""
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+class RollingWindow:
+    """
+    Thread-safe window over the last N samples.
+
+    Example:
+        >>> window = RollingWindow(maxlen=100)
+        >>> for value in (1.0, 2.0, 3.0, 4.0):
+        ...     window.add(value)
+        >>> window.percentile(50)
+        2.5
+    """
+
+    def __init__(self, maxlen: int = 200):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, value: float):
+        with self._lock:
+            self._samples.append(value)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Linear-interpolated percentile (0-100), None while the window is empty"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+
+        rank = (len(samples) - 1) * p / 100
+        low = int(rank)
+        high = min(low + 1, len(samples) - 1)
+        return samples[low] + (samples[high] - samples[low]) * (rank - low)
+
+    def mean(self) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples)
+        return sum(samples) / len(samples) if samples else None
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, mean and common percentiles rounded for JSON output"""
+        def rounded(value):
+            return round(value, 3) if value is not None else None
+
+        return {
+            'count': len(self),
+            'mean': rounded(self.mean()),
+            'p50': rounded(self.percentile(50)),
+            'p90': rounded(self.percentile(90)),
+            'p99': rounded(self.percentile(99))
+        }
@@ -0,0 +1,167 @@
+"""
+Versioned Schema Cache
+Keeps the database schema used in prompts in sync with migrations
+"""
+import logging
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaSnapshot:
+    """
+    Immutable view of INFORMATION_SCHEMA.COLUMNS at one fingerprint.
+    Readers keep using the snapshot they got even if a rebuild happens meanwhile.
+    """
+
+    def __init__(self, tables: Dict[str, List[Tuple[str, str]]], fingerprint: str, version: int,
+                 enums: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        self.tables = tables
+        # table -> column -> allowed values, for ENUM columns
+        self.enums = enums or {}
+        self.fingerprint = fingerprint
+        self.version = version
+        self.loaded_at = time.time()
+        self.text = "\n".join(
+            f"Table '{table}': {', '.join(f'{name} ({data_type})' for name, data_type in columns)}"
+            for table, columns in tables.items()
+        )
+
+    def columns(self, table: str) -> List[str]:
+        """Column names of a table (empty list for unknown tables)"""
+        return [name for name, _ in self.tables.get(table, [])]
+
+    def enum_values(self, table: str, column: str) -> List[str]:
+        """Allowed values of an ENUM column (empty list otherwise)"""
+        return self.enums.get(table, {}).get(column, [])
+
+
+class SchemaCache:
+    """
+    Schema cache with change detection.
+    A cheap fingerprint query runs at most once per check interval; the full
+    column list is only re-read when the fingerprint changes.
+    """
+
+    FINGERPRINT_SQL = """
+        SELECT COUNT(*) AS column_count,
+               BIT_XOR(CRC32(CONCAT_WS(':', TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, ORDINAL_POSITION))) AS checksum
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = %s
+    """
+
+    COLUMNS_SQL = """
+        SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, COLUMN_TYPE
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = %s
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """
+
+    def __init__(self, connection_factory: Callable[[], Any], database: str, check_interval: int = 60):
+        self._connection_factory = connection_factory
+        self.database = database
+        self.check_interval = check_interval
+        self._snapshot: Optional[SchemaSnapshot] = None
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._listeners: List[Callable[[SchemaSnapshot], None]] = []
+        self.checks = 0
+        self.rebuilds = 0
+
+    def subscribe(self, callback: Callable[[SchemaSnapshot], None]):
+        """Register a callback invoked with the new snapshot after a schema change"""
+        self._listeners.append(callback)
+
+    def _is_fresh(self) -> bool:
+        return self._snapshot is not None and time.time() - self._last_check < self.check_interval
+
+    def get(self) -> Optional[SchemaSnapshot]:
+        """
+        Get the current schema snapshot, re-checking the fingerprint if the interval elapsed.
+        Returns None if the schema could never be loaded.
+        """
+        if self._is_fresh():
+            return self._snapshot
+
+        with self._lock:
+            # Another thread may have refreshed while we were waiting
+            if not self._is_fresh():
+                self._refresh()
+        return self._snapshot
+
+    def _refresh(self):
+        conn = self._connection_factory()
+        if not conn:
+            return
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(self.FINGERPRINT_SQL, (self.database,))
+                row = cursor.fetchone()
+                fingerprint = f"{row['column_count']}:{row['checksum']}"
+                self.checks += 1
+
+                if self._snapshot and self._snapshot.fingerprint == fingerprint:
+                    self._last_check = time.time()
+                    return
+
+                cursor.execute(self.COLUMNS_SQL, (self.database,))
+                rows = cursor.fetchall()
+        except Exception as e:
+            logger.error(f"Schema refresh failed: {e}")
+            # Keep serving the previous snapshot, try again next interval
+            self._last_check = time.time()
+            return
+        finally:
+            conn.close()
+
+        tables: Dict[str, List[Tuple[str, str]]] = {}
+        enums: Dict[str, Dict[str, List[str]]] = {}
+        for row in rows:
+            tables.setdefault(row['TABLE_NAME'], []).append((row['COLUMN_NAME'], row['DATA_TYPE']))
+            if row['DATA_TYPE'] == 'enum':
+                enums.setdefault(row['TABLE_NAME'], {})[row['COLUMN_NAME']] = self._parse_enum(row['COLUMN_TYPE'])
+
+        previous = self._snapshot
+        version = previous.version + 1 if previous else 1
+        # Swap the whole snapshot at once so readers never see a half-built schema
+        self._snapshot = SchemaSnapshot(tables, fingerprint, version, enums)
+        self._last_check = time.time()
+        self.rebuilds += 1
+
+        if previous is None:
+            logger.info(f"Schema loaded: {len(tables)} tables (fingerprint {fingerprint})")
+            return
+
+        logger.warning(f"Schema changed ({previous.fingerprint} -> {fingerprint}), rebuilt as version {version}")
+        for callback in self._listeners:
+            try:
+                callback(self._snapshot)
+            except Exception as e:
+                logger.error(f"Schema change listener failed: {e}")
+
+    @staticmethod
+    def _parse_enum(column_type: str) -> List[str]:
+        """enum('available','lent') -> ['available', 'lent'] ('' escapes a quote)"""
+        return [value.replace("''", "'") for value in re.findall(r"'((?:[^']|'')*)'", column_type)]
+
+    def invalidate(self):
+        """Force a fingerprint check on the next access"""
+        self._last_check = 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get schema cache statistics"""
+        snapshot = self._snapshot
+        return {
+            'loaded': snapshot is not None,
+            'version': snapshot.version if snapshot else 0,
+            'fingerprint': snapshot.fingerprint if snapshot else None,
+            'tables': len(snapshot.tables) if snapshot else 0,
+            'loaded_at': snapshot.loaded_at if snapshot else None,
+            'checks': self.checks,
+            'rebuilds': self.rebuilds,
+            'check_interval_seconds': self.check_interval
+        }
@@ -0,0 +1,89 @@
+"""
+Executed SQL Log
+Append-only JSONL record of every generated query the service ran, with its timing
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutedSQLLog:
+    """
+    One JSON line per executed query, read offline by index_advisor.py:
+
+        {"ts": 1760000000.1, "sql": "<generated>", "executed": "<statement sent to MySQL>",
+         "ms": 12.4, "rows": 20, "target": "primary", "error": null}
+
+    `executed` is what MySQL actually ran (FULLTEXT rewrite, pushed-down LIMIT,
+    MAX_EXECUTION_TIME hint), so EXPLAIN on it reproduces the plan.
+    The file is rotated to `<path>.1` once it grows past max_bytes.
+
+    Example:
+        >>> log = ExecutedSQLLog(path="/tmp/executed_sql.jsonl")
+        >>> log.record("SELECT ...;", "SELECT ... LIMIT 1001;", 12.4, rows=20, target="primary")
+    """
+
+    def __init__(self, path: str = Config.SQL_LOG_PATH, max_bytes: int = Config.SQL_LOG_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.written = 0
+        self.rotations = 0
+        self.errors = 0
+
+    def record(self, sql: str, executed: str, ms: float, rows: Optional[int] = None,
+               target: Optional[str] = None, error: Optional[str] = None):
+        """Append one execution; a failing write is counted, never raised"""
+        if not Config.SQL_LOG:
+            return
+        line = json.dumps({
+            'ts': round(time.time(), 3),
+            'sql': sql,
+            'executed': executed,
+            'ms': round(ms, 2),
+            'rows': rows,
+            'target': target,
+            'error': error
+        }, ensure_ascii=False)
+
+        with self._lock:
+            try:
+                self._rotate()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                self.written += 1
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Could not write executed SQL log {self.path}: {e}")
+
+    def _rotate(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            return
+        if size >= self.max_bytes:
+            os.replace(self.path, f"{self.path}.1")
+            self.rotations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': Config.SQL_LOG,
+            'path': self.path,
+            'written': self.written,
+            'rotations': self.rotations,
+            'errors': self.errors
+        }
+
+
+# Global log instance
+sql_log = ExecutedSQLLog()
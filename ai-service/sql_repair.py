@@ -0,0 +1,367 @@
+"""
+Deterministic SQL Repair
+Fixes mechanical mistakes in generated SQL locally instead of spending an LLM retry
+"""
+import difflib
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import sqlparse
+from sqlparse import tokens as T
+
+from schema_cache import SchemaSnapshot
+from sql_validator import SQLValidator
+
+logger = logging.getLogger(__name__)
+
+
+class SQLRepairer:
+    """
+    Repairs generated SQL against the cached schema:
+
+    - markdown fences / 'sql' prefixes and a missing or repeated trailing ';'
+    - unknown table names -> closest approved table
+    - unknown columns -> closest column of the tables in the query
+    - qualifiers that are no alias or table -> the alias whose table has the column
+    - ENUM literals ('Available') -> the stored value ('available')
+
+    Identifiers are only rewritten when difflib finds a close match, and string
+    literals are never touched except for ENUM comparisons. Whatever cannot be
+    fixed this way is left for the LLM retry.
+
+    Example:
+        >>> repairer.repair("SELECT itemname FROM view_general_inventory WHERE status = 'Available'", snapshot)
+        ("SELECT item_name FROM view_general_inventory WHERE status = 'available';",
+         ['column itemname -> item_name', "enum status 'Available' -> 'available'", 'terminator'])
+    """
+
+    IDENTIFIER_CUTOFF = 0.8
+    # After MySQL reported the identifier as unknown we can accept a looser match
+    ERROR_CUTOFF = 0.6
+    ENUM_CUTOFF = 0.75
+
+    UNKNOWN_COLUMN = 1054
+    UNKNOWN_TABLE = 1146
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {
+            'checked': 0, 'repaired': 0, 'after_db_error': 0,
+            'markdown': 0, 'terminator': 0, 'table': 0, 'column': 0, 'alias': 0, 'enum': 0
+        }
+
+    def repair(self, sql: str, snapshot: Optional[SchemaSnapshot], unknown: Optional[str] = None) -> Tuple[str, List[str]]:
+        """
+        Return (sql, fixes). `unknown` is an identifier MySQL rejected;
+        it is matched with a looser cutoff.
+        """
+        fixes: List[str] = []
+        sql = self._strip_markdown(sql, fixes)
+        if snapshot and sql:
+            sql = self._repair_identifiers(sql, snapshot, unknown, fixes)
+        sql = self._terminate(sql, fixes)
+
+        self._record(fixes)
+        if fixes:
+            logger.info(f"SQL repaired locally: {', '.join(fixes)}")
+        return sql, fixes
+
+    def repair_after_error(self, sql: str, error: Exception, snapshot: Optional[SchemaSnapshot]) -> Optional[str]:
+        """
+        Try to fix SQL that MySQL rejected with 1054 (unknown column) or
+        1146 (unknown table). Returns the repaired SQL, or None if nothing changed.
+        """
+        code = error.args[0] if error.args else None
+        message = str(error.args[1]) if len(error.args) > 1 else str(error)
+        if code not in (self.UNKNOWN_COLUMN, self.UNKNOWN_TABLE) or not snapshot:
+            return None
+
+        match = re.search(r"(?:column|Table) '([^']+)'", message)
+        unknown = match.group(1) if match else None
+        if unknown and code == self.UNKNOWN_TABLE:
+            # 'db.table' -> 'table'
+            unknown = unknown.split(".")[-1]
+        elif unknown:
+            # 'v.itemname' -> 'itemname'
+            unknown = unknown.split(".")[-1]
+
+        repaired, fixes = self.repair(sql, snapshot, unknown)
+        if not fixes or repaired == sql:
+            return None
+        with self._lock:
+            self.stats['after_db_error'] += 1
+        return repaired
+
+    # --- Text cleanup ---
+
+    @staticmethod
+    def _strip_markdown(sql: str, fixes: List[str]) -> str:
+        cleaned = re.sub(r"```(?:sql|mysql)?", "", sql, flags=re.IGNORECASE).strip()
+        cleaned = re.sub(r"^(?:sql|mysql)\s*:?\s*\n", "", cleaned, flags=re.IGNORECASE)
+        if cleaned != sql.strip():
+            fixes.append("markdown")
+        return cleaned
+
+    @staticmethod
+    def _terminate(sql: str, fixes: List[str]) -> str:
+        stripped = sql.rstrip()
+        body = stripped.rstrip(";").rstrip()
+        if not body:
+            return sql
+        if stripped != body + ";":
+            fixes.append("terminator")
+        return body + ";"
+
+    # --- Identifiers ---
+
+    def _repair_identifiers(self, sql: str, snapshot: SchemaSnapshot, unknown: Optional[str], fixes: List[str]) -> str:
+        statements = sqlparse.parse(sql)
+        if len(statements) != 1:
+            return sql
+        tokens = list(statements[0].flatten())
+        significant = [i for i, tok in enumerate(tokens) if not tok.is_whitespace and tok.ttype not in T.Comment]
+
+        def sig(pos):
+            return tokens[significant[pos]] if 0 <= pos < len(significant) else None
+
+        tables_by_lower = {t.lower(): t for t in snapshot.tables}
+        approved = [t for t in snapshot.tables if t.lower() in {a.lower() for a in SQLValidator.APPROVED_TABLES}]
+
+        # Pass 1: tables, table aliases and select aliases
+        table_positions = {}      # significant index -> table name as written
+        aliases: Dict[str, str] = {}   # alias (lower) -> table name (lower, as written)
+        defined_names = set()     # select aliases ('AS total')
+        for pos in range(len(significant)):
+            tok = sig(pos)
+            if tok.ttype in T.Keyword and (tok.normalized == "FROM" or tok.normalized.endswith("JOIN")):
+                nxt = pos + 1
+                while (sig(nxt) is not None and self._is_name(sig(nxt))
+                       and (sig(nxt + 1) is None or sig(nxt + 1).value != ".")):
+                    table_positions[nxt] = self._bare(sig(nxt).value)
+                    alias_pos = nxt + 1
+                    if sig(alias_pos) is not None and sig(alias_pos).normalized == "AS":
+                        alias_pos += 1
+                    alias = sig(alias_pos)
+                    if alias is not None and self._is_name(alias):
+                        aliases[self._bare(alias.value).lower()] = self._bare(sig(nxt).value).lower()
+                        after = alias_pos + 1
+                    else:
+                        after = nxt + 1
+                    # FROM a, b
+                    if sig(after) is not None and sig(after).value == ",":
+                        nxt = after + 1
+                        continue
+                    break
+
+        for pos in range(len(significant)):
+            if pos not in table_positions and self._is_alias_definition(pos, sig):
+                defined_names.add(self._bare(sig(pos).value).lower())
+
+        # Fix table names first: column checks depend on them
+        for pos, name in table_positions.items():
+            if name.lower() in tables_by_lower:
+                continue
+            cutoff = self.ERROR_CUTOFF if unknown and unknown.lower() == name.lower() else self.IDENTIFIER_CUTOFF
+            match = self._closest(name, approved or list(snapshot.tables), cutoff)
+            if match:
+                fixes.append(f"table {name} -> {match}")
+                self._replace(tokens, significant[pos], match)
+                for alias, table in list(aliases.items()):
+                    if table == name.lower():
+                        aliases[alias] = match.lower()
+                table_positions[pos] = match
+
+        referenced = [tables_by_lower[t.lower()] for t in table_positions.values() if t.lower() in tables_by_lower]
+        if not referenced:
+            return "".join(tok.value for tok in tokens)
+
+        columns_of = {t.lower(): snapshot.columns(t) for t in referenced}
+        all_columns = sorted({c for cols in columns_of.values() for c in cols})
+        known = {c.lower() for c in all_columns} | set(aliases) | set(columns_of) | defined_names
+        renamed = self._resolve_qualifiers(sig, len(significant), aliases, columns_of, fixes)
+
+        # Pass 2: columns and qualifiers
+        for pos in range(len(significant)):
+            tok = sig(pos)
+            if pos in table_positions or not self._is_name(tok):
+                continue
+            nxt, prev = sig(pos + 1), sig(pos - 1)
+            if nxt is not None and nxt.value == "(":
+                continue  # function call
+            if self._is_alias_definition(pos, sig):
+                continue
+
+            name = self._bare(tok.value)
+            cutoff = self.ERROR_CUTOFF if unknown and unknown.lower() == name.lower() else self.IDENTIFIER_CUTOFF
+
+            if nxt is not None and nxt.value == ".":
+                # Qualifier: must be an alias or a referenced table
+                if name.lower() in aliases or name.lower() in columns_of:
+                    continue
+                if name.lower() in renamed:
+                    self._replace(tokens, significant[pos], renamed[name.lower()])
+                continue
+
+            if prev is not None and prev.value == ".":
+                qualifier = self._bare(sig(pos - 2).value).lower()
+                table = aliases.get(qualifier, qualifier)
+                candidates = columns_of.get(table, all_columns)
+                if name.lower() in {c.lower() for c in candidates}:
+                    continue
+            else:
+                candidates = all_columns
+                if name.lower() in known:
+                    continue
+
+            match = self._closest(name, candidates, cutoff)
+            if match:
+                fixes.append(f"column {name} -> {match}")
+                self._replace(tokens, significant[pos], match)
+
+        self._repair_enums(tokens, significant, sig, referenced, aliases, snapshot, fixes)
+        return "".join(tok.value for tok in tokens)
+
+    def _resolve_qualifiers(self, sig, count, aliases, columns_of, fixes) -> Dict[str, str]:
+        """
+        Map each qualifier that is neither an alias nor a referenced table to
+        the only table having all columns used with it, else the closest alias ('vv' -> 'v')
+        """
+        used: Dict[str, set] = {}
+        for pos in range(count):
+            tok, nxt, column = sig(pos), sig(pos + 1), sig(pos + 2)
+            if not self._is_name(tok) or nxt is None or nxt.value != "." or column is None:
+                continue
+            name = self._bare(tok.value).lower()
+            if name not in aliases and name not in columns_of:
+                used.setdefault(name, set()).add(self._bare(column.value).lower())
+
+        # Each table is referred to by its alias, or by name when it has none
+        qualifier_of = {table: table for table in columns_of}
+        for alias, table in aliases.items():
+            qualifier_of[table] = alias
+
+        renamed = {}
+        for name, columns in used.items():
+            owners = [
+                qualifier_of[table] for table, cols in columns_of.items()
+                if columns <= {c.lower() for c in cols}
+            ]
+            owner = owners[0] if len(owners) == 1 else self._closest(name, list(qualifier_of.values()), self.IDENTIFIER_CUTOFF)
+            if owner:
+                fixes.append(f"alias {name} -> {owner}")
+                renamed[name] = owner
+        return renamed
+
+    # --- ENUM literals ---
+
+    def _repair_enums(self, tokens, significant, sig, referenced, aliases, snapshot, fixes):
+        for pos in range(len(significant)):
+            tok = sig(pos)
+            # Columns like 'location' are lexed as keywords, so accept both
+            if tok.ttype not in T.Name and tok.ttype not in T.Keyword:
+                continue
+            if sig(pos + 1) is not None and sig(pos + 1).value == ".":
+                continue
+
+            column = self._bare(tok.value)
+            qualifier = None
+            if sig(pos - 1) is not None and sig(pos - 1).value == ".":
+                qualifier = self._bare(sig(pos - 2).value).lower()
+
+            values = self._enum_values(column, qualifier, referenced, aliases, snapshot)
+            if not values:
+                continue
+
+            op = sig(pos + 1)
+            if op is None:
+                continue
+            if op.ttype in T.Operator.Comparison and op.value in ("=", "!=", "<>"):
+                literal_positions = [pos + 2]
+            elif op.normalized in ("IN", "NOT IN") and sig(pos + 2) is not None and sig(pos + 2).value == "(":
+                literal_positions = []
+                cursor = pos + 3
+                while sig(cursor) is not None and sig(cursor).value != ")":
+                    if sig(cursor).ttype in T.String.Single:
+                        literal_positions.append(cursor)
+                    cursor += 1
+            else:
+                continue
+
+            for lit_pos in literal_positions:
+                literal = sig(lit_pos)
+                if literal is None or literal.ttype not in T.String.Single:
+                    continue
+                value = literal.value[1:-1]
+                if value in values:
+                    continue
+                match = self._closest(value, values, self.ENUM_CUTOFF)
+                if match:
+                    fixes.append(f"enum {column} '{value}' -> '{match}'")
+                    self._replace(tokens, significant[lit_pos], "'" + match.replace("'", "''") + "'")
+
+    @staticmethod
+    def _enum_values(column, qualifier, referenced, aliases, snapshot) -> List[str]:
+        tables = referenced
+        if qualifier:
+            target = aliases.get(qualifier, qualifier)
+            tables = [t for t in referenced if t.lower() == target]
+        for table in tables:
+            for name in snapshot.enums.get(table, {}):
+                if name.lower() == column.lower():
+                    return snapshot.enums[table][name]
+        return []
+
+    # --- Helpers ---
+
+    @staticmethod
+    def _is_alias_definition(pos, sig) -> bool:
+        """'x AS name', 'COUNT(*) name', 'item_name name' or 'items i'"""
+        tok, prev = sig(pos), sig(pos - 1)
+        if not SQLRepairer._is_name(tok) or prev is None:
+            return False
+        if sig(pos + 1) is not None and sig(pos + 1).value in (".", "("):
+            return False
+        # Two names in a row: the second one names the first
+        return prev.normalized == "AS" or prev.value == ")" or SQLRepairer._is_name(prev)
+
+    @staticmethod
+    def _is_name(tok) -> bool:
+        # Builtins (INTERVAL, DATE, ...) are lexed as Name.Builtin
+        return tok.ttype in T.Name and tok.ttype not in T.Name.Builtin
+
+    @staticmethod
+    def _bare(name: str) -> str:
+        return name.strip("`")
+
+    @staticmethod
+    def _replace(tokens, index, value):
+        # Keep backticks if the model used them
+        old = tokens[index].value
+        tokens[index].value = f"`{value}`" if old.startswith("`") and not value.startswith("'") else value
+
+    @staticmethod
+    def _closest(name: str, candidates: List[str], cutoff: float) -> Optional[str]:
+        """Case-insensitive closest match, None when nothing is close enough"""
+        by_lower = {c.lower(): c for c in candidates}
+        if name.lower() in by_lower:
+            return by_lower[name.lower()]
+        matches = difflib.get_close_matches(name.lower(), list(by_lower), n=1, cutoff=cutoff)
+        return by_lower[matches[0]] if matches else None
+
+    def _record(self, fixes: List[str]):
+        with self._lock:
+            self.stats['checked'] += 1
+            if fixes:
+                self.stats['repaired'] += 1
+            for fix in fixes:
+                self.stats[fix.split(" ")[0]] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.stats)
+
+
+# Global repairer
+repairer = SQLRepairer()
@@ -0,0 +1,70 @@
+"""
+Incremental SQL Detection for Streamed Model Output
+Lets the pipeline stop generation as soon as one complete statement has arrived
+"""
+import re
+
+# Statement start: SELECT anywhere, or a CTE header (plain "with" also appears in prose)
+STATEMENT_START = re.compile(r'\bSELECT\s|\bWITH\s+\w+\s+AS\b', re.IGNORECASE)
+
+
+class SQLStreamScanner:
+    """
+    Feed streamed text chunks; reports completion once a SELECT/WITH statement
+    is terminated by a ';' outside of quotes and backticks.
+
+    Example:
+        >>> scanner = SQLStreamScanner()
+        >>> scanner.feed("Here it is: SELECT * FROM items WHERE name = 'a;b'")
+        False
+        >>> scanner.feed(";\\nThis query lists...")
+        True
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.complete = False
+        self._start = None
+        self._pos = 0
+        self._quote = None
+        self._escaped = False
+
+    def feed(self, chunk: str) -> bool:
+        """Append a chunk and return True when a full statement has been seen"""
+        if self.complete or not chunk:
+            return self.complete
+
+        self.buffer += chunk
+
+        if self._start is None:
+            match = STATEMENT_START.search(self.buffer)
+            if not match:
+                return False
+            self._start = match.start()
+            self._pos = match.start()
+
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
+            self._pos += 1
+
+            if self._quote:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == self._quote:
+                    self._quote = None
+            elif char in ("'", '"', '`'):
+                self._quote = char
+            elif char == ';':
+                self.complete = True
+                break
+
+        return self.complete
+
+    @property
+    def statement(self) -> str:
+        """The statement seen so far (complete or not)"""
+        if self._start is None:
+            return ""
+        return self.buffer[self._start:self._pos]
@@ -2,10 +2,11 @@
 SQL Validator with AST Parsing
 Prevents SQL injection by validating query structure at token level.
 """
+import re
 import sqlparse
 from sqlparse.sql import Token, TokenList, Identifier, Where, Parenthesis
 from sqlparse.tokens import Keyword, DML, DDL
-from typing import Tuple, Set, List
+from typing import Tuple, Set, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,6 +38,9 @@ class SQLValidator:
         'EVENT', 'VIEW', 'INDEX'
     ])
     
+    # Row-count forms of LIMIT: 'LIMIT n', 'LIMIT offset, n', 'LIMIT n OFFSET offset'
+    LIMIT_CLAUSE = re.compile(r'^LIMIT\s+(\d+)(?:\s*,\s*(\d+)|\s+OFFSET\s+(\d+))?\s*;?$', re.IGNORECASE)
+    
     @classmethod
     def validate(cls, sql: str) -> Tuple[bool, str]:
         """
@@ -115,8 +119,57 @@ class SQLValidator:
         if len(sql) > 5000:
             return False, "Query exceeds maximum length (5000 chars)"
         
+        # 11. LIMIT must be a plain row count so it can be clamped before execution
+        try:
+            cls._limit_bounds(stmt)
+        except ValueError as e:
+            return False, str(e)
+        
         return True, "OK"
     
+    @classmethod
+    def enforce_limit(cls, sql: str, max_rows: int, offset: int = 0) -> str:
+        """
+        Rewrite the top-level LIMIT of a validated query so MySQL returns at most
+        max_rows rows, starting `offset` rows into the result of the original query.
+        A missing LIMIT is added, a larger one is clamped and the query's own
+        offset/row count are kept.
+        
+        Example:
+            >>> SQLValidator.enforce_limit("SELECT * FROM users;", 1001)
+            'SELECT * FROM users LIMIT 1001;'
+            
+            >>> SQLValidator.enforce_limit("SELECT * FROM users LIMIT 20;", 10, offset=15)
+            'SELECT * FROM users LIMIT 15, 5;'
+        """
+        stmt = sqlparse.parse(sql)[0]
+        limit_at, skip, count = cls._limit_bounds(stmt)
+        
+        head = stmt.tokens[:limit_at] if limit_at is not None else stmt.tokens
+        head_sql = ''.join(str(token) for token in head).strip().rstrip(';').rstrip()
+        
+        skip += offset
+        rows = max_rows if count is None else max(0, min(max_rows, count - offset))
+        return f"{head_sql} LIMIT {skip}, {rows};" if skip else f"{head_sql} LIMIT {rows};"
+    
+    @classmethod
+    def _limit_bounds(cls, stmt) -> Tuple[Optional[int], int, Optional[int]]:
+        """
+        Top-level LIMIT of a statement as (token index, offset, row count);
+        (None, 0, None) when there is no LIMIT.
+        Raises ValueError for anything but integer forms.
+        """
+        for index, token in enumerate(stmt.tokens):
+            if token.ttype is Keyword and token.value.upper() == 'LIMIT':
+                clause = ''.join(str(t) for t in stmt.tokens[index:]).strip()
+                match = cls.LIMIT_CLAUSE.match(clause)
+                if not match:
+                    raise ValueError(f"Unsupported LIMIT clause: {clause[:50]}")
+                if match.group(2) is not None:
+                    return index, int(match.group(1)), int(match.group(2))
+                return index, int(match.group(3) or 0), int(match.group(1))
+        return None, 0, None
+    
     @classmethod
     def _extract_tables(cls, stmt) -> Set[str]:
         """
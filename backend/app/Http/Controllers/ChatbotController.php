@@ -47,9 +47,14 @@ class ChatbotController extends Controller
         try {
             $startTime = microtime(true);
             
-            $response = Http::timeout(60)->post("$aiServiceUrl/ask", [
-                'query' => $query
-            ]);
+            $timeout = 60;
+
+            // AI servisine bekleme süremizi bildiriyoruz; bütçe bitince retry'ları keser
+            $response = Http::timeout($timeout)
+                ->withHeaders(['X-Request-Timeout-Ms' => ($timeout - 1) * 1000])
+                ->post("$aiServiceUrl/ask", [
+                    'query' => $query
+                ]);
 
             $duration = round((microtime(true) - $startTime) * 1000, 2); // ms
 
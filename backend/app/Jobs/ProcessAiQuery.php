@@ -71,8 +71,10 @@ class ProcessAiQuery implements ShouldQueue
             // Call AI service
             $response = Http::timeout(60)
                 ->retry(2, 100)  // 2 retries with 100ms delay
+                ->withHeaders(['X-Request-Timeout-Ms' => 59000])  // AI service stops retrying before our timeout
                 ->post("{$aiServiceUrl}/ask", [
-                    'query' => $this->query
+                    'query' => $this->query,
+                    'priority' => 'batch'  // queued jobs yield to interactive chat
                 ]);
 
             $duration = round((microtime(true) - $startTime) * 1000, 2);
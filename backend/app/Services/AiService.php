@@ -24,9 +24,14 @@ class AiService
     public function query(string $query): array
     {
         try {
-            $response = Http::timeout(30)->post("{$this->baseUrl}/ask", [
-                'query' => $query,
-            ]);
+            $timeout = 30;
+
+            // Tell the AI service how long we will wait so it stops retrying in time
+            $response = Http::timeout($timeout)
+                ->withHeaders(['X-Request-Timeout-Ms' => ($timeout - 1) * 1000])
+                ->post("{$this->baseUrl}/ask", [
+                    'query' => $query,
+                ]);
 
             if ($response->successful()) {
                 return $response->json();
@@ -18,6 +18,11 @@ GRANT SELECT ON ctis_sims.item_categories TO 'ai_readonly'@'%';
 GRANT SELECT ON ctis_sims.transactions TO 'ai_readonly'@'%';
 GRANT SELECT ON ctis_sims.vendors TO 'ai_readonly'@'%';
 
+-- 2b. Replica lag checks (SHOW REPLICA STATUS) when DB_READ_HOSTS is used.
+-- REPLICATION CLIENT is a global privilege: it exposes replication status only, no data.
+-- Run this on the primary so the user and grant replicate to every read replica.
+GRANT REPLICATION CLIENT ON *.* TO 'ai_readonly'@'%';
+
 -- 3. Explicitly DENY any write operations
 REVOKE INSERT, UPDATE, DELETE, DROP, ALTER, CREATE ON ctis_sims.* FROM 'ai_readonly'@'%';
 
@@ -60,6 +65,11 @@ SHOW GRANTS FOR 'ai_readonly'@'%';
 --     - DB_USER=ai_readonly
 --     - DB_PASSWORD=AI_RO_P@ssw0rd_CHANGE_ME  # CHANGE THIS!
 --     - DB_NAME=ctis_sims
+--     # Optional: run AI queries on read replicas (lagging replicas fall back to DB_HOST)
+--     - DB_READ_HOSTS=db-replica-1,db-replica-2:3307
+--     - DB_READ_USER=ai_readonly
+--     - DB_READ_PASSWORD=AI_RO_P@ssw0rd_CHANGE_ME
+--     - REPLICA_MAX_LAG=10
 
 -- IMPORTANT: Generate a strong password using:
 -- openssl rand -base64 32
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+CTIS-SIMS FULLTEXT Benchmark
+Compares LIKE '%term%' with MATCH ... AGAINST on 10k / 100k / 1M row tables
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import pymysql
+
+TABLE = "bench_fulltext_items"
+SIZES = [10_000, 100_000, 1_000_000]
+BATCH = 5_000
+
+BRANDS = ["Dell", "HP", "Lenovo", "Apple", "Asus", "Acer", "Samsung", "Epson", "Canon", "Cisco", "Logitech"]
+KINDS = ["Latitude", "ThinkPad", "MacBook", "ProBook", "Monitor", "Printer", "Projector", "Switch",
+         "Keyboard", "Mouse", "Tablet", "Scanner", "Router", "Webcam", "Docking"]
+WORDS = ["Pro", "Air", "Ultra", "Plus", "Mini", "Slim", "Wireless", "Gaming", "Office", "Station",
+         "Laboratuvar", "Ofis", "Kablosuz", "Yazici", "Dizustu"]
+
+# (label, LIKE pattern, AGAINST string): common, rare and multi-word searches
+TERMS = [
+    ("common word", "%dell%", "+dell*"),
+    ("mid frequency", "%thinkpad%", "+thinkpad*"),
+    ("rare word", "%laboratuvar%", "+laboratuvar*"),
+    ("two words", "%macbook air%", "+macbook* +air*"),
+    ("no match", "%zzyzx%", "+zzyzx*"),
+]
+
+
+def connect(args):
+    return pymysql.connect(
+        host=args.host,
+        port=args.port,
+        user=args.user,
+        password=args.password,
+        database=args.database,
+        autocommit=True,
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def random_name(rng):
+    """'Dell Latitude Pro 5420' style item names"""
+    parts = [rng.choice(BRANDS), rng.choice(KINDS)]
+    parts += rng.sample(WORDS, rng.randint(0, 2))
+    parts.append(str(rng.randint(100, 9999)))
+    return " ".join(parts)
+
+
+def load(cursor, rows, rng):
+    """(Re)create the scratch table with `rows` rows, FULLTEXT index built after the load"""
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cursor.execute(f"""
+        CREATE TABLE {TABLE} (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL
+        ) ENGINE=InnoDB
+    """)
+    for start in range(0, rows, BATCH):
+        names = [(random_name(rng),) for _ in range(min(BATCH, rows - start))]
+        cursor.executemany(f"INSERT INTO {TABLE} (name) VALUES (%s)", names)
+    cursor.execute(f"ALTER TABLE {TABLE} ADD FULLTEXT INDEX ft_bench_name (name)")
+    cursor.execute(f"ANALYZE TABLE {TABLE}")
+
+
+def timed(cursor, sql, params, repeat):
+    """(median ms, rows returned) over `repeat` runs after one warm-up run"""
+    cursor.execute(sql, params)
+    count = len(cursor.fetchall())
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument("--host", default=os.getenv("DB_HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("DB_PORT", "3307")))
+    parser.add_argument("--user", default=os.getenv("DB_USER", "ctis_user"))
+    parser.add_argument("--password", default=os.getenv("DB_PASSWORD", ""))
+    parser.add_argument("--database", default=os.getenv("DB_NAME", "ctis_sims"))
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help=f"keep {TABLE} after the run")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    conn = connect(args)
+    results = []
+    try:
+        with conn.cursor() as cursor:
+            for rows in args.sizes:
+                print(f"Loading {rows:,} rows...", file=sys.stderr)
+                load(cursor, rows, rng)
+                for label, pattern, against in TERMS:
+                    like_ms, like_rows = timed(
+                        cursor, f"SELECT id, name FROM {TABLE} WHERE name LIKE %s", (pattern,), args.repeat
+                    )
+                    match_ms, match_rows = timed(
+                        cursor, f"SELECT id, name FROM {TABLE} WHERE MATCH(name) AGAINST (%s IN BOOLEAN MODE)",
+                        (against,), args.repeat
+                    )
+                    results.append((rows, label, like_ms, like_rows, match_ms, match_rows))
+            if not args.keep:
+                cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    finally:
+        conn.close()
+
+    print(f"\n{'rows':>10}  {'search':<14} {'LIKE ms':>9} {'LIKE n':>8} {'MATCH ms':>9} {'MATCH n':>8} {'speedup':>8}")
+    print("-" * 74)
+    for rows, label, like_ms, like_rows, match_ms, match_rows in results:
+        speedup = like_ms / match_ms if match_ms else float("inf")
+        print(f"{rows:>10,}  {label:<14} {like_ms:>9.2f} {like_rows:>8} {match_ms:>9.2f} {match_rows:>8} {speedup:>7.1f}x")
+    # Row counts differ where LIKE matches inside a word and MATCH only at word starts
+    print("\nLIKE n / MATCH n differ when a term occurs inside a word (substring vs word prefix).")
+
+
+if __name__ == "__main__":
+    main()
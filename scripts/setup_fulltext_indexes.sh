@@ -0,0 +1,121 @@
+#!/bin/bash
+
+# =====================================================
+# CTIS-SIMS: FULLTEXT Search Index Setup Script
+# =====================================================
+# Adds the single-column FULLTEXT indexes used by the AI service's
+# FULLTEXT_REWRITE option (LIKE '%term%' -> MATCH ... AGAINST).
+# Estimated time: seconds to a few minutes depending on data size
+# Safe to run: Only missing indexes are created
+
+set -e  # Exit on error
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+NC='\033[0m' # No Color
+
+echo -e "${GREEN}========================================${NC}"
+echo -e "${GREEN}CTIS-SIMS FULLTEXT Index Setup${NC}"
+echo -e "${GREEN}========================================${NC}"
+
+# Database connection details
+DB_HOST="${DB_HOST:-localhost}"
+DB_PORT="${DB_PORT:-3307}"
+DB_NAME="${DB_NAME:-ctis_sims}"
+DB_USER="${DB_USER:-ctis_user}"
+
+echo -e "\n${YELLOW}Database Configuration:${NC}"
+echo "  Host: $DB_HOST"
+echo "  Port: $DB_PORT"
+echo "  Database: $DB_NAME"
+echo "  User: $DB_USER"
+
+# Prompt for password
+echo -e "\n${YELLOW}Enter database password:${NC}"
+read -s DB_PASSWORD
+
+mysql_exec() {
+    mysql -h "$DB_HOST" -P "$DB_PORT" -u "$DB_USER" -p"$DB_PASSWORD" "$DB_NAME" "$@"
+}
+
+# Test connection
+echo -e "\n${YELLOW}Testing database connection...${NC}"
+if mysql_exec -e "SELECT 1;" > /dev/null 2>&1; then
+    echo -e "${GREEN}✓ Connection successful${NC}"
+else
+    echo -e "${RED}✗ Connection failed. Please check your credentials.${NC}"
+    exit 1
+fi
+
+# MATCH(col) needs an index over exactly that column, so every index is single-column.
+# Views (view_general_inventory) can't carry indexes; queries on them keep LIKE.
+INDEXES=(
+    "items:ft_items_name:name"
+    "items:ft_items_location:location"
+    "item_categories:ft_categories_name:category_name"
+    "users:ft_users_name:name"
+    "vendors:ft_vendors_name:vendor_name"
+)
+
+echo -e "\n${YELLOW}Creating FULLTEXT indexes...${NC}"
+for INDEX_SPEC in "${INDEXES[@]}"; do
+    IFS=':' read -r TABLE INDEX COLUMN <<< "$INDEX_SPEC"
+
+    EXISTS=$(mysql_exec -sse "SHOW INDEX FROM $TABLE WHERE Key_name = '$INDEX';" 2>/dev/null | wc -l)
+    if [ "$EXISTS" -gt 0 ]; then
+        echo -e "  ${GREEN}✓${NC} $TABLE.$INDEX (already exists)"
+        continue
+    fi
+
+    # The first FULLTEXT index on a table rebuilds it (adds FTS_DOC_ID)
+    if mysql_exec -e "ALTER TABLE $TABLE ADD FULLTEXT INDEX $INDEX ($COLUMN);"; then
+        echo -e "  ${GREEN}✓${NC} $TABLE.$INDEX created"
+    else
+        echo -e "  ${RED}✗${NC} $TABLE.$INDEX ${RED}(FAILED)${NC}"
+        exit 1
+    fi
+done
+
+# Verify indexes
+echo -e "\n${YELLOW}Verifying indexes...${NC}"
+for INDEX_SPEC in "${INDEXES[@]}"; do
+    IFS=':' read -r TABLE INDEX COLUMN <<< "$INDEX_SPEC"
+
+    RESULT=$(mysql_exec -sse "SHOW INDEX FROM $TABLE WHERE Key_name = '$INDEX' AND Index_type = 'FULLTEXT';" 2>/dev/null | wc -l)
+
+    if [ "$RESULT" -gt 0 ]; then
+        echo -e "  ${GREEN}✓${NC} $TABLE.$INDEX ($COLUMN)"
+    else
+        echo -e "  ${RED}✗${NC} $TABLE.$INDEX ${RED}(MISSING!)${NC}"
+    fi
+done
+
+# Analyze tables to update statistics
+echo -e "\n${YELLOW}Analyzing tables to update optimizer statistics...${NC}"
+TABLES=("items" "item_categories" "users" "vendors")
+
+for TABLE in "${TABLES[@]}"; do
+    mysql_exec -e "ANALYZE TABLE $TABLE;" > /dev/null 2>&1
+    echo -e "  ${GREEN}✓${NC} Analyzed $TABLE"
+done
+
+# Token size: words shorter than this are not indexed and can't be matched
+echo -e "\n${YELLOW}FULLTEXT settings:${NC}"
+mysql_exec -e "SHOW VARIABLES WHERE Variable_name IN ('innodb_ft_min_token_size', 'innodb_ft_enable_stopword');"
+
+echo -e "\n${GREEN}========================================${NC}"
+echo -e "${GREEN}Setup Complete!${NC}"
+echo -e "${GREEN}========================================${NC}"
+
+echo -e "\n${YELLOW}Next Steps:${NC}"
+echo "1. Set FULLTEXT_MIN_TOKEN_SIZE in ai-service/.env to innodb_ft_min_token_size above"
+echo "2. Enable the rewrite: FULLTEXT_REWRITE=true"
+echo "3. Compare latencies: python scripts/benchmark_fulltext.py"
+
+echo -e "\n${YELLOW}Performance Testing:${NC}"
+echo "  Then: EXPLAIN SELECT * FROM items WHERE MATCH(name) AGAINST ('+dell*' IN BOOLEAN MODE);"
+echo "  Expected: type 'fulltext', key 'ft_items_name'"
+
+exit 0